@@ -1,12 +1,17 @@
 # app.py
 import streamlit as st
 
+from src.warmup import start_background_warmup
+
 # Main entry for Streamlit
 st.set_page_config(
     page_title="Crypto Forecasting System",
     layout="wide"
 )
 
+# no-op after the first session, or when started via `python -m src.warmup`
+start_background_warmup()
+
 def main():
     st.title("Crypto Forecasting System – AE2")
 
@@ -0,0 +1,292 @@
+# benchmarks/cases.py
+"""
+Benchmark cases for the src/ hot paths.
+
+Each case is registered with @case(name, ...) and receives a Context that
+lazily builds the scaled input data (src.synthetic, lowercased like
+load_dataset); it returns a zero-argument callable that is timed by
+benchmarks/run.py. Cases can require optional packages
+(skipped when missing), daily bars, or cap the number of rows they run on.
+
+Functions
+---------
+- case(name, requires=(), daily_only=False, max_rows=None) -> decorator
+- Context(n_symbols, n_periods, freq, seed=0)
+- CASES
+"""
+
+import importlib.util
+import tempfile
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, Optional
+import pandas as pd
+
+CASES = {}
+
+
+@dataclass
+class Case:
+    name: str
+    build: Callable
+    requires: tuple = ()
+    daily_only: bool = False
+    max_rows: Optional[int] = None
+
+    def skip_reason(self, ctx: "Context") -> Optional[str]:
+        missing = [m for m in self.requires if importlib.util.find_spec(m) is None]
+        if missing:
+            return f"missing dependency: {', '.join(missing)}"
+        if self.daily_only and ctx.freq != "D":
+            return "daily bars only"
+        if self.max_rows is not None and ctx.n_rows > self.max_rows:
+            return f"more than {self.max_rows:,} rows"
+        return None
+
+
+def case(name: str, requires: tuple = (), daily_only: bool = False, max_rows: Optional[int] = None):
+    def decorator(build):
+        CASES[name] = Case(name, build, tuple(requires), daily_only, max_rows)
+        return build
+    return decorator
+
+
+@dataclass
+class Context:
+    n_symbols: int
+    n_periods: int
+    freq: str = "D"
+    seed: int = 0
+    _tmp: Optional[tempfile.TemporaryDirectory] = field(default=None, repr=False)
+
+    @property
+    def n_rows(self) -> int:
+        return self.n_symbols * self.n_periods
+
+    @cached_property
+    def df(self) -> pd.DataFrame:
+        from src.synthetic import generate
+
+        df = generate(self.n_symbols, periods=self.n_periods, freq=self.freq, seed=self.seed)
+        df.columns = [c.lower() for c in df.columns]
+        return df
+
+    @cached_property
+    def one(self) -> pd.DataFrame:
+        """Single-symbol slice (what the Dashboard charts receive)."""
+        first = self.df["symbol"].iloc[0]
+        return self.df[self.df["symbol"] == first].reset_index(drop=True)
+
+    @cached_property
+    def features(self) -> pd.DataFrame:
+        from src.features import add_features
+
+        return add_features(self.df)
+
+    @cached_property
+    def parquet_path(self) -> Path:
+        self._tmp = tempfile.TemporaryDirectory(prefix="bench_")
+        path = Path(self._tmp.name) / "final_df.parquet"
+        self.df.to_parquet(path, index=False)
+        return path
+
+    def close(self) -> None:
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+
+# ---- src/io ---------------------------------------------------------------
+
+@case("io.load_dataset")
+def _load_dataset(ctx):
+    from src.io import load_dataset
+
+    path = ctx.parquet_path
+    return lambda: load_dataset([path])
+
+
+@case("validation.validate")
+def _validate(ctx):
+    from src.validation import validate
+
+    return lambda: validate(ctx.df)
+
+
+# ---- src/alignment --------------------------------------------------------
+
+@case("alignment.build_calendar", max_rows=20_000_000)
+def _build_calendar(ctx):
+    from src.alignment import build_calendar
+
+    # the uncached build; aligned() memoizes it, so cases going through aligned() time cache hits
+    return lambda: build_calendar(ctx.df, freq=ctx.freq)
+
+
+# ---- src/ui ---------------------------------------------------------------
+
+@case("ui.resample_df.weekly", requires=("streamlit",))
+def _resample_weekly(ctx):
+    from src.ui import resample_df
+
+    return lambda: resample_df(ctx.one, "Weekly")
+
+
+@case("ui.resample_df.monthly", requires=("streamlit",))
+def _resample_monthly(ctx):
+    from src.ui import resample_df
+
+    return lambda: resample_df(ctx.one, "Monthly")
+
+
+@case("ui.calc_kpis", requires=("streamlit",))
+def _calc_kpis(ctx):
+    from src.ui import calc_kpis
+
+    return lambda: calc_kpis(ctx.one)
+
+
+# ---- src/charts -----------------------------------------------------------
+
+CHART_BUILDERS = [
+    "candlestick_figure", "line_price_figure", "volume_bar_figure", "sma_overlay_figure",
+    "rolling_volatility_figure", "drawdown_figure", "returns_histogram_figure",
+    "recent_activity_table_figure",
+]
+
+
+def _chart_case(builder: str):
+    def build(ctx):
+        from src import charts
+
+        func = getattr(charts, builder)
+        return lambda: func(ctx.one)
+    return build
+
+
+for _builder in CHART_BUILDERS:
+    case(f"charts.{_builder}", requires=("plotly",))(_chart_case(_builder))
+
+
+# ---- src/simulation -------------------------------------------------------
+
+@case("simulation.basic_backtest")
+def _basic_backtest(ctx):
+    from src.simulation import basic_backtest
+
+    def sma_cross(df):
+        fast = df["close"].rolling(7, min_periods=1).mean()
+        slow = df["close"].rolling(30, min_periods=1).mean()
+        return (fast > slow).astype(int) - (fast < slow).astype(int)
+
+    return lambda: basic_backtest(ctx.one, sma_cross)
+
+
+@case("simulation.portfolio_backtest", max_rows=5_000_000)
+def _portfolio_backtest(ctx):
+    import numpy as np
+    from src.simulation import portfolio_backtest, price_matrix
+
+    prices = price_matrix(ctx.df, freq=ctx.freq)
+    rng = np.random.default_rng(ctx.seed)
+    schemes = {f"scheme_{i}": pd.Series(rng.dirichlet(np.ones(prices.shape[1])), index=prices.columns)
+               for i in range(10)}
+    return lambda: portfolio_backtest(prices, schemes, rebalance="W", cost_bps=10.0)
+
+
+# ---- EDA generators (the src computations behind output_generate/EDA) ------
+
+@case("features.add_features")
+def _add_features(ctx):
+    from src.features import add_features
+
+    return lambda: add_features(ctx.df)
+
+
+@case("eda.distribution_tables")
+def _distributions(ctx):
+    from src.distributions import distribution_tables
+
+    return lambda: distribution_tables(ctx.df, "close", "price")
+
+
+@case("eda.build_sketches")
+def _sketches(ctx):
+    from src.sketches import build_sketches
+
+    return lambda: build_sketches(ctx.df, "close")
+
+
+@case("eda.acf_pacf_table", max_rows=20_000_000)
+def _acf(ctx):
+    from src.autocorr import acf_pacf_table
+
+    return lambda: acf_pacf_table(ctx.df, freq=ctx.freq)
+
+
+@case("eda.neighbor_index", daily_only=True)
+def _neighbors(ctx):
+    from src.neighbors import build_neighbor_index
+
+    return lambda: build_neighbor_index(ctx.df, k=10)
+
+
+@case("clustering.symbol_aggregates")
+def _aggregates(ctx):
+    from src.clustering import symbol_aggregates
+
+    feat = ctx.features
+    return lambda: symbol_aggregates(feat)
+
+
+@case("portfolio.frontier", daily_only=True)
+def _frontier(ctx):
+    from src.portfolio import efficient_frontier, historical_returns, returns_matrix, shrunk_covariance
+
+    returns = returns_matrix(ctx.df, lookback=365)
+    cov, _ = shrunk_covariance(returns)
+    mu = historical_returns(returns)
+    return lambda: efficient_frontier(mu, cov, points=50)
+
+
+# ---- forecasting loops ----------------------------------------------------
+
+@case("forecasting.daily_close_all", daily_only=True)
+def _daily_close(ctx):
+    from src.alignment import aligned
+    from src.forecasting import daily_close
+
+    symbols = ctx.df["symbol"].unique()
+
+    # as the trainers do: one aligned() lookup (memoized after the first repeat), then per-symbol reads
+    def run():
+        calendar = aligned(ctx.df)
+        return [daily_close(ctx.df, s, calendar=calendar) for s in symbols]
+    return run
+
+
+@case("global_model.train_global", requires=("sklearn",), daily_only=True, max_rows=5_000_000)
+def _train_global(ctx):
+    from src.global_model import train_global
+
+    return lambda: train_global(ctx.df)
+
+
+@case("global_model.rollout_30d", requires=("sklearn",), daily_only=True, max_rows=5_000_000)
+def _rollout(ctx):
+    from src.global_model import rollout, train_global
+
+    bundle = train_global(ctx.df, max_iter=50)
+    symbols = bundle["symbols"]
+    return lambda: rollout(bundle, ctx.df, symbols, steps=30)
+
+
+@case("arima.fixed_order_4_symbols", requires=("statsmodels",), daily_only=True)
+def _arima(ctx):
+    from src.arima import fit_forecast
+    from src.forecasting import daily_close
+
+    symbols = ctx.df["symbol"].unique()[:4]
+    series = {s: daily_close(ctx.df, s) for s in symbols}
+    orders = pd.DataFrame({"coin": symbols, "p": 1, "d": 1, "q": 0, "params": None})
+    return lambda: fit_forecast(series, orders, steps=30, n_jobs=1)
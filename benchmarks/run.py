@@ -0,0 +1,221 @@
+# benchmarks/run.py
+"""
+Benchmark the src/ hot paths on synthetic data at a chosen scale.
+
+Every case is timed `--repeat` times (best / median wall seconds), then run
+once more under tracemalloc for peak Python memory. Results are written as
+JSON to benchmarks/results/ and can be compared against a stored baseline;
+with --fail-on-regression the exit code is 1 when any case got slower.
+Each run also times a fixed reference workload; baseline times are scaled
+by the ratio of the two calibrations, so a uniformly slower (or busier)
+machine does not show up as a regression.
+
+Usage:
+    python benchmarks/run.py                          # "current" scale, all cases
+    python benchmarks/run.py --scale large --cases features. eda.
+    python benchmarks/run.py --baseline benchmarks/baseline.json --fail-on-regression
+    python benchmarks/run.py --save-baseline          # overwrite the stored baseline
+
+Functions
+---------
+- calibrate(repeat) -> float
+- time_case(fn, repeat) -> dict
+- run_cases(ctx, names, repeat) -> list
+- compare(results, baseline, tolerance, min_delta) -> list
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.cases import CASES, Context  # noqa: E402
+
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+BASELINE_PATH = PROJECT_ROOT / "benchmarks" / "baseline.json"
+
+# (symbols, periods, bar frequency)
+SCALES = {
+    "current": (30, 1100, "D"),
+    "medium": (200, 1825, "D"),
+    "large": (1000, 1825, "D"),
+    "hourly": (1000, 5 * 365 * 24, "h"),
+}
+
+
+def calibrate(repeat: int = 9) -> float:
+    """Best time of a fixed numpy / pandas workload (sort, groupby, rolling) in seconds."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({"key": rng.integers(0, 1000, 2_000_000), "value": rng.random(2_000_000)})
+
+    def workload():
+        np.sort(frame["value"].to_numpy())
+        frame.groupby("key")["value"].agg(["mean", "std"])
+        frame["value"].rolling(30).mean()
+
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        workload()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def time_case(fn, repeat: int = 5) -> dict:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"best_s": round(min(timings), 6), "median_s": round(statistics.median(timings), 6),
+            "peak_mb": round(peak / 2**20, 2)}
+
+
+def run_cases(ctx: Context, names: list, repeat: int = 5) -> list:
+    results = []
+    for name in names:
+        bench = CASES[name]
+        reason = bench.skip_reason(ctx)
+        if reason is None:
+            try:
+                stats = time_case(bench.build(ctx), repeat)
+                results.append({"case": name, "status": "ok", **stats})
+                print(f"{name:<45} {stats['best_s']:>10.4f}s {stats['peak_mb']:>10.1f} MB")
+                continue
+            except ImportError as e:
+                reason = f"import failed: {e}"
+        results.append({"case": name, "status": "skipped", "reason": reason})
+        print(f"{name:<45} skipped ({reason})")
+    return results
+
+
+def compare(results: list, baseline: dict, speed: float = 1.0, tolerance: float = 0.25,
+            min_delta: float = 0.01) -> list:
+    """
+    Cases whose best time exceeds the baseline (scaled by the machine speed
+    ratio `speed`) by more than `tolerance` (relative) and `min_delta`
+    seconds (absolute). The best of several runs is compared rather than
+    the median because it is the least noisy.
+    """
+    base = {r["case"]: r for r in baseline.get("results", []) if r.get("status") == "ok"}
+    regressions = []
+    for r in results:
+        old = base.get(r["case"])
+        if r["status"] != "ok" or old is None:
+            continue
+        expected = old["best_s"] * speed
+        delta = r["best_s"] - expected
+        ratio = r["best_s"] / expected if expected else float("inf")
+        r["baseline_best_s"] = round(expected, 6)
+        r["ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance and delta > min_delta:
+            regressions.append(r)
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _environment() -> dict:
+    import numpy as np
+    import pandas as pd
+
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "platform": platform.platform(), "machine": platform.machine(), "commit": _git_commit()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark src/ hot paths on synthetic data.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="current")
+    parser.add_argument("--symbols", type=int, default=None, help="Override the scale's symbol count")
+    parser.add_argument("--periods", type=int, default=None, help="Override the scale's bars per symbol")
+    parser.add_argument("--freq", choices=["D", "h"], default=None, help="Override the scale's bar frequency")
+    parser.add_argument("--cases", nargs="*", default=None, help="Case names or prefixes (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Result JSON (default: benchmarks/results/<ts>.json)")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also write {BASELINE_PATH.name}")
+    parser.add_argument("--list", action="store_true", help="List the cases and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+
+    n_symbols, n_periods, freq = SCALES[args.scale]
+    ctx = Context(args.symbols or n_symbols, args.periods or n_periods, args.freq or freq, args.seed)
+    names = [n for n in CASES if not args.cases or any(n.startswith(p) for p in args.cases)]
+    if not names:
+        raise ValueError(f"No cases match {args.cases}")
+
+    print(f"Scale {args.scale}: {ctx.n_symbols} symbols x {ctx.n_periods} bars ({ctx.freq}), "
+          f"{ctx.n_rows:,} rows")
+    calibration = calibrate()
+    try:
+        results = run_cases(ctx, names, args.repeat)
+    finally:
+        ctx.close()
+
+    report = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "scale": {"name": args.scale, "symbols": ctx.n_symbols, "periods": ctx.n_periods,
+                  "freq": ctx.freq, "rows": ctx.n_rows, "seed": args.seed, "repeat": args.repeat},
+        "environment": _environment(),
+        "calibration_s": round(calibration, 6),
+        "results": results,
+    }
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline.get("scale", {}).get("rows") != ctx.n_rows:
+            print(f"Warning: baseline was recorded at {baseline.get('scale', {}).get('rows')} rows")
+        speed = calibration / baseline["calibration_s"] if baseline.get("calibration_s") else 1.0
+        print(f"Machine speed vs baseline: x{speed:.2f} (calibration {calibration:.4f}s)")
+        regressions = compare(results, baseline, speed, args.tolerance)
+        report["regressions"] = [r["case"] for r in regressions]
+        for r in regressions:
+            print(f"REGRESSION {r['case']}: {r['baseline_best_s']:.4f}s -> {r['best_s']:.4f}s "
+                  f"(x{r['ratio']})")
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{datetime.now():%Y%m%dT%H%M%S}_{args.scale}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Results saved to {out}")
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {BASELINE_PATH}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,16 @@
 # output_generate/EDA/generate_lag_features.py
 
+import sys
 import pandas as pd
 from pathlib import Path
 
-def main():
-    # Project root
-    project_root = Path(__file__).resolve().parents[2]
+# Project root, importable for src
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.alignment import lagged
 
+def main():
     # Load dataset
     df_path = project_root / "data" / "processed" / "final_df.parquet"
     print("Loading:", df_path)
@@ -19,15 +23,16 @@ def main():
     out_dir = project_root / "data" / "EDA" / "lag"
     out_dir.mkdir(parents=True, exist_ok=True)
 
+    lags = {k: lagged(df, k) for k in (1, 7, 30)}
+
     symbols = sorted(df["symbol"].unique().tolist())
 
     for sym in symbols:
         df_s = df[df["symbol"] == sym].sort_values("date").copy()
 
-        # Lag features
-        df_s["lag_1"] = df_s["close"].shift(1)
-        df_s["lag_7"] = df_s["close"].shift(7)
-        df_s["lag_30"] = df_s["close"].shift(30)
+        # Lag features: the close k calendar days earlier (NaN if there was no bar)
+        for k in (1, 7, 30):
+            df_s[f"lag_{k}"] = lags[k].loc[df_s.index]
 
         # Save only relevant columns
         df_out = df_s[["date", "symbol", "close", "lag_1", "lag_7", "lag_30"]]
@@ -1,18 +1,31 @@
 # output_generate/EDA/generate_outliers.py
 
+import sys
 import pandas as pd
 from pathlib import Path
 
-def compute_outliers_iqr(df_s, col="close"):
-    """Return outliers and bounds using IQR."""
-    s = df_s[col].dropna()
+# Project root, importable for src
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
 
-    Q1 = s.quantile(0.25)
-    Q3 = s.quantile(0.75)
-    IQR = Q3 - Q1
+from src.sketches import build_sketches, iqr_bounds, load_sketches, range_summary
 
-    lower = Q1 - 1.5 * IQR
-    upper = Q3 + 1.5 * IQR
+def compute_outliers_iqr(df_s, col="close", bounds=None):
+    """
+    Return outliers and bounds using IQR. bounds=(lower, upper) skips the
+    quantile computation, e.g. when the fences come from merged sketches.
+    """
+    if bounds is None:
+        s = df_s[col].dropna()
+
+        Q1 = s.quantile(0.25)
+        Q3 = s.quantile(0.75)
+        IQR = Q3 - Q1
+
+        lower = Q1 - 1.5 * IQR
+        upper = Q3 + 1.5 * IQR
+    else:
+        lower, upper = bounds
 
     outliers = df_s[(df_s[col] < lower) | (df_s[col] > upper)].copy()
     outliers["lower_bound"] = lower
@@ -21,9 +34,6 @@ def compute_outliers_iqr(df_s, col="close"):
     return outliers, lower, upper
 
 def main():
-    # Project root
-    project_root = Path(__file__).resolve().parents[2]
-
     # Input data
     df_path = project_root / "data" / "processed" / "final_df.parquet"
     print("Loading:", df_path)
@@ -32,6 +42,13 @@ def main():
     df.columns = [c.lower() for c in df.columns]
     df["date"] = pd.to_datetime(df["date"], errors="coerce")
 
+    # IQR fences from the per-month sketches written by summary_stats.py
+    try:
+        moments, digests = load_sketches(project_root / "data" / "EDA" / "sketches")
+    except FileNotFoundError:
+        moments, digests = build_sketches(df, value_col="close")
+    fences = iqr_bounds(range_summary(moments, digests)).set_index("symbol")
+
     # Output folder
     out_dir = project_root / "data" / "EDA" / "outliers"
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -41,7 +58,8 @@ def main():
     for sym in symbols:
         df_s = df[df["symbol"] == sym].sort_values("date").copy()
 
-        outliers, low, high = compute_outliers_iqr(df_s, col="close")
+        bounds = tuple(fences.loc[sym, ["lower_bound", "upper_bound"]]) if sym in fences.index else None
+        outliers, low, high = compute_outliers_iqr(df_s, col="close", bounds=bounds)
 
         out_file = out_dir / f"{sym}_outliers.csv"
         outliers.to_csv(out_file, index=False)
@@ -1,12 +1,16 @@
 # output_generate/EDA/generate_return_analysis.py
 
+import sys
 import pandas as pd
 from pathlib import Path
 
-def main():
-    # Project root
-    project_root = Path(__file__).resolve().parents[2]
+# Project root, importable for src
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.alignment import calendar_returns
 
+def main():
     # Input dataset
     df_path = project_root / "data" / "processed" / "final_df.parquet"
     print("Loading:", df_path)
@@ -19,16 +23,19 @@ def main():
     out_dir = project_root / "data" / "EDA" / "returns"
     out_dir.mkdir(parents=True, exist_ok=True)
 
+    # daily returns on the shared calendar: NaN where the previous day had no bar
+    returns = calendar_returns(df)
+
     symbols = sorted(df["symbol"].unique().tolist())
 
     for sym in symbols:
         df_s = df[df["symbol"] == sym].sort_values("date").copy()
 
         # Daily returns
-        df_s["returns"] = df_s["close"].pct_change().fillna(0)
+        df_s["returns"] = returns.loc[df_s.index].fillna(0)
 
-        # Cumulative returns
-        df_s["cumulative_returns"] = (1 + df_s["returns"]).cumprod() - 1
+        # Cumulative returns, from the closes so a move across a gap still counts
+        df_s["cumulative_returns"] = df_s["close"] / df_s["close"].iloc[0] - 1
 
         # Drawdown
         running_max = df_s["close"].cummax()
@@ -1,12 +1,16 @@
 # output_generate/EDA/generate_returns.py
 
+import sys
 import pandas as pd
 from pathlib import Path
 
-def main():
-    # Project root: (script is 2 levels deep)
-    project_root = Path(__file__).resolve().parents[2]
+# Project root, importable for src (script is 2 levels deep)
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.alignment import calendar_returns
 
+def main():
     # Input dataset
     df_path = project_root / "data" / "processed" / "final_df.parquet"
 
@@ -21,13 +25,13 @@ def main():
     df.columns = [c.lower() for c in df.columns]
     df["date"] = pd.to_datetime(df["date"], errors="coerce")
 
+    # returns over the previous calendar day on the shared grid: NaN across gaps
+    df["returns"] = calendar_returns(df)
+
     symbols = sorted(df["symbol"].unique().tolist())
 
     for sym in symbols:
-        df_s = df[df["symbol"] == sym].sort_values("date").copy()
-
-        # compute returns
-        df_s["returns"] = df_s["close"].pct_change()
+        df_s = df[df["symbol"] == sym].sort_values("date")
 
         # output file for that coin
         out_file = out_dir / f"{sym}_returns.csv"
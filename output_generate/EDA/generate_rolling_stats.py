@@ -1,12 +1,16 @@
 # output_generate/EDA/generate_rolling_stats.py
 
+import sys
 import pandas as pd
 from pathlib import Path
 
-def main():
-    # Project root (script is two folders deep)
-    project_root = Path(__file__).resolve().parents[2]
+# Project root, importable for src
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.alignment import calendar_returns
 
+def main():
     # Load final_df.parquet
     df_path = project_root / "data" / "processed" / "final_df.parquet"
     print("Loading:", df_path)
@@ -20,6 +24,9 @@ def main():
     out_dir = project_root / "data" / "EDA" / "rolling"
     out_dir.mkdir(parents=True, exist_ok=True)
 
+    # daily returns on the shared calendar: NaN where the previous day had no bar
+    returns = calendar_returns(df)
+
     symbols = sorted(df["symbol"].unique().tolist())
 
     for sym in symbols:
@@ -31,7 +38,7 @@ def main():
         df_s["sma_100"] = df_s["close"].rolling(window=100, min_periods=1).mean()
 
         # Rolling Volatility (30 days)
-        df_s["returns"] = df_s["close"].pct_change()
+        df_s["returns"] = returns.loc[df_s.index]
         df_s["volatility_30"] = df_s["returns"].rolling(window=30, min_periods=1).std()
 
         # Rolling Volume MA
@@ -1,8 +1,15 @@
 # output_generate/EDA/generate_seasonality.py
 
+import sys
 import pandas as pd
 from pathlib import Path
 
+# Project root, importable for src
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.alignment import calendar_returns
+
 def compute_monthly_returns(df_s):
     """Compute month-end returns."""
     monthly = df_s.set_index("date")["close"].resample("M").last().pct_change().dropna()
@@ -11,9 +18,8 @@ def compute_monthly_returns(df_s):
     return monthly
 
 def compute_day_of_week_returns(df_s):
-    """Compute average day-of-week returns."""
+    """Compute average day-of-week returns (df_s carries calendar returns)."""
     df_s = df_s.copy()
-    df_s["returns"] = df_s["close"].pct_change()
     df_s["dow"] = df_s["date"].dt.day_name()
 
     dow_avg = (
@@ -28,9 +34,6 @@ def compute_day_of_week_returns(df_s):
     return dow_avg
 
 def main():
-    # Project root
-    project_root = Path(__file__).resolve().parents[2]
-
     # Load final_df.parquet
     df_path = project_root / "data" / "processed" / "final_df.parquet"
     print("Loading:", df_path)
@@ -43,6 +46,10 @@ def main():
     out_dir = project_root / "data" / "EDA" / "seasonality"
     out_dir.mkdir(parents=True, exist_ok=True)
 
+    # daily returns on the shared calendar: NaN where the previous day had no bar;
+    # month-end returns compare the last close of each month, so gaps inside it don't matter
+    df["returns"] = calendar_returns(df)
+
     symbols = sorted(df["symbol"].unique().tolist())
 
     for sym in symbols:
@@ -1,12 +1,16 @@
 # output_generate/EDA/generate_volatility_clustering.py
 
+import sys
 import pandas as pd
 from pathlib import Path
 
-def main():
-    # Project root (script lives 2 folders deep)
-    project_root = Path(__file__).resolve().parents[2]
+# Project root, importable for src
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.alignment import calendar_returns
 
+def main():
     # Load final dataset
     df_path = project_root / "data" / "processed" / "final_df.parquet"
     print("Loading:", df_path)
@@ -19,13 +23,16 @@ def main():
     out_dir = project_root / "data" / "EDA" / "volatility"
     out_dir.mkdir(parents=True, exist_ok=True)
 
+    # daily returns on the shared calendar: NaN where the previous day had no bar
+    returns = calendar_returns(df)
+
     symbols = sorted(df["symbol"].unique().tolist())
 
     for sym in symbols:
         df_s = df[df["symbol"] == sym].sort_values("date").copy()
 
         # Daily returns
-        df_s["returns"] = df_s["close"].pct_change()
+        df_s["returns"] = returns.loc[df_s.index]
 
         # Volatility clustering measure — returns squared
         df_s["returns_squared"] = df_s["returns"] ** 2
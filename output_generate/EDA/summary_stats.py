@@ -1,12 +1,16 @@
 # output_generate/EDA/generate_summary_stats.py
 
+import sys
 import pandas as pd
 from pathlib import Path
 
-def main():
-    # Project root (two levels up from this script)
-    project_root = Path(__file__).resolve().parents[2]
+# Project root (two levels up from this script), importable for src
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.sketches import build_sketches, range_summary, save_sketches
 
+def main():
     # Input final_df file
     df_path = project_root / "data" / "processed" / "final_df.parquet"
 
@@ -23,29 +27,15 @@ def main():
     df.columns = [c.lower() for c in df.columns]
     df["date"] = pd.to_datetime(df["date"], errors="coerce")
 
-    symbols = sorted(df["symbol"].unique().tolist())
-    rows = []
-
-    for sym in symbols:
-        df_s = df[df["symbol"] == sym].copy()
-        close = df_s["close"].dropna()
-
-        stats = {
-            "symbol": sym,
-            "count": int(close.count()),
-            "mean": float(close.mean()),
-            "median": float(close.median()),
-            "std": float(close.std()),
-            "min": float(close.min()),
-            "max": float(close.max()),
-            "skew": float(close.skew()),
-            "kurtosis": float(close.kurtosis()),
-            "missing_count": int(df_s.isnull().any(axis=1).sum())
-        }
-
-        rows.append(stats)
-
-    summary_df = pd.DataFrame(rows)
+    # Per-symbol, per-month moment sketches and t-digests; any date range can
+    # later be summarised by merging these instead of rescanning the bars
+    moments, digests = build_sketches(df, value_col="close")
+    sketch_dir = save_sketches(moments, digests, out_dir / "sketches")
+    print("Sketches saved to:", sketch_dir)
+
+    summary_df = range_summary(moments, digests)[
+        ["symbol", "count", "mean", "median", "std", "min", "max", "skew", "kurtosis", "missing_count"]
+    ]
 
     # Save CSV
     summary_df.to_csv(out_file, index=False)
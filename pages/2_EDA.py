@@ -2,10 +2,20 @@
 import streamlit as st
 import pandas as pd
 from pathlib import Path
-import plotly.express as px
-import plotly.graph_objects as go
+
+from src.autocorr import load_acf_pacf
+from src.distributions import load_distribution, load_distribution_summary
+from src.lazy import lazy_import
+from src.neighbors import NeighborIndex, build_neighbor_index
+from src.profiling import render_sidebar_panel, stage, start_page
+from src.sketches import load_sketches, range_summary
+from src.warmup import dataset
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 st.set_page_config(page_title=" EDA", layout="wide")
+profiler = start_page("EDA")
 
 
 PROJECT_ROOT = Path(__file__).resolve()
@@ -19,28 +29,72 @@ EDA_DIR = PROJECT_ROOT / "data" / "EDA"
 def load_summary():
     return pd.read_csv(EDA_DIR / "summary_stats.csv")
 
-summary_df = load_summary()
+with stage("load"):
+    summary_df = load_summary()
 symbols = sorted(summary_df["symbol"].unique())
 
 
 @st.cache_data
-def compute_intercoin_correlation():
-    df = pd.read_parquet(PROJECT_ROOT / "data" / "processed" / "final_df.parquet")
-    df.columns = [c.lower() for c in df.columns]
+def load_summary_sketches():
+    return load_sketches(EDA_DIR / "sketches")
 
-    df = df[["date", "symbol", "close"]].copy()
-    df["returns"] = df.groupby("symbol")["close"].pct_change()
 
-    pivot = (
-        df.pivot(index="date", columns="symbol", values="returns")
-        .dropna(how="all")
-    )
+@st.cache_resource
+def load_neighbor_index():
+    index_path = EDA_DIR / "correlation" / "neighbor_index.npz"
+    if index_path.exists():
+        return NeighborIndex.load(index_path)
+
+    return build_neighbor_index(dataset())
+
+
+@st.cache_data
+def load_binned(symbol, series, kind):
+    return load_distribution(symbol, series, kind, path=EDA_DIR / "distributions" / "histograms.parquet")
+
+
+@st.cache_data
+def load_dist_summary(symbol):
+    return load_distribution_summary(symbol, path=EDA_DIR / "distributions" / "distribution_summary.parquet")
+
 
-    corr = pivot.corr()
-    corr.index.name = None
-    corr.columns.name = None
+@st.cache_data
+def load_correlogram(symbol, series):
+    return load_acf_pacf(symbol, series, path=EDA_DIR / "lag" / "acf_pacf.parquet")
 
-    return corr
+
+def correlogram_figure(corr, column, title):
+    """Stem-style bars for lags >= 1 with the shaded confidence band."""
+    corr = corr[corr["lag"] >= 1]
+    band = corr[f"{column}_band"]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=pd.concat([corr["lag"], corr["lag"][::-1]]),
+        y=pd.concat([band, -band[::-1]]),
+        fill="toself", line=dict(width=0), fillcolor="rgba(100, 149, 237, 0.25)",
+        name="95% band", hoverinfo="skip",
+    ))
+    fig.add_trace(go.Bar(x=corr["lag"], y=corr[column], name=column.upper(), width=0.3))
+    fig.update_layout(title=title, xaxis_title="Lag", yaxis_title=column.upper())
+    return fig
+
+
+def binned_figure(symbol, series, kind, x_title):
+    """Pre-binned bars (density scale) with the KDE curve overlaid."""
+    bars = load_binned(symbol, series, kind)
+    kde = load_binned(symbol, series, "kde")
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=(bars["x0"] + bars["x1"]) / 2,
+        y=bars["density"],
+        width=bars["x1"] - bars["x0"],
+        customdata=bars[["x0", "x1", "count"]],
+        hovertemplate="%{customdata[0]:.4g} – %{customdata[1]:.4g}<br>count: %{customdata[2]:.0f}<extra></extra>",
+        name="Histogram",
+    ))
+    fig.add_trace(go.Scatter(x=kde["x0"], y=kde["density"], mode="lines", name="KDE"))
+    fig.update_layout(bargap=0, xaxis_title=x_title, yaxis_title="Density")
+    return fig
 
 
 st.title("Exploratory Data Analysis ")
@@ -74,6 +128,16 @@ if eda_option == "Summary Statistics":
     st.header("Summary Statistics")
     st.dataframe(summary_df[summary_df["symbol"] == symbol])
 
+    if (EDA_DIR / "sketches" / "moments.parquet").exists():
+        moments, digests = load_summary_sketches()
+        periods = sorted(moments.loc[moments["symbol"] == symbol, "period"].dt.date.unique())
+        if periods:
+            start, end = st.select_slider(
+                "Date range (monthly partitions)", options=periods, value=(periods[0], periods[-1])
+            )
+            st.dataframe(range_summary(moments, digests, start=start, end=end, symbols=[symbol]))
+            st.caption("Merged from per-month moment sketches and t-digests; quantiles are approximate.")
+
 
 elif eda_option == "Price Trend":
     df = pd.read_csv(EDA_DIR / "returns" / f"{symbol}_returns.csv", parse_dates=["date"])
@@ -84,65 +148,47 @@ elif eda_option == "Price Trend":
 
 
 elif eda_option == "Distribution Analysis":
-    price_df = pd.read_csv(
-        EDA_DIR / "distributions" / "price" / f"{symbol}_price_distribution.csv"
-    )
-    returns_df = pd.read_csv(
-        EDA_DIR / "distributions" / "returns" / f"{symbol}_returns_distribution.csv"
-    )
+    bin_label = st.radio("Binning", ["Fixed width", "Equal frequency"], horizontal=True)
+    kind = "fixed" if bin_label == "Fixed width" else "quantile"
 
     st.subheader("Price Distribution")
-    st.plotly_chart(px.histogram(price_df, x="close", nbins=50), use_container_width=True)
+    st.plotly_chart(binned_figure(symbol, "price", kind, "close"), use_container_width=True)
 
     st.subheader("Returns Distribution")
-    st.plotly_chart(
-        px.histogram(returns_df, x="returns", nbins=50),
-        use_container_width=True,
-    )
+    st.plotly_chart(binned_figure(symbol, "returns", kind, "returns"), use_container_width=True)
+
+    st.subheader("Summary Quantiles")
+    st.dataframe(load_dist_summary(symbol).drop(columns="symbol").set_index("series"))
 
 
 elif eda_option == "Inter-Coin Correlation":
     st.header("Inter-Cryptocurrency Correlation (Returns-Based)")
 
     ref_coin = symbol
-    corr = compute_intercoin_correlation()
+    neighbor_index = load_neighbor_index()
 
-    if ref_coin not in corr.columns:
-        st.error(f"{ref_coin} not found in correlation matrix.")
+    if ref_coin not in neighbor_index:
+        st.error(f"{ref_coin} not found in correlation index.")
     else:
-        coin_corr = (
-            corr[ref_coin]
-            .drop(index=ref_coin)
-            .dropna()
-            .reset_index()
-        )
-        coin_corr.columns = ["Coin", "Correlation"]
-
         top_positive = (
-            coin_corr
-            .sort_values("Correlation", ascending=False)
-            .head(4)
+            neighbor_index.top_positive(ref_coin, 4)
+            .rename(columns={"symbol": "Coin", "correlation": "Correlation"})
         )
 
-        negative_corrs = coin_corr[coin_corr["Correlation"] < 0]
+        bottom_set = (
+            neighbor_index.bottom(ref_coin, 4)
+            .rename(columns={"symbol": "Coin", "correlation": "Correlation"})
+        )
+        negative_corrs = bottom_set[bottom_set["Correlation"] < 0]
 
         if not negative_corrs.empty:
-            bottom_set = (
-                negative_corrs
-                .sort_values("Correlation")
-                .head(4)
-            )
+            bottom_set = negative_corrs
             negative_title = f"Top 4 Negatively Correlated with {ref_coin}"
             caption_text = (
                 "Negative correlations indicate divergent price movement "
                 "relative to the selected cryptocurrency."
             )
         else:
-            bottom_set = (
-                coin_corr
-                .sort_values("Correlation")
-                .head(4)
-            )
             negative_title = f"Top 4 Least Correlated with {ref_coin}"
             caption_text = (
                 "No strong negative correlations were observed. "
@@ -219,6 +265,22 @@ elif eda_option == "Volatility Clustering":
     )
     st.plotly_chart(px.line(df, x="date", y="returns_squared"), use_container_width=True)
 
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(
+            correlogram_figure(load_correlogram(symbol, "returns"), "acf", "ACF of Returns"),
+            use_container_width=True,
+        )
+    with col2:
+        st.plotly_chart(
+            correlogram_figure(load_correlogram(symbol, "squared_returns"), "acf", "ACF of Squared Returns"),
+            use_container_width=True,
+        )
+    st.caption(
+        "Volatility clustering shows up as significant autocorrelation in squared returns "
+        "while raw returns stay inside the band."
+    )
+
 elif eda_option == "Return Analysis":
     cum = pd.read_csv(
         EDA_DIR / "returns" / f"{symbol}_cumulative_returns.csv", parse_dates=["date"]
@@ -231,5 +293,17 @@ elif eda_option == "Return Analysis":
 
 elif eda_option == "Lag Features (ACF / PACF)":
     st.dataframe(pd.read_csv(EDA_DIR / "lag" / f"{symbol}_lags.csv").tail(15))
-    st.dataframe(pd.read_csv(EDA_DIR / "lag" / f"{symbol}_acf.csv"))
-    st.dataframe(pd.read_csv(EDA_DIR / "lag" / f"{symbol}_pacf.csv"))
+
+    series_labels = {"Close": "close", "Returns": "returns", "Squared Returns": "squared_returns"}
+    series_label = st.radio("Series", list(series_labels.keys()), horizontal=True)
+    corr = load_correlogram(symbol, series_labels[series_label])
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(correlogram_figure(corr, "acf", f"ACF — {series_label}"), use_container_width=True)
+    with col2:
+        st.plotly_chart(correlogram_figure(corr, "pacf", f"PACF — {series_label}"), use_container_width=True)
+    st.dataframe(corr)
+
+render_sidebar_panel(profiler)
+profiler.finish()
@@ -4,9 +4,16 @@ import json
 import streamlit as st
 import pandas as pd
 from pathlib import Path
-import plotly.express as px
+
+from src.lazy import lazy_import
+from src.neighbors import NeighborIndex, build_neighbor_index
+from src.profiling import render_sidebar_panel, stage, start_page
+from src.warmup import dataset
+
+px = lazy_import("plotly.express")
 
 st.set_page_config(page_title=" Clustering", layout="wide")
+profiler = start_page("Clustering")
 
 PROJECT_ROOT = Path(__file__).resolve()
 while PROJECT_ROOT.name != "crypto_forecasting_system":
@@ -32,16 +39,31 @@ def load_representatives():
 def load_representative_metrics():
     return pd.read_csv(EDA_DIR / "cluster_representatives_reasoning.csv")
 
-def load_cluster_correlation(coin: str):
-    df = pd.read_csv(EDA_DIR / f"cluster_correlation_{coin}.csv")
-    df.columns = [c.lower() for c in df.columns]
-    return df
+@st.cache_data
+def load_cluster_regimes():
+    path = EDA_DIR / "cluster_regimes.parquet"
+    return pd.read_parquet(path) if path.exists() else None
+
+@st.cache_data
+def load_cluster_scores():
+    path = EDA_DIR / "cluster_scores.csv"
+    return pd.read_csv(path) if path.exists() else None
+
+@st.cache_resource
+def load_neighbor_index():
+    index_path = PROJECT_ROOT / "data" / "EDA" / "correlation" / "neighbor_index.npz"
+    if index_path.exists():
+        return NeighborIndex.load(index_path)
 
+    return build_neighbor_index(dataset())
 
-clusters_df = load_cluster_labels()
-cluster_groups = load_cluster_groups()
-rep_df = load_representatives()
-rep_metrics_df = load_representative_metrics()
+
+with stage("load"):
+    clusters_df = load_cluster_labels()
+    neighbor_index = load_neighbor_index()
+    cluster_groups = load_cluster_groups()
+    rep_df = load_representatives()
+    rep_metrics_df = load_representative_metrics()
 
 
 st.title("Cryptocurrency Clustering Analysis (AE2)")
@@ -74,6 +96,23 @@ st.caption(
 )
 
 
+scores_df = load_cluster_scores()
+if scores_df is not None:
+    st.header("Choice of k (Silhouette Score)")
+    fig = px.line(
+        scores_df,
+        x="k",
+        y="silhouette",
+        markers=True,
+        title="Silhouette Score by Number of Clusters"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(
+        "Scores are produced by `python -m src.clustering`; "
+        "higher silhouette values indicate better separated clusters."
+    )
+
+
 st.header("Cluster-Level Behavioural Summary")
 
 metrics_df = rep_metrics_df.copy()
@@ -152,6 +191,49 @@ for cluster_id in sorted(cluster_groups.keys(), key=int):
         st.info(reason_text)
 
 
+regimes_df = load_cluster_regimes()
+if regimes_df is not None:
+    st.header("Regime Migration Over Time")
+
+    st.markdown(
+        """
+Clusters are recomputed on a **rolling window** (warm-started from the previous
+window and aligned with Hungarian matching), so a cluster ID keeps its meaning
+over time and coins can be seen **migrating between behavioural groups**.
+"""
+    )
+
+    regimes_long = (
+        regimes_df
+        .reset_index()
+        .melt(id_vars="window_end", var_name="symbol", value_name="cluster")
+    )
+    regimes_long = regimes_long[regimes_long["cluster"] >= 0]
+    regimes_long["window_end"] = regimes_long["window_end"].dt.strftime("%Y-%m-%d")
+    regimes_long["cluster"] = regimes_long["cluster"].astype(str)
+
+    fig = px.scatter(
+        regimes_long,
+        x="cluster",
+        y="symbol",
+        color="cluster",
+        animation_frame="window_end",
+        category_orders={"cluster": sorted(regimes_long["cluster"].unique())},
+        title="Cluster Membership per Window",
+        height=700
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    fig = px.imshow(
+        regimes_df.T,
+        aspect="auto",
+        color_continuous_scale="Viridis",
+        labels={"x": "Window end", "y": "Symbol", "color": "Cluster"},
+        title="Regime Label Matrix (window × symbol)"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+
 st.header("Correlation Analysis for Representative Coins")
 
 st.markdown(
@@ -167,22 +249,16 @@ for _, row in rep_df.iterrows():
     cluster_id = row["cluster"]
     coin = row["representative_coin"]
 
-    corr_df = load_cluster_correlation(coin)
+    top_positive = neighbor_index.top_positive(coin, 4)
 
-    top_positive = (
-        corr_df
-        .sort_values("correlation", ascending=False)
-        .head(4)
-    )
-
-    negative_corrs = corr_df[corr_df["correlation"] < 0]
+    bottom_set = neighbor_index.bottom(coin, 4)
+    negative_corrs = bottom_set[bottom_set["correlation"] < 0]
 
     if not negative_corrs.empty:
-        bottom_set = negative_corrs.sort_values("correlation").head(4)
+        bottom_set = negative_corrs
         bottom_title = "Top 4 Negatively Correlated Coins"
         caption_text = "Negative correlations indicate inverse price movement."
     else:
-        bottom_set = corr_df.sort_values("correlation").head(4)
         bottom_title = "Top 4 Least Correlated Coins"
         caption_text = (
             "No strong negative correlations were observed; "
@@ -212,3 +288,6 @@ for _, row in rep_df.iterrows():
         )
 
     st.caption(caption_text)
+
+render_sidebar_panel(profiler)
+profiler.finish()
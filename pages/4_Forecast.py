@@ -1,35 +1,67 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import os
-
-
-MODELS_PATH = "models"
-
-coins = ["BTC-USD", "ETH-USD", "SOL-USD", "AVAX-USD"]
-
-model_map = {
-    "Random Forest": {
-        "past": "rf_past_predictions",
-        "forecast": "rf_forecast_next_6_months",
-        "pred_col": "rf_predicted_close"
-    },
-    "ARIMA": {
-        "past": "arima_past_predictions",
-        "forecast": "arima_forecast_next_6_months",
-        "pred_col": "arima_fitted_close"
-    },
-    "LSTM": {
-        "past": "lstm_past_predictions",
-        "forecast": "lstm_forecast_next_6_months",
-        "pred_col": "lstm_predicted_close"
-    },
-    "Prophet": {
-        "past": "prophet_past_predictions",
-        "forecast": "prophet_forecast_next_6_months",
-        "pred_col": "prophet_predicted_close"
-    }
-}
+
+from src.evaluation import load_metrics
+from src.forecast_store import available_series, forecast_frame, latest_run_id, past_frame
+from src.lazy import lazy_import
+from src.profiling import render_sidebar_panel, stage, start_page
+
+go = lazy_import("plotly.graph_objects")
+
+
+profiler = start_page("Forecast")
+run_id = latest_run_id()
+if run_id is None:
+    st.error("No forecast run published (run `python -m src.forecast_store import-legacy`)")
+    profiler.finish()
+    st.stop()
+
+
+@st.cache_data
+def load_series_index(run_id):
+    return available_series(run_id=run_id)
+
+
+@st.cache_data
+def load_past(coin, model_name, run_id):
+    return past_frame(coin, model_name, run_id=run_id)
+
+
+@st.cache_data
+def load_forecast(coin, model_name, run_id):
+    return forecast_frame(coin, model_name, run_id=run_id)
+
+
+@st.cache_data
+def load_model_accuracy(coin, model_name):
+    """Global MAPE of a coin/model, preferring out-of-sample (holdout) metrics."""
+    for source in ("holdout", "in_sample"):
+        try:
+            m = load_metrics(scope="global", source=source, symbol=coin, model=model_name)
+        except FileNotFoundError:
+            return None, None
+        if not m.empty:
+            return float(m["MAPE (%)"].iloc[0]), source
+    return None, None
+
+
+FAN_BANDS = [("p05", "p95", "90% interval", "rgba(50, 205, 50, 0.15)"),
+             ("p25", "p75", "50% interval", "rgba(50, 205, 50, 0.30)")]
+
+
+def add_fan(fig, df):
+    """Shaded quantile bands under the point forecast (only for stored quantiles)."""
+    for lo, hi, name, color in FAN_BANDS:
+        if lo not in df.columns or hi not in df.columns:
+            continue
+        fig.add_trace(go.Scatter(x=df["Date"], y=df[hi], mode="lines", line=dict(width=0),
+                                 showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=df["Date"], y=df[lo], mode="lines", line=dict(width=0),
+                                 fill="tonexty", fillcolor=color, name=name))
+
+
+series = load_series_index(run_id)
+coins = series["coin"].unique().tolist()
 
 horizon_map = {
     "1 Day": 1,
@@ -48,22 +80,17 @@ SIGNAL_HORIZONS = {
 st.sidebar.title("Forecast Controls")
 
 coin = st.sidebar.selectbox("Select Coin", coins)
-model_name = st.sidebar.selectbox("Select Model", list(model_map.keys()))
+model_name = st.sidebar.selectbox(
+    "Select Model", series.loc[series["coin"] == coin, "model"].tolist()
+)
 horizon_label = st.sidebar.selectbox("Forecast Horizon (Graph Only)", list(horizon_map.keys()))
 
 horizon_days = horizon_map[horizon_label]
-cfg = model_map[model_name]
 
 
-past_df = pd.read_csv(
-    os.path.join(MODELS_PATH, f"{coin}_{cfg['past']}.csv"),
-    parse_dates=["Date"]
-)
-
-forecast_df = pd.read_csv(
-    os.path.join(MODELS_PATH, f"{coin}_{cfg['forecast']}.csv"),
-    parse_dates=["Date"]
-)
+with stage("load"):
+    past_df = load_past(coin, model_name, run_id)
+    forecast_df = load_forecast(coin, model_name, run_id)
 
 
 graph_forecast_df = forecast_df[forecast_df["Day_Number"] <= horizon_days]
@@ -71,87 +98,95 @@ graph_forecast_df = forecast_df[forecast_df["Day_Number"] <= horizon_days]
 
 last_actual_price = past_df["Close"].iloc[-1]
 
-signal_rows = []
-
-for label, days in SIGNAL_HORIZONS.items():
-    row = forecast_df[forecast_df["Day_Number"] == days]
-
-    if row.empty:
-        continue
-
-    forecast_price = row["Forecast_Close"].values[0]
-    pct_change = ((forecast_price - last_actual_price) / last_actual_price) * 100
-
-    if pct_change > 2:
-        signal = "BUY"
-    elif pct_change < -2:
-        signal = "SELL"
-    else:
-        signal = "HOLD"
-
-    signal_rows.append({
-        "Horizon": label,
-        "Forecast Price": round(forecast_price, 2),
-        "Expected Change (%)": round(pct_change, 2),
-        "Signal": signal
-    })
-
-signal_df = pd.DataFrame(signal_rows)
-
-
-confidence_map = {
-    "Random Forest": 98.62,
-    "ARIMA": 92.15,
-    "LSTM": 90.34,
-    "Prophet": 88.70
-}
-
-confidence = confidence_map.get(model_name, 90.0)
-
-
-fig = go.Figure()
-
-fig.add_trace(go.Scatter(
-    x=past_df["Date"],
-    y=past_df["Close"],
-    mode="lines",
-    name="Actual",
-    line=dict(color="white", width=2)
-))
-
-fig.add_trace(go.Scatter(
-    x=past_df["Date"],
-    y=past_df[cfg["pred_col"]],
-    mode="lines",
-    name="Past Prediction",
-    line=dict(color="orange", dash="dash")
-))
-
-fig.add_trace(go.Scatter(
-    x=graph_forecast_df["Date"],
-    y=graph_forecast_df["Forecast_Close"],
-    mode="lines+markers",
-    name=f"Forecast ({horizon_label})",
-    line=dict(color="lime", width=3)
-))
-
-fig.update_layout(
-    title=f"{coin} — {model_name} Forecast",
-    xaxis_title="Date",
-    yaxis_title="Price",
-    template="plotly_dark",
-    hovermode="x unified",
-    height=600
-)
+with stage("signals"):
+    signal_rows = []
+
+    for label, days in SIGNAL_HORIZONS.items():
+        row = forecast_df[forecast_df["Day_Number"] == days]
+
+        if row.empty:
+            continue
+
+        forecast_price = row["Forecast_Close"].values[0]
+        pct_change = ((forecast_price - last_actual_price) / last_actual_price) * 100
+
+        if pct_change > 2:
+            signal = "BUY"
+        elif pct_change < -2:
+            signal = "SELL"
+        else:
+            signal = "HOLD"
+
+        signal_row = {
+            "Horizon": label,
+            "Forecast Price": round(forecast_price, 2),
+            "Expected Change (%)": round(pct_change, 2),
+            "Signal": signal
+        }
+        if "p05" in row.columns and "p95" in row.columns:
+            signal_row["90% Range"] = f"{row['p05'].values[0]:,.2f} – {row['p95'].values[0]:,.2f}"
+        signal_rows.append(signal_row)
+
+    signal_df = pd.DataFrame(signal_rows)
+
+
+mape, mape_source = load_model_accuracy(coin, model_name)
+confidence = None if mape is None else max(0.0, 100 - mape)
+
+
+with stage("build_figure"):
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=past_df["Date"],
+        y=past_df["Close"],
+        mode="lines",
+        name="Actual",
+        line=dict(color="white", width=2)
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=past_df["Date"],
+        y=past_df["Predicted_Close"],
+        mode="lines",
+        name="Past Prediction",
+        line=dict(color="orange", dash="dash")
+    ))
+
+    add_fan(fig, graph_forecast_df)
+
+    fig.add_trace(go.Scatter(
+        x=graph_forecast_df["Date"],
+        y=graph_forecast_df["Forecast_Close"],
+        mode="lines+markers",
+        name=f"Forecast ({horizon_label})",
+        line=dict(color="lime", width=3)
+    ))
+
+    fig.update_layout(
+        title=f"{coin} — {model_name} Forecast",
+        xaxis_title="Date",
+        yaxis_title="Price",
+        template="plotly_dark",
+        hovermode="x unified",
+        height=600
+    )
 
 
 st.title("Forecast")
 
-st.plotly_chart(fig, use_container_width=True)
+with stage("render_figure"):
+    st.plotly_chart(fig, use_container_width=True)
 
 st.markdown("## Prediction Confidence")
-st.metric("Model Confidence Level", f"{confidence:.2f} %")
-st.caption("Confidence is derived from historical validation accuracy (100 − MAPE).")
+if confidence is None:
+    st.info("No evaluation metrics for this coin/model yet (run `python -m src.evaluation`).")
+else:
+    st.metric("Model Confidence Level", f"{confidence:.2f} %")
+    st.caption(
+        f"Confidence is derived from {'test-window' if mape_source == 'holdout' else 'in-sample'} "
+        f"accuracy of {model_name} on {coin} (100 − MAPE)."
+    )
 
 st.markdown("## Buy / Sell Signals")
 st.dataframe(signal_df, use_container_width=True)
@@ -166,6 +201,9 @@ st.caption(
 st.subheader("Forecast Data")
 
 st.dataframe(
-    forecast_df[["Date", "Forecast_Close"]],
+    forecast_df[["Date", "Forecast_Close"] + [c for c in ("p05", "p25", "p50", "p75", "p95") if c in forecast_df]],
     use_container_width=True
-)
\ No newline at end of file
+)
+
+render_sidebar_panel(profiler)
+profiler.finish()
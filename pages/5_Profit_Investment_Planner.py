@@ -1,127 +1,283 @@
+import math
 import streamlit as st
 import pandas as pd
-import os
 
+from src.forecast_store import available_series, forecast_frame, latest_run_id
+from src.portfolio import (efficient_frontier, forecast_returns, historical_returns, max_sharpe,
+                           mean_variance, min_variance, portfolio_stats, returns_matrix, risk_parity,
+                           shrunk_covariance, walk_forward_weights)
+from src.profiling import render_sidebar_panel, stage, start_page
+from src.simulation import portfolio_backtest, price_matrix
+from src.warmup import dataset
 
-MODELS_PATH = "models"
 
-coins = ["BTC-USD", "ETH-USD", "SOL-USD", "AVAX-USD"]
+@st.cache_data
+def load_series_index(run_id):
+    return available_series(run_id=run_id)
 
-models = {
-    "Random Forest": "rf_forecast_next_6_months",
-    "ARIMA": "arima_forecast_next_6_months",
-    "LSTM": "lstm_forecast_next_6_months",
-    "Prophet": "prophet_forecast_next_6_months"
-}
 
-horizon_map = {
-    "7 Days": 7,
-    "14 Days": 14,
-    "1 Month (30 Days)": 30,
-    "6 Months (180 Days)": 180
-}
+@st.cache_data
+def load_forecast(coin, model_name, run_id):
+    return forecast_frame(coin, model_name, run_id=run_id)
 
 
-st.title("Profit / Investment Planner")
+@st.cache_data
+def load_risk_inputs(symbols, lookback):
+    """Returns, Ledoit-Wolf covariance and shrinkage; the slow part, so cached per selection."""
+    returns = returns_matrix(dataset(), list(symbols), lookback)
+    cov, shrinkage = shrunk_covariance(returns)
+    return returns, cov, shrinkage
 
-st.markdown(
-    """
-    This page helps users **identify optimal buy and sell points** using forecasted prices
-    and estimate **potential profit or loss** under different investment scenarios.
-    """
-)
 
+@st.cache_data
+def load_forecast_returns(model_name, horizon, run_id):
+    return forecast_returns(model_name, horizon, run_id=run_id)
 
-coin = st.selectbox("Select Cryptocurrency", coins)
-model_name = st.selectbox("Select Forecasting Model", list(models.keys()))
-horizon_label = st.selectbox("Select Planning Horizon", list(horizon_map.keys()))
 
-investment_amount = st.number_input(
-    "Investment Amount (USD)",
-    min_value=100.0,
-    value=1000.0,
-    step=100.0
-)
+@st.cache_data
+def load_backtest(symbols, method, lookback, rebalance, cost_bps, max_weight, risk_aversion):
+    """Walk-forward weights of `method` (re-estimated each rebalance) against equal weight."""
+    prices = price_matrix(dataset(), list(symbols))
+    schemes = {
+        name: walk_forward_weights(prices, key, lookback, rebalance, max_weight=max_weight,
+                                   risk_aversion=risk_aversion)
+        for name, key in {method: METHOD_KEYS[method], "Equal weight": "equal_weight"}.items()
+    }
+    return portfolio_backtest(prices, schemes, rebalance, cost_bps)
 
-horizon_days = horizon_map[horizon_label]
-forecast_file = f"{coin}_{models[model_name]}.csv"
-forecast_path = os.path.join(MODELS_PATH, forecast_file)
 
+profiler = start_page("Planner")
+with stage("load"):
+    run_id = latest_run_id()
+    series = load_series_index(run_id) if run_id else pd.DataFrame(columns=["coin", "model"])
+coins = series["coin"].unique().tolist()
+models = series["model"].unique().tolist()
+
+METHOD_KEYS = {
+    "Max Sharpe": "max_sharpe",
+    "Mean-variance": "mean_variance",
+    "Minimum variance": "min_variance",
+    "Risk parity": "risk_parity",
+}
+REBALANCE_OPTIONS = {"Weekly": "W", "Monthly": "M", "Quarterly": "Q"}
 
-if not os.path.exists(forecast_path):
-    st.error("Forecast data not found for the selected options.")
-    st.stop()
+horizon_map = {
+    "7 Days": 7,
+    "14 Days": 14,
+    "1 Month (30 Days)": 30,
+    "6 Months (180 Days)": 180
+}
 
-forecast_df = pd.read_csv(forecast_path, parse_dates=["Date"])
 
-forecast_df = forecast_df[forecast_df["Day_Number"] <= horizon_days]
+def single_coin_planner():
+    coin = st.selectbox("Select Cryptocurrency", coins)
+    model_name = st.selectbox("Select Forecasting Model", models)
 
+    horizon_days = horizon_map[horizon_label]
 
-buy_row = forecast_df.loc[forecast_df["Forecast_Close"].idxmin()]
-sell_row = forecast_df.loc[forecast_df["Forecast_Close"].idxmax()]
 
-buy_price = buy_row["Forecast_Close"]
-sell_price = sell_row["Forecast_Close"]
+    if series[(series["coin"] == coin) & (series["model"] == model_name)].empty:
+        st.error("Forecast data not found for the selected options.")
+        return
 
-buy_date = buy_row["Date"]
-sell_date = sell_row["Date"]
+    forecast_df = load_forecast(coin, model_name, run_id)
 
+    forecast_df = forecast_df[forecast_df["Day_Number"] <= horizon_days]
 
-units_bought = investment_amount / buy_price
-final_value = units_bought * sell_price
 
-profit_loss = final_value - investment_amount
-profit_loss_pct = (profit_loss / investment_amount) * 100
+    buy_row = forecast_df.loc[forecast_df["Forecast_Close"].idxmin()]
+    sell_row = forecast_df.loc[forecast_df["Forecast_Close"].idxmax()]
 
+    buy_price = buy_row["Forecast_Close"]
+    sell_price = sell_row["Forecast_Close"]
 
-st.subheader("Optimal Buy & Sell Dates (Forecast-Based)")
+    buy_date = buy_row["Date"]
+    sell_date = sell_row["Date"]
 
-col1, col2 = st.columns(2)
 
-col1.metric(
-    "Best Buy Date",
-    buy_date.strftime("%Y-%m-%d"),
-    f"${buy_price:.2f}"
-)
+    units_bought = investment_amount / buy_price
+    final_value = units_bought * sell_price
 
-col2.metric(
-    "Best Sell Date",
-    sell_date.strftime("%Y-%m-%d"),
-    f"${sell_price:.2f}"
-)
+    profit_loss = final_value - investment_amount
+    profit_loss_pct = (profit_loss / investment_amount) * 100
 
-st.subheader("Expected Investment Outcome")
 
-col3, col4 = st.columns(2)
+    st.subheader("Optimal Buy & Sell Dates (Forecast-Based)")
 
-col3.metric(
-    "Expected Profit / Loss",
-    f"${profit_loss:,.2f}",
-    f"{profit_loss_pct:.2f} %"
-)
+    col1, col2 = st.columns(2)
 
-col4.metric(
-    "Estimated Final Value",
-    f"${final_value:,.2f}"
-)
+    col1.metric(
+        "Best Buy Date",
+        buy_date.strftime("%Y-%m-%d"),
+        f"${buy_price:.2f}"
+    )
+
+    col2.metric(
+        "Best Sell Date",
+        sell_date.strftime("%Y-%m-%d"),
+        f"${sell_price:.2f}"
+    )
+
+    st.subheader("Expected Investment Outcome")
+
+    col3, col4 = st.columns(2)
+
+    col3.metric(
+        "Expected Profit / Loss",
+        f"${profit_loss:,.2f}",
+        f"{profit_loss_pct:.2f} %"
+    )
+
+    col4.metric(
+        "Estimated Final Value",
+        f"${final_value:,.2f}"
+    )
+
+
+    st.subheader("What-If Scenario Explanation")
+
+    st.markdown(
+        f"""
+        - The model assumes an investment of **${investment_amount:,.2f}**
+          made at the **lowest forecasted price** within the selected horizon.
+        - The asset is sold at the **highest forecasted price** within the same period.
+        - No transaction costs or slippage are considered.
+        - This scenario is **purely forecast-based** and does not represent financial advice.
+        """
+    )
+
+
+    st.subheader("Forecast Prices Used")
+
+    st.dataframe(
+        forecast_df[["Date", "Forecast_Close"]],
+        use_container_width=True
+    )
+
+
+def portfolio_planner():
+    st.markdown(
+        """
+        Spread the investment across several coins using their **joint risk**:
+        a shrinkage (Ledoit-Wolf) covariance of daily returns and expected
+        returns from history or from a forecasting model.
+        """
+    )
+    all_symbols = sorted(dataset()["symbol"].unique())
+    symbols = st.multiselect("Coins", all_symbols, default=all_symbols)
+    if len(symbols) < 2:
+        st.info("Select at least two coins.")
+        return
+
+    c1, c2 = st.columns(2)
+    lookback = c1.slider("History window (days)", 90, 1095, 365, 15)
+    source = c2.selectbox("Expected returns from", ["History"] + [f"Forecast: {m}" for m in models])
+    c3, c4 = st.columns(2)
+    method = c3.selectbox("Allocation", list(METHOD_KEYS))
+    # rounded up so that the minimum still lets the weights sum to 1
+    min_cap = max(0.05, math.ceil(100 / len(symbols)) / 100)
+    max_weight = c4.slider("Max weight per coin", min_cap, 1.0, 1.0, 0.05, disabled=method == "Risk parity",
+                           help="Risk parity sets weights from risk contributions alone and takes no cap.")
+    cap = None if max_weight >= 1.0 or method == "Risk parity" else max_weight
+
+    try:
+        with stage("risk_inputs"):
+            returns, cov, shrinkage = load_risk_inputs(tuple(symbols), lookback)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    mu = historical_returns(returns)
+    if source != "History":
+        model = source.split(": ", 1)[1]
+        # coins without a forecast keep their historical estimate
+        implied = load_forecast_returns(model, horizon_map[horizon_label], run_id)
+        mu.update(implied)
+        st.caption(f"Forecast-implied returns for {', '.join(implied.index.intersection(mu.index)) or 'no coins'};"
+                   " historical for the rest.")
+
+    risk_aversion = 4.0
+    if method == "Mean-variance":
+        risk_aversion = st.slider("Risk aversion", 0.5, 20.0, risk_aversion, 0.5)
+    try:
+        with stage("optimize"):
+            if method == "Mean-variance":
+                weights = mean_variance(mu, cov, risk_aversion, cap)
+            elif method == "Minimum variance":
+                weights = min_variance(cov, cap)
+            elif method == "Risk parity":
+                weights = risk_parity(cov)
+            else:
+                weights = max_sharpe(mu, cov, max_weight=cap)
+            frontier, _ = efficient_frontier(mu, cov, max_weight=cap)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    stats = portfolio_stats(weights, mu, cov)
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Expected return (ann.)", f"{stats['expected_return']:.1%}")
+    m2.metric("Volatility (ann.)", f"{stats['volatility']:.1%}")
+    m3.metric("Sharpe", f"{stats['sharpe']:.2f}")
+    m4.metric("Shrinkage", f"{shrinkage:.2f}")
+
+    held = weights[weights > 1e-4].sort_values(ascending=False)
+    allocation = pd.DataFrame({
+        "Weight": held,
+        "Amount (USD)": held * investment_amount,
+        "Risk share": stats["risk_contribution"][held.index],
+    })
+    st.subheader("Allocation")
+    st.bar_chart(held)
+    st.dataframe(allocation.style.format({"Weight": "{:.1%}", "Amount (USD)": "${:,.2f}", "Risk share": "{:.1%}"}),
+                 use_container_width=True)
+
+    st.subheader("Efficient Frontier")
+    st.line_chart(frontier.set_index("volatility")["expected_return"])
+    st.caption(f"Selected portfolio: volatility {stats['volatility']:.1%}, expected return "
+               f"{stats['expected_return']:.1%}. Annualised; long-only, no transaction costs. Not financial advice.")
+
+    st.subheader("Backtest")
+    b1, b2 = st.columns(2)
+    rebalance = b1.selectbox("Rebalance", list(REBALANCE_OPTIONS), index=1)
+    cost_bps = b2.slider("Transaction cost (bps)", 0, 100, 10, 5)
+    with stage("backtest"):
+        result = load_backtest(tuple(symbols), method, lookback, REBALANCE_OPTIONS[rebalance], float(cost_bps),
+                               cap, risk_aversion)
+    st.line_chart(result["nav"] * investment_amount)
+    st.dataframe(
+        result["summary"].style.format({
+            "total_return": "{:.1%}", "cagr": "{:.1%}", "volatility": "{:.1%}", "sharpe": "{:.2f}",
+            "max_drawdown": "{:.1%}", "annual_turnover": "{:.2f}", "total_costs": "{:.2%}",
+        }),
+        use_container_width=True,
+    )
+    st.caption(f"Weights re-estimated from the previous {lookback} days on every rebalance date (historical "
+               "returns, no look-ahead), traded at the close with the cost above. Coins join once listed.")
 
 
-st.subheader("What-If Scenario Explanation")
+st.title("Profit / Investment Planner")
 
 st.markdown(
-    f"""
-    - The model assumes an investment of **${investment_amount:,.2f}**
-      made at the **lowest forecasted price** within the selected horizon.
-    - The asset is sold at the **highest forecasted price** within the same period.
-    - No transaction costs or slippage are considered.
-    - This scenario is **purely forecast-based** and does not represent financial advice.
+    """
+    This page helps users **identify optimal buy and sell points** using forecasted prices
+    and estimate **potential profit or loss** under different investment scenarios.
     """
 )
 
 
-st.subheader("Forecast Prices Used")
-
-st.dataframe(
-    forecast_df[["Date", "Forecast_Close"]],
-    use_container_width=True
+horizon_label = st.selectbox("Select Planning Horizon", list(horizon_map.keys()))
+investment_amount = st.number_input(
+    "Investment Amount (USD)",
+    min_value=100.0,
+    value=1000.0,
+    step=100.0
 )
+
+coin_tab, portfolio_tab = st.tabs(["Single coin", "Portfolio"])
+with coin_tab, stage("single_coin"):
+    single_coin_planner()
+with portfolio_tab, stage("portfolio"):
+    portfolio_planner()
+
+render_sidebar_panel(profiler)
+profiler.finish()
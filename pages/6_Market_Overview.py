@@ -1,18 +1,30 @@
 import streamlit as st
 import pandas as pd
-import os
 
+from src.forecast_store import ACTUAL_MODEL, available_series, latest_run_id, read_forecasts
+from src.profiling import render_sidebar_panel, stage, start_page
 
-MODELS_PATH = "models"
 
-coins = ["BTC-USD", "ETH-USD", "SOL-USD", "AVAX-USD"]
+@st.cache_data
+def load_latest_points(run_id):
+    """Last actual close and the full point forecast of every coin/model in one read."""
+    rows = read_forecasts(kind=["actual", "forecast"], run_id=run_id)
+    last_actual = rows[rows["model"] == ACTUAL_MODEL].groupby("coin")["value"].last()
+    forecasts = rows[rows["kind"] == "forecast"]
+    return last_actual, forecasts, available_series(run_id=run_id)
 
-models = {
-    "Random Forest": "rf_forecast_next_6_months",
-    "ARIMA": "arima_forecast_next_6_months",
-    "LSTM": "lstm_forecast_next_6_months",
-    "Prophet": "prophet_forecast_next_6_months"
-}
+
+profiler = start_page("Market Overview")
+run_id = latest_run_id()
+if run_id is None:
+    st.error("No forecast run published (run `python -m src.forecast_store import-legacy`)")
+    profiler.finish()
+    st.stop()
+
+with stage("load"):
+    last_actual, all_forecasts, series = load_latest_points(run_id)
+coins = series["coin"].unique().tolist()
+models = series["model"].unique().tolist()
 
 horizon_map = {
     "7 Days": 7,
@@ -32,58 +44,48 @@ st.markdown(
 )
 
 
-model_name = st.selectbox("Select Forecasting Model", list(models.keys()))
+model_name = st.selectbox("Select Forecasting Model", models)
 horizon_label = st.selectbox("Select Short-Term Horizon", list(horizon_map.keys()))
 
 horizon_days = horizon_map[horizon_label]
 
 
-rows = []
-up_count = 0
-down_count = 0
-
-for coin in coins:
-    forecast_file = f"{coin}_{models[model_name]}.csv"
-    forecast_path = os.path.join(MODELS_PATH, forecast_file)
-
-    if not os.path.exists(forecast_path):
-        continue
+with stage("aggregate"):
+    rows = []
+    up_count = 0
+    down_count = 0
 
-    forecast_df = pd.read_csv(forecast_path, parse_dates=["Date"])
-    forecast_df = forecast_df[forecast_df["Day_Number"] == horizon_days]
+    for coin in coins:
+        forecast_df = all_forecasts[
+            (all_forecasts["coin"] == coin)
+            & (all_forecasts["model"] == model_name)
+            & (all_forecasts["day_number"] == horizon_days)
+        ]
 
-    if forecast_df.empty:
-        continue
+        if forecast_df.empty or coin not in last_actual.index:
+            continue
 
-    forecast_price = forecast_df["Forecast_Close"].values[0]
+        forecast_price = forecast_df["value"].values[0]
+        last_actual_price = last_actual[coin]
 
-    past_file = f"{coin}_{models[model_name].replace('forecast_next_6_months', 'past_predictions')}.csv"
-    past_path = os.path.join(MODELS_PATH, past_file)
+        pct_change = ((forecast_price - last_actual_price) / last_actual_price) * 100
 
-    if not os.path.exists(past_path):
-        continue
+        if pct_change > 0:
+            direction = "⬆️ Up"
+            up_count += 1
+        else:
+            direction = "⬇️ Down"
+            down_count += 1
 
-    past_df = pd.read_csv(past_path)
-    last_actual_price = past_df["Close"].iloc[-1]
+        rows.append({
+            "Coin": coin,
+            "Last Actual Price": round(last_actual_price, 2),
+            f"Forecast Price ({horizon_label})": round(forecast_price, 2),
+            "Expected Change (%)": round(pct_change, 2),
+            "Direction": direction
+        })
 
-    pct_change = ((forecast_price - last_actual_price) / last_actual_price) * 100
-
-    if pct_change > 0:
-        direction = "⬆️ Up"
-        up_count += 1
-    else:
-        direction = "⬇️ Down"
-        down_count += 1
-
-    rows.append({
-        "Coin": coin,
-        "Last Actual Price": round(last_actual_price, 2),
-        f"Forecast Price ({horizon_label})": round(forecast_price, 2),
-        "Expected Change (%)": round(pct_change, 2),
-        "Direction": direction
-    })
-
-market_df = pd.DataFrame(rows)
+    market_df = pd.DataFrame(rows)
 
 
 if up_count > down_count:
@@ -137,3 +139,6 @@ st.markdown(
 st.caption(
     "This market overview is a **forecast-based analytical tool** and does not constitute financial advice."
 )
+
+render_sidebar_panel(profiler)
+profiler.finish()
@@ -1,17 +1,26 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import os
 
+from src.evaluation import METRICS_PATH, load_metrics
+from src.lazy import lazy_import
+from src.profiling import render_sidebar_panel, stage, start_page
 
-EVAL_PATH = "models/evaluation_results.csv"
+px = lazy_import("plotly.express")
 
 
-if not os.path.exists(EVAL_PATH):
-    st.error("evaluation_results.csv not found in models folder")
+profiler = start_page("Evaluation")
+if not METRICS_PATH.exists():
+    st.error("evaluation_metrics.parquet not found in models folder (run `python -m src.evaluation`)")
+    profiler.finish()
     st.stop()
 
-df = pd.read_csv(EVAL_PATH)
+
+@st.cache_data
+def load_metrics_slice(scope, source="in_sample", symbol=None, model=None):
+    return load_metrics(scope=scope, source=source, symbol=symbol, model=model)
+
+
+with stage("load"):
+    df = load_metrics_slice("global")
 
 
 st.sidebar.title(" Evaluation Controls")
@@ -36,7 +45,8 @@ st.title("Model Evaluation & Comparison")
 st.markdown(
     """
     This page evaluates forecasting models using **AE2-required regression metrics**:
-    **MAE**, **RMSE**, **MAPE**, and **R²**.
+    **MAE**, **RMSE**, **MAPE**, and **R²**, complemented by **directional accuracy**
+    and **MASE** (error relative to a naive last-value forecast).
     """
 )
 
@@ -105,6 +115,86 @@ r2_fig = px.bar(
 st.plotly_chart(r2_fig, use_container_width=True)
 
 
+st.subheader("Directional Accuracy & MASE")
+
+col1, col2 = st.columns(2)
+
+with col1:
+    st.plotly_chart(
+        px.bar(
+            filtered_df,
+            x="Model",
+            y="Directional Accuracy (%)",
+            color="Symbol",
+            barmode="group",
+            title="Directional Accuracy by Model and Coin"
+        ),
+        use_container_width=True
+    )
+
+with col2:
+    st.plotly_chart(
+        px.bar(
+            filtered_df,
+            x="Model",
+            y="MASE",
+            color="Symbol",
+            barmode="group",
+            title="MASE by Model and Coin (< 1 beats naive)"
+        ),
+        use_container_width=True
+    )
+
+
+st.subheader("Rolling 30-Day Error")
+
+rolling_df = load_metrics_slice(
+    "rolling",
+    symbol=None if selected_coin == "All" else selected_coin,
+    model=None if selected_model == "All" else selected_model,
+)
+rolling_metric = st.selectbox("Rolling metric", ["RMSE", "MAE", "MAPE (%)", "Directional Accuracy (%)"])
+
+rolling_fig = px.line(
+    rolling_df,
+    x="Date",
+    y=rolling_metric,
+    color="Model",
+    line_dash="Symbol",
+    title=f"Rolling {rolling_metric} (30-day window)"
+)
+
+st.plotly_chart(rolling_fig, use_container_width=True)
+
+
+st.subheader("Hold-out Error by Forecast Horizon")
+
+horizon_df = load_metrics_slice(
+    "horizon",
+    source="holdout",
+    symbol=None if selected_coin == "All" else selected_coin,
+    model=None if selected_model == "All" else selected_model,
+)
+
+if horizon_df.empty:
+    st.info("No hold-out forecasts available for the current selection.")
+else:
+    horizon_fig = px.line(
+        horizon_df,
+        x="Horizon",
+        y="MAPE (%)",
+        color="Model",
+        line_dash="Symbol",
+        markers=True,
+        title="Hold-out MAPE (%) by Forecast Horizon Bucket (days)"
+    )
+    st.plotly_chart(horizon_fig, use_container_width=True)
+    st.caption(
+        "Each point covers forecast days after the previous bucket up to the labelled horizon, "
+        "measured from the start of the hold-out window."
+    )
+
+
 st.subheader("Quick Insights")
 
 best_rmse = filtered_df.loc[filtered_df["RMSE"].idxmin()]
@@ -116,3 +206,6 @@ st.markdown(
     - **Highest R²**: {best_r2['Model']} on {best_r2['Symbol']}
     """
 )
+
+render_sidebar_panel(profiler)
+profiler.finish()
@@ -1,15 +1,24 @@
 import streamlit as st
 import pandas as pd
-import os
 
-EVAL_PATH = "models/evaluation_results.csv"
+from src.evaluation import METRICS_PATH, load_metrics
+from src.profiling import render_sidebar_panel, stage, start_page
 
 
-if not os.path.exists(EVAL_PATH):
-    st.error(" evaluation_results.csv not found")
+profiler = start_page("Results")
+if not METRICS_PATH.exists():
+    st.error(" evaluation_metrics.parquet not found")
+    profiler.finish()
     st.stop()
 
-df = pd.read_csv(EVAL_PATH)
+
+@st.cache_data
+def load_global_metrics():
+    return load_metrics(scope="global", source="in_sample")
+
+
+with stage("load"):
+    df = load_global_metrics()
 
 
 st.title("Results & Conclusions")
@@ -52,6 +61,11 @@ st.markdown(
     Model confidence is derived from historical forecasting accuracy and is calculated as:
     **Model Confidence = 100 − MAPE**.  
     This KPI provides an intuitive summary of historical model reliability.
+
+    **KPI 6 – Directional Accuracy and MASE**  
+    Directional accuracy is the share of days on which the predicted move (relative to the
+    previous close) has the same sign as the actual move. MASE scales MAE by the error of a
+    naive last-value forecast, so values below 1 indicate the model beats the naive baseline.
     """
 )
 
@@ -66,7 +80,7 @@ best_models = (
 )
 
 st.dataframe(
-    best_models[["Symbol", "Model", "RMSE", "MAE", "MAPE (%)", "R2"]],
+    best_models[["Symbol", "Model", "RMSE", "MAE", "MAPE (%)", "R2", "Directional Accuracy (%)", "MASE"]],
     use_container_width=True
 )
 
@@ -123,3 +137,6 @@ st.markdown(
     cryptocurrency price forecasting.
     """
 )
+
+render_sidebar_panel(profiler)
+profiler.finish()
@@ -0,0 +1,276 @@
+# src/alignment.py
+"""
+Shared aligned calendar: every coin on one dense (date x symbol) grid.
+
+Model trainers, the EDA / clustering code, correlation (neighbors) and the
+portfolio tools used to pivot or asfreq the long frame each on their own,
+with different gap handling. aligned(df) builds the grid once per data
+version and gap policy, keeps it in memory and caches it on disk (npz under
+data/processed/.cache, keyed by the content hash of the frame; the
+MAX_DISK_CACHED most recently used grids per policy are kept), so every
+consumer reads the same matrices.
+
+Gap policies (applied per symbol, only between its first and last bar;
+before listing and after the last bar values stay NaN):
+ - "linear"  interpolate interior gaps (the notebook's asfreq("D").interpolate())
+ - "ffill"   carry the last bar forward
+ - "mask"    leave gaps NaN
+
+Calendar.valid marks the cells that had a bar in the source data and
+Calendar.listed the span between each symbol's first and last bar, so
+filled cells can always be told from observed ones.
+
+Functions
+---------
+- build_calendar(df, policy="linear", freq="D", fields=FIELDS) -> Calendar
+- aligned(df, policy="linear", freq="D", fields=FIELDS, cache_dir=None) -> Calendar
+- Calendar.frame(field="close") -> pd.DataFrame        (date x symbol)
+- Calendar.series(symbol, field="close") -> pd.Series  (the symbol's listed span)
+- Calendar.long() -> pd.DataFrame                       (long frame of the listed, filled cells)
+- lagged(df, periods=1, field="close", freq="D") -> pd.Series
+- calendar_returns(df, freq="D") -> pd.Series
+"""
+
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Sequence
+import numpy as np
+import pandas as pd
+
+from src.io import data_hash
+
+PROJECT_ROOT = Path(__file__).parents[1]
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "data" / "processed" / ".cache"
+POLICIES = ("linear", "ffill", "mask")
+FIELDS = ("open", "high", "low", "close", "volume")
+# bump when the on-disk layout or the build semantics change
+CACHE_VERSION = 2
+MAX_CACHED = 8
+MAX_DISK_CACHED = 4
+
+# (data version, policy, freq, fields) -> Calendar, most recently used last
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+class Calendar(NamedTuple):
+    dates: pd.DatetimeIndex
+    symbols: list
+    values: dict          # field -> float64 (dates x symbols), filled by `policy`
+    valid: np.ndarray     # bool (dates x symbols): the source had a bar here
+    listed: np.ndarray    # bool (dates x symbols): between the symbol's first and last bar
+    policy: str
+    version: str
+
+    def column(self, symbol: str) -> int:
+        try:
+            return self.symbols.index(symbol)
+        except ValueError:
+            raise ValueError(f"Symbol not found: {symbol}") from None
+
+    def frame(self, field: str = "close") -> pd.DataFrame:
+        return pd.DataFrame(self.values[field].copy(), index=self.dates.rename("date"),
+                            columns=pd.Index(self.symbols, name="symbol"))
+
+    def series(self, symbol: str, field: str = "close") -> pd.Series:
+        j = self.column(symbol)
+        rows = np.flatnonzero(self.listed[:, j])
+        if len(rows) == 0:
+            return pd.Series(dtype=float, name=symbol)
+        span = slice(rows[0], rows[-1] + 1)
+        return pd.Series(self.values[field][span, j].copy(), index=self.dates[span].rename("date"), name=symbol)
+
+    def long(self) -> pd.DataFrame:
+        """(date, symbol, fields..., valid) rows for every listed cell with a close, sorted by (symbol, date)."""
+        keep = self.listed & np.isfinite(self.values["close"])
+        cols, rows = np.nonzero(keep.T)
+        out = pd.DataFrame({"date": self.dates[rows], "symbol": np.asarray(self.symbols, dtype=object)[cols]})
+        for field, arr in self.values.items():
+            out[field] = arr[rows, cols]
+        out["valid"] = self.valid[rows, cols]
+        return out
+
+
+def _fill(values: np.ndarray, listed: np.ndarray, policy: str) -> np.ndarray:
+    """Fill the NaN cells inside each column's listed span, vectorised over all columns."""
+    known = np.isfinite(values)
+    if policy == "mask" or known[listed].all():
+        return values
+    t = np.arange(len(values))[:, None]
+    prev = np.maximum.accumulate(np.where(known, t, -1), axis=0)
+    cols = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+    gaps = listed & ~known & (prev >= 0)
+    filled = values.copy()
+    if policy == "ffill":
+        filled[gaps] = values[prev[gaps], cols[gaps]]
+        return filled
+    n = len(values)
+    nxt = np.flip(np.minimum.accumulate(np.flip(np.where(known, t, n), axis=0), axis=0), axis=0)
+    gaps &= nxt < n
+    p, q = prev[gaps], nxt[gaps]
+    w = (t.repeat(values.shape[1], axis=1)[gaps] - p) / (q - p)
+    filled[gaps] = values[p, cols[gaps]] + w * (values[q, cols[gaps]] - values[p, cols[gaps]])
+    return filled
+
+
+def build_calendar(df: pd.DataFrame, policy: str = "linear", freq: str = "D",
+                   fields: Sequence[str] = FIELDS, version: str = "") -> Calendar:
+    """
+    Dense calendar of a long frame (date, symbol, fields; lowercase columns).
+    No caching. Raises ValueError if a date is off the `freq` grid or a
+    symbol has more than one bar on a date.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown gap policy {policy!r}; expected one of {POLICIES}")
+    fields = tuple(fields)
+    missing = {"date", "symbol", *fields} - set(df.columns)
+    if missing:
+        raise ValueError(f"Frame missing required columns: {missing}")
+    if df.empty:
+        raise ValueError("Cannot align an empty frame")
+
+    codes, symbols = pd.factorize(df["symbol"], sort=True)
+    stamps = df["date"].to_numpy("datetime64[ns]")
+    if (codes < 0).any() or np.isnat(stamps).any():
+        raise ValueError("Cannot align rows with a missing date or symbol")
+    dates = pd.date_range(df["date"].min(), df["date"].max(), freq=freq)
+    step = pd.Timedelta(pd.tseries.frequencies.to_offset(freq)).value
+    offset = stamps.view("int64") - dates[0].value
+    if (offset % step).any():
+        raise ValueError(f"Dates are not on a {freq!r} grid; pass the frame's bar frequency as freq")
+    rows = offset // step
+    shape = (len(dates), len(symbols))
+    # one bar per cell: a coarser freq than the data would otherwise keep an arbitrary bar
+    if np.bincount(rows * shape[1] + codes, minlength=shape[0] * shape[1]).max() > 1:
+        raise ValueError(f"Several bars of one symbol fall on the same {freq!r} date; "
+                         "drop duplicates or pass the frame's bar frequency as freq")
+
+    close = df["close"].to_numpy(float)
+    valid = np.zeros(shape, dtype=bool)
+    valid[rows, codes] = np.isfinite(close)
+    t = np.arange(shape[0])[:, None]
+    first = np.where(valid, t, shape[0]).min(axis=0)
+    last = np.where(valid, t, -1).max(axis=0)
+    listed = (t >= first) & (t <= last)
+
+    values = {}
+    for field in fields:
+        arr = np.full(shape, np.nan)
+        arr[rows, codes] = df[field].to_numpy(float)
+        values[field] = _fill(arr, listed, policy)
+    return Calendar(dates, list(symbols), values, valid, listed, policy, version)
+
+
+def _family(policy: str, freq: str, fields: tuple) -> str:
+    return f"{policy}_{freq}_{'-'.join(fields)}"
+
+
+def _cache_path(cache_dir: Path, key: tuple) -> Path:
+    version, policy, freq, fields = key
+    return cache_dir / f"calendar_v{CACHE_VERSION}_{version}_{_family(policy, freq, fields)}.npz"
+
+
+def _save(cal: Calendar, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # a unique temp file per writer, so concurrent builds of one key never share it
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            np.savez(fh, dates=cal.dates.asi8, symbols=np.array(cal.symbols, dtype=str), valid=cal.valid,
+                     listed=cal.listed, **{f"field_{k}": v for k, v in cal.values.items()})
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _load(path: Path, key: tuple) -> Calendar:
+    version, policy, freq, fields = key
+    with np.load(path, allow_pickle=False) as data:
+        return Calendar(pd.DatetimeIndex(data["dates"].astype("datetime64[ns]"), freq=freq),
+                        data["symbols"].tolist(), {f: data[f"field_{f}"] for f in fields},
+                        data["valid"], data["listed"], policy, version)
+
+
+def _prune(cache_dir: Path, key: tuple) -> None:
+    """Keep the MAX_DISK_CACHED most recently used grids of this policy / freq / fields."""
+    _, policy, freq, fields = key
+    family = _family(policy, freq, fields)
+    files = []
+    for path in cache_dir.glob(f"calendar_v*_{family}.npz"):
+        try:
+            files.append((path.stat().st_mtime, path))
+        except OSError:
+            continue  # removed by another process meanwhile
+    for _, path in sorted(files, reverse=True)[MAX_DISK_CACHED:]:
+        path.unlink(missing_ok=True)
+
+
+def aligned(df: pd.DataFrame, policy: str = "linear", freq: str = "D", fields: Sequence[str] = FIELDS,
+            cache_dir: str = None) -> Calendar:
+    """
+    The calendar of `df` under `policy`, built once per data version: served
+    from memory, else from the npz cache, else built and cached. The data
+    version is the content hash of the date, symbol and field columns.
+    Returned arrays are shared; treat them as read-only.
+    """
+    fields = tuple(fields)
+    missing = {"date", "symbol", *fields} - set(df.columns)
+    if missing:
+        raise ValueError(f"Frame missing required columns: {missing}")
+    key = (data_hash(df[["date", "symbol", *fields]]), policy, freq, fields)
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return _memory[key]
+
+    cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+    path = _cache_path(cache_dir, key)
+    cal = None
+    if path.exists():
+        try:
+            cal = _load(path, key)
+        except Exception:
+            cal = None  # unreadable (truncated, foreign, removed) cache file: rebuild and overwrite it
+        else:
+            try:
+                os.utime(path)  # mark as recently used for _prune
+            except OSError:
+                pass
+    if cal is None:
+        cal = build_calendar(df, policy, freq, fields, version=key[0])
+        try:
+            _save(cal, path)
+            _prune(cache_dir, key)
+        except OSError:
+            pass  # read-only checkout: the in-memory copy still serves this process
+
+    with _lock:
+        _memory[key] = cal
+        while len(_memory) > MAX_CACHED:
+            _memory.popitem(last=False)
+    return cal
+
+
+def lagged(df: pd.DataFrame, periods: int = 1, field: str = "close", freq: str = "D") -> pd.Series:
+    """
+    `field` `periods` calendar steps before each row of a long frame, read
+    from the masked calendar: NaN where the symbol had no bar then, so unlike
+    a per-symbol shift over rows a lag never reaches across a gap.
+    """
+    cal = aligned(df, policy="mask", freq=freq, fields=(field,))
+    rows = cal.dates.get_indexer(pd.to_datetime(df["date"])) - periods
+    cols = pd.Index(cal.symbols).get_indexer(df["symbol"])
+    inside = (rows >= 0) & (rows < len(cal.dates))
+    out = np.full(len(df), np.nan)
+    out[inside] = cal.values[field][rows[inside], cols[inside]]
+    return pd.Series(out, index=df.index, name=f"{field}_lag_{periods}")
+
+
+def calendar_returns(df: pd.DataFrame, freq: str = "D") -> pd.Series:
+    """Simple return of each row over the previous calendar step (NaN when that step had no bar)."""
+    close = pd.to_numeric(df["close"], errors="coerce")
+    return (close / lagged(df, 1, "close", freq) - 1).rename("returns")
@@ -0,0 +1,462 @@
+# src/api.py
+"""
+Headless HTTP/JSON API over the same data-access layer the pages use.
+
+Standard library only (http.server); pyarrow is needed only for Arrow output.
+
+Endpoints (GET, query parameters in brackets):
+ - /health
+ - /symbols                                    per-symbol first / last date and rows
+ - /ohlcv       symbol [start, end]            raw daily bars
+ - /bars        symbol interval [start, end]   resampled bars (Daily / Weekly / Monthly)
+ - /features    symbol [start, end]            engineered features (src.features)
+ - /eda/<name>  symbol                         EDA series, see EDA_SERIES (summary / missing need no symbol)
+ - /eda/distribution  symbol series [kind]     pre-binned histogram
+ - /eda/acf     symbol [series]                ACF / PACF table
+ - /runs                                       published forecast runs
+ - /series      [run_id]                       (coin, model) pairs with a forecast
+ - /forecast    coin model [run_id]            point forecast and quantiles
+ - /past        coin model [run_id]            actual vs fitted
+ - /forecasts   [coin, model, kind, run_id]    raw store rows
+ - /metrics     [scope, source, symbol, model] evaluation metrics
+
+Every table response is paginated with offset / limit (X-Total-Count and a
+Link rel="next" header) and rendered as `format` = json (default), csv or
+arrow (Arrow IPC stream); an Accept header of
+application/vnd.apache.arrow.stream or text/csv also selects the format.
+JSON bodies look like {"total", "offset", "limit", "next", "columns", "data"}.
+
+Responses carry a weak ETag derived from the version of the underlying
+artifact (dataset file, forecast run id, metrics / EDA file) and the
+request. Versions are cheap to compute (a file stat or the run id), so an
+If-None-Match poll of unchanged data gets a 304 without loading anything. Bodies over GZIP_MIN_BYTES are gzipped when the client accepts it.
+
+Run:
+    python -m src.api --port 8502
+
+Functions
+---------
+- route(path, params) -> (str, loader)
+- render(frame, fmt, offset, limit, next_url) -> (bytes, str, dict)
+- make_server(host="127.0.0.1", port=DEFAULT_PORT) -> ThreadingHTTPServer
+"""
+
+import gzip
+import hashlib
+import json
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parents[1]
+EDA_DIR = PROJECT_ROOT / "data" / "EDA"
+DEFAULT_PORT = 8502
+DEFAULT_LIMIT = 10_000
+MAX_LIMIT = 1_000_000
+GZIP_MIN_BYTES = 1024
+
+FORMATS = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# /eda/<name> -> file under data/EDA ({symbol} substituted), date column or None
+EDA_SERIES = {
+    "returns": ("returns/{symbol}_returns.csv", "date"),
+    "cumulative_returns": ("returns/{symbol}_cumulative_returns.csv", "date"),
+    "drawdown": ("returns/{symbol}_drawdown.csv", "date"),
+    "rolling": ("rolling/{symbol}_rolling.csv", "date"),
+    "volume": ("volume/{symbol}_volume_stats.csv", "date"),
+    "volatility": ("volatility/{symbol}_returns_squared.csv", "date"),
+    "outliers": ("outliers/{symbol}_outliers.csv", "date"),
+    "lags": ("lag/{symbol}_lags.csv", None),
+    "correlation": ("correlation/{symbol}_corr.csv", None),
+    "monthly_returns": ("seasonality/{symbol}_monthly_returns.csv", None),
+    "dow_returns": ("seasonality/{symbol}_dow_returns.csv", None),
+    "summary": ("summary_stats.csv", None),
+    "missing": ("missing/missing_summary.csv", None),
+}
+
+_SYMBOL_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+class NotFound(Exception):
+    """Unknown route or artifact (HTTP 404)."""
+
+
+# ---- parameters and versions ----------------------------------------------
+
+def _param(params: dict, name: str, default=None, required: bool = False) -> Optional[str]:
+    value = params.get(name, [default])[-1]
+    if required and not value:
+        raise ValueError(f"Missing query parameter: {name}")
+    return value
+
+
+def _symbol(params: dict, name: str = "symbol") -> str:
+    symbol = _param(params, name, required=True)
+    if not _SYMBOL_RE.match(symbol):
+        raise ValueError(f"Invalid {name}: {symbol!r}")
+    return symbol
+
+
+def _file_version(path: Path) -> str:
+    if not path.exists():
+        raise NotFound(f"Artifact not found: {path.relative_to(PROJECT_ROOT)}")
+    stat = path.stat()
+    return f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _date_range(frame: pd.DataFrame, params: dict, col: str = "date") -> pd.DataFrame:
+    start, end = _param(params, "start"), _param(params, "end")
+    if start:
+        frame = frame[frame[col] >= pd.Timestamp(start)]
+    if end:
+        frame = frame[frame[col] <= pd.Timestamp(end)]
+    return frame
+
+
+def _symbol_rows(params: dict) -> pd.DataFrame:
+    from src.warmup import dataset
+
+    symbol = _symbol(params)
+    df = dataset()
+    rows = df[df["symbol"] == symbol]
+    if rows.empty:
+        raise NotFound(f"Unknown symbol: {symbol}")
+    return _date_range(rows, params).reset_index(drop=True)
+
+
+def _run_id(params: dict) -> str:
+    from src.forecast_store import latest_run_id
+
+    run_id = _param(params, "run_id") or latest_run_id()
+    if run_id is None:
+        raise NotFound("No forecast run published")
+    return run_id
+
+
+# ---- routes: path -> (version(params), load(params)) ----------------------------
+# version() is cheap (a stat or the run id) so conditional requests skip load()
+
+def _dataset_version(params: dict) -> str:
+    from src.io import dataset_path
+
+    return "dataset:" + _file_version(dataset_path())
+
+
+def _run_version(params: dict) -> str:
+    return f"run:{_run_id(params)}"
+
+
+def _file(path_fn):
+    return lambda params: _file_version(path_fn())
+
+
+def _symbols(params):
+    from src.warmup import symbol_index
+
+    return symbol_index()
+
+
+def _bars(params):
+    from src.ui import resample_df
+
+    interval = _param(params, "interval", "Daily").capitalize()
+    if interval not in ("Daily", "Weekly", "Monthly"):
+        raise ValueError(f"Invalid interval: {interval!r} (Daily, Weekly or Monthly)")
+    return resample_df(_symbol_rows(params), interval)
+
+
+def _features(params):
+    from src.alignment import aligned
+    from src.features import add_features
+    from src.warmup import dataset
+
+    symbol = _symbol(params)
+    df = dataset()
+    rows = df[df["symbol"] == symbol]
+    if rows.empty:
+        raise NotFound(f"Unknown symbol: {symbol}")
+    # features need the history before `start`, so filter after computing them; like the
+    # trainers they run on the shared calendar, so lags and returns never span a gap
+    return _date_range(add_features(aligned(rows).long()), params).reset_index(drop=True)
+
+
+def _eda_path(name: str, params: dict) -> Path:
+    rel = EDA_SERIES[name][0]
+    symbol = _symbol(params) if "{symbol}" in rel else None
+    return EDA_DIR / rel.format(symbol=symbol)
+
+
+def _eda_route(name: str) -> tuple:
+    date_col = EDA_SERIES[name][1]
+
+    def load(params):
+        path = _eda_path(name, params)
+        if name == "correlation":
+            frame = pd.read_csv(path, index_col=0).rename_axis("symbol").reset_index()
+        else:
+            frame = pd.read_csv(path, parse_dates=[date_col] if date_col else False)
+        if date_col:
+            frame = _date_range(frame, params, date_col)
+        return frame.reset_index(drop=True)
+    return (lambda params: _file_version(_eda_path(name, params))), load
+
+
+def _eda_distribution(params):
+    from src.distributions import load_distribution
+
+    symbol, series = _symbol(params), _param(params, "series", required=True)
+    frame = load_distribution(symbol, series, _param(params, "kind", "fixed"))
+    if frame.empty:
+        raise NotFound(f"Unknown symbol: {symbol}")
+    return frame
+
+
+def _eda_acf(params):
+    from src.autocorr import load_acf_pacf
+
+    return load_acf_pacf(_symbol(params), _param(params, "series", "close"))
+
+
+def _runs(params):
+    from src.forecast_store import list_runs
+
+    return list_runs()
+
+
+def _series(params):
+    from src.forecast_store import available_series
+
+    return available_series(run_id=_run_id(params))
+
+
+def _forecast(params):
+    from src.forecast_store import forecast_frame
+
+    coin, model = _symbol(params, "coin"), _param(params, "model", required=True)
+    frame = forecast_frame(coin, model, run_id=_run_id(params))
+    if frame.empty:
+        raise NotFound(f"No forecast for coin {coin!r} and model {model!r}")
+    return frame
+
+
+def _past(params):
+    from src.forecast_store import past_frame
+
+    coin, model = _symbol(params, "coin"), _param(params, "model", required=True)
+    frame = past_frame(coin, model, run_id=_run_id(params))
+    if frame.empty:
+        raise NotFound(f"No fitted values for coin {coin!r} and model {model!r}")
+    return frame
+
+
+def _forecasts(params):
+    from src.forecast_store import read_forecasts
+
+    filters = {k: params[k] for k in ("coin", "model", "kind") if k in params}
+    return read_forecasts(run_id=_run_id(params), **filters)
+
+
+def _metrics(params):
+    from src.evaluation import load_metrics
+
+    symbol, model = _param(params, "symbol"), _param(params, "model")
+    frame = load_metrics(scope=_param(params, "scope", "global"), source=_param(params, "source", "in_sample"),
+                         symbol=symbol, model=model)
+    if frame.empty and (symbol or model):
+        raise NotFound(f"No metrics for symbol {symbol!r} and model {model!r}")
+    return frame
+
+
+def _bins_path():
+    from src.distributions import BINS_PATH
+
+    return BINS_PATH
+
+
+def _acf_path():
+    from src.autocorr import ACF_PATH
+
+    return ACF_PATH
+
+
+def _runs_path():
+    from src.forecast_store import STORE_DIR
+
+    return STORE_DIR / "runs.parquet"
+
+
+def _metrics_path():
+    from src.evaluation import METRICS_PATH
+
+    return METRICS_PATH
+
+
+ROUTES = {
+    "/health": (lambda params: "health", lambda params: pd.DataFrame({"status": ["ok"]})),
+    "/symbols": (_dataset_version, _symbols),
+    "/ohlcv": (_dataset_version, _symbol_rows),
+    "/bars": (_dataset_version, _bars),
+    "/features": (_dataset_version, _features),
+    "/eda/distribution": (_file(_bins_path), _eda_distribution),
+    "/eda/acf": (_file(_acf_path), _eda_acf),
+    **{f"/eda/{name}": _eda_route(name) for name in EDA_SERIES},
+    "/runs": (_file(_runs_path), _runs),
+    "/series": (_run_version, _series),
+    "/forecast": (_run_version, _forecast),
+    "/past": (_run_version, _past),
+    "/forecasts": (_run_version, _forecasts),
+    "/metrics": (_file(_metrics_path), _metrics),
+}
+
+
+def route(path: str, params: dict) -> Tuple[str, Callable]:
+    """Resolve a request path to (artifact version, loader returning the frame)."""
+    entry = ROUTES.get(path.rstrip("/") or "/")
+    if entry is None:
+        raise NotFound(f"Unknown endpoint: {path}")
+    version, load = entry
+    return version(params), load
+
+
+# ---- rendering ----------------------------------------------------------------
+
+def render(frame: pd.DataFrame, fmt: str, offset: int, limit: int,
+           next_url: Optional[str]) -> Tuple[bytes, str, dict]:
+    """One page of `frame` as (body, content type, extra headers)."""
+    page = frame.iloc[offset:offset + limit]
+    headers = {"X-Total-Count": str(len(frame))}
+    if next_url:
+        headers["Link"] = f'<{next_url}>; rel="next"'
+
+    if fmt == "arrow":
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(page, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), FORMATS["arrow"], headers
+    if fmt == "csv":
+        return page.to_csv(index=False).encode(), FORMATS["csv"], headers
+
+    split = page.to_json(orient="split", index=False, date_format="iso")
+    envelope = json.dumps({"total": len(frame), "offset": offset, "limit": limit, "next": next_url})
+    # splice the already-serialised {"columns": ..., "data": ...} into the envelope
+    return (envelope[:-1] + ", " + split[1:]).encode(), FORMATS["json"], headers
+
+
+def _format(params: dict, accept: str) -> str:
+    fmt = _param(params, "format")
+    if fmt is None:
+        accept = accept or ""
+        fmt = "arrow" if FORMATS["arrow"] in accept else "csv" if "text/csv" in accept else "json"
+    if fmt not in FORMATS:
+        raise ValueError(f"Invalid format: {fmt!r} (json, csv or arrow)")
+    return fmt
+
+
+def _page(params: dict) -> Tuple[int, int]:
+    try:
+        offset = int(_param(params, "offset", "0"))
+        limit = int(_param(params, "limit", str(DEFAULT_LIMIT)))
+    except ValueError:
+        raise ValueError("offset and limit must be integers") from None
+    if offset < 0 or not 0 < limit <= MAX_LIMIT:
+        raise ValueError(f"Need offset >= 0 and 0 < limit <= {MAX_LIMIT}")
+    return offset, limit
+
+
+def _etag(version: str, path: str, params: dict, fmt: str) -> str:
+    key = json.dumps([version, path, sorted((k, v) for k, v in params.items() if k != "format"), fmt])
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "CryptoForecastAPI/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        try:
+            fmt = _format(params, self.headers.get("Accept"))
+            offset, limit = _page(params)
+            version, load = route(url.path, params)
+            etag = _etag(version, url.path, params, fmt)
+            if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+                self._send(304, b"", None, {"ETag": etag})
+                return
+            frame = load(params)
+            next_url = None
+            if offset + limit < len(frame):
+                query = {**params, "offset": [offset + limit]}
+                next_url = f"{url.path}?{urlencode(query, doseq=True)}"
+            body, ctype, headers = render(frame, fmt, offset, limit, next_url)
+            self._send(200, body, ctype, {**headers, "ETag": etag, "Cache-Control": "no-cache"})
+        except NotFound as e:
+            self._error(404, str(e))
+        except FileNotFoundError as e:
+            self._error(404, str(e))
+        except ValueError as e:
+            self._error(400, str(e))
+        except Exception as e:
+            self.log_error("%s failed: %r", url.path, e)
+            self._error(500, "Internal server error")
+
+    def _error(self, status: int, message: str):
+        self._send(status, json.dumps({"error": message}).encode(), FORMATS["json"], {})
+
+    def _send(self, status: int, body: bytes, ctype: Optional[str], headers: dict):
+        if len(body) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=5)
+            headers = {**headers, "Content-Encoding": "gzip"}
+        self.send_response(status)
+        if ctype:
+            self.send_header("Content-Type", ctype)
+        self.send_header("Vary", "Accept, Accept-Encoding")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+
+def make_server(host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer((host, port), ApiHandler)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve prices, features, EDA, forecasts and metrics over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--no-warmup", action="store_true", help="Skip preloading the dataset and latest run")
+    args = parser.parse_args()
+
+    if not args.no_warmup:
+        from src.warmup import warmup
+
+        warmup(modules=["src.features", "src.forecast_store", "src.evaluation"])
+    server = make_server(args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
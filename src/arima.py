@@ -0,0 +1,318 @@
+# src/arima.py
+"""
+Automatic ARIMA order selection and forecasting for many coins.
+
+Replaces the notebook's fixed (5, d, 0) with a per-coin (p, d, q) search:
+ - d from repeated ADF tests, cached on disk per series hash
+ - (p, q) by information criterion (AIC or BIC) with a stepwise search
+   (Hyndman-Khandakar style: start set, then neighbours of the incumbent
+   until no neighbour improves) or the full grid
+ - every round's candidate fits for all coins run together in a process pool
+ - each candidate starts from the parameters of the neighbouring order it
+   was expanded from, so the optimizer begins near the optimum
+
+The chosen orders are written to the model registry and the fitted values,
+forecasts and forecast quantiles are published to the forecast store as
+model "ARIMA". The quantiles are lognormal around the point forecast with
+the relative spread of get_forecast's standard errors, so (unlike Gaussian
+quantiles of the price level) they stay positive.
+
+Functions
+---------
+- difference_order(values, alpha=0.05, max_d=2, cache_dir=None) -> tuple[int, float]
+- search_orders(series, ic="aic", max_p=5, max_q=5, max_d=2, stepwise=True, n_jobs=None) -> pd.DataFrame
+- fit_forecast(series, orders, steps=FORECAST_DAYS, n_jobs=None) -> dict
+- run_arima(df, symbols=None, ..., fixed_order=None) -> tuple[pd.DataFrame, pd.DataFrame]
+
+A coin whose final fit fails (e.g. a LinAlgError) is reported in the
+"error" column of the orders instead of aborting the other coins.
+"""
+
+import hashlib
+import json
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from src.alignment import aligned
+from src.forecasting import (FORECAST_DAYS, PROJECT_ROOT, daily_close, lognormal_quantiles, representative_coins,
+                             to_store_frame)
+
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "data" / "processed" / ".cache"
+MODEL_NAME = "ARIMA"
+NOTEBOOK_ORDER = (5, None, 0)  # p, d from ADF, q
+STEPWISE_START = [(2, 2), (0, 0), (1, 0), (0, 1)]
+
+
+def _series_hash(values: np.ndarray) -> str:
+    return hashlib.sha1(np.ascontiguousarray(values, dtype=np.float64).tobytes()).hexdigest()[:16]
+
+
+def difference_order(values: np.ndarray, alpha: float = 0.05, max_d: int = 2,
+                     cache_dir: str = None) -> Tuple[int, float]:
+    """
+    Smallest d <= max_d whose d-th difference rejects the ADF unit root at
+    alpha, with the p-value of the last test. Results are cached by series hash.
+    """
+    from statsmodels.tsa.stattools import adfuller
+
+    cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+    cache_file = cache_dir / "adf_cache.json"
+    cache = json.loads(cache_file.read_text()) if cache_file.exists() else {}
+    key = f"{_series_hash(values)}:{alpha}:{max_d}"
+    if key in cache:
+        return tuple(cache[key])
+
+    x = np.asarray(values, dtype=float)
+    x = x[np.isfinite(x)]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        d, p_value = 0, adfuller(x)[1]
+        while p_value >= alpha and d < max_d:
+            d += 1
+            p_value = adfuller(np.diff(x, n=d))[1]
+
+    cache[key] = [d, float(p_value)]
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_file.with_name(f".{cache_file.name}.tmp")
+    tmp.write_text(json.dumps(cache))
+    os.replace(tmp, cache_file)
+    return d, float(p_value)
+
+
+def _start_params(param_names: list, seed: Optional[dict]) -> Optional[np.ndarray]:
+    """Map a neighbouring fit's parameters onto a new order; new AR/MA terms start at 0."""
+    if not seed:
+        return None
+    return np.array([seed.get(name, 0.0) for name in param_names])
+
+
+def _fit_candidate(job: tuple) -> dict:
+    """Pool worker: fit one (coin, order) and return its criteria and parameters."""
+    from statsmodels.tsa.arima.model import ARIMA
+
+    coin, values, order, seed = job
+    out = {"coin": coin, "order": order, "aic": np.inf, "bic": np.inf, "params": None}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            model = ARIMA(values, order=order)
+            start = _start_params(model.param_names, seed)
+            try:
+                res = model.fit(start_params=start)
+            except Exception:
+                if start is None:
+                    raise
+                res = model.fit()
+        except Exception:
+            return out
+    out.update(aic=float(res.aic), bic=float(res.bic),
+               params=dict(zip(model.param_names, np.asarray(res.params, dtype=float))))
+    return out
+
+
+def _map(jobs: list, func, n_jobs: Optional[int]) -> list:
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs <= 1 or len(jobs) <= 1:
+        return [func(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(jobs))) as pool:
+        return list(pool.map(func, jobs, chunksize=max(1, len(jobs) // (4 * n_jobs))))
+
+
+def _neighbours(p: int, q: int, max_p: int, max_q: int) -> list:
+    steps = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, 1), (-1, 1), (1, -1)]
+    return [(p + dp, q + dq) for dp, dq in steps
+            if 0 <= p + dp <= max_p and 0 <= q + dq <= max_q]
+
+
+def search_orders(series: dict, ic: str = "aic", max_p: int = 5, max_q: int = 5, max_d: int = 2,
+                  stepwise: bool = True, n_jobs: Optional[int] = None,
+                  cache_dir: str = None) -> pd.DataFrame:
+    """
+    Select (p, d, q) per coin. series: {coin: pd.Series of daily closes}.
+    Returns one row per coin: coin, p, d, q, aic, bic, adf_pvalue, n_fits.
+    """
+    if ic not in ("aic", "bic"):
+        raise ValueError(f"Unknown information criterion: {ic!r} (expected 'aic' or 'bic')")
+
+    values = {coin: s.to_numpy(dtype=float) for coin, s in series.items()}
+    diffs = {coin: difference_order(v, max_d=max_d, cache_dir=cache_dir) for coin, v in values.items()}
+    fits = {coin: {} for coin in values}       # (p, q) -> result
+    seeds = {coin: {} for coin in values}      # (p, q) -> params of the order it came from
+    if stepwise:
+        pending = {coin: [pq for pq in STEPWISE_START if pq[0] <= max_p and pq[1] <= max_q]
+                   for coin in values}
+    else:
+        pending = {coin: [(p, q) for p in range(max_p + 1) for q in range(max_q + 1)] for coin in values}
+    best = {coin: None for coin in values}
+
+    while any(pending.values()):
+        jobs = [(coin, values[coin], (p, diffs[coin][0], q), seeds[coin].get((p, q)))
+                for coin, todo in pending.items() for p, q in todo]
+        for res in _map(jobs, _fit_candidate, n_jobs):
+            p, _, q = res["order"]
+            fits[res["coin"]][(p, q)] = res
+
+        for coin in values:
+            previous = best[coin]
+            best[coin] = min(fits[coin], key=lambda pq: fits[coin][pq][ic])
+            improved = previous is None or fits[coin][best[coin]][ic] < fits[coin][previous][ic]
+            if not stepwise or not improved or not np.isfinite(fits[coin][best[coin]][ic]):
+                pending[coin] = []
+                continue
+            incumbent = fits[coin][best[coin]]["params"]
+            pending[coin] = [pq for pq in _neighbours(*best[coin], max_p, max_q) if pq not in fits[coin]]
+            for pq in pending[coin]:
+                seeds[coin][pq] = incumbent
+
+    rows = []
+    for coin in values:
+        p, q = best[coin]
+        res = fits[coin][(p, q)]
+        rows.append({"coin": coin, "p": p, "d": diffs[coin][0], "q": q, "aic": res["aic"],
+                     "bic": res["bic"], "adf_pvalue": diffs[coin][1], "n_fits": len(fits[coin]),
+                     "params": res["params"]})
+    return pd.DataFrame(rows)
+
+
+def _fit_final(job: tuple) -> dict:
+    """
+    Pool worker: refit the chosen order on the dated series and forecast.
+    A failed fit returns {"coin", "error"} so one coin cannot abort the pool.
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    coin, series, order, seed, steps = job
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            model = ARIMA(series, order=order)
+            start = _start_params(model.param_names, seed)
+            try:
+                res = model.fit(start_params=start)
+            except Exception:
+                if start is None:
+                    raise
+                res = model.fit()
+            pred = res.get_forecast(steps=steps)
+        except Exception as e:
+            return {"coin": coin, "error": f"{type(e).__name__}: {e}"}
+        forecast = np.asarray(pred.predicted_mean, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # lognormal with the forecast's mean and standard error; undefined for a non-positive mean
+            log_std = np.sqrt(np.log1p((np.asarray(pred.se_mean, dtype=float) / forecast) ** 2))
+        quantiles = np.where(forecast[:, None] > 0, lognormal_quantiles(forecast, log_std), np.nan)
+    return {"coin": coin, "fitted": res.fittedvalues, "forecast": forecast, "quantiles": quantiles}
+
+
+def fit_forecast(series: dict, orders: pd.DataFrame, steps: int = FORECAST_DAYS,
+                 n_jobs: Optional[int] = None) -> dict:
+    """
+    {coin: {"fitted": Series, "forecast": ndarray, "quantiles": ndarray}} for
+    the orders chosen per coin; coins whose fit failed map to {"error": message}.
+    """
+    by_coin = orders.set_index("coin")
+    jobs = [(coin, series[coin], tuple(int(by_coin.loc[coin, c]) for c in ("p", "d", "q")),
+             by_coin.loc[coin].get("params"), steps) for coin in by_coin.index]
+    return {res["coin"]: res for res in _map(jobs, _fit_final, n_jobs)}
+
+
+def run_arima(df: pd.DataFrame, symbols: Sequence[str] = None, ic: str = "aic", max_p: int = 5,
+              max_q: int = 5, max_d: int = 2, stepwise: bool = True, n_jobs: Optional[int] = None,
+              fixed_order: Optional[tuple] = None,
+              steps: int = FORECAST_DAYS) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Search orders (or use fixed_order, with d=None meaning ADF-selected),
+    fit and forecast. Returns (store_frame, orders) where orders has one row
+    per coin and an "error" column (None when the final fit succeeded); the
+    frame only holds the coins that were fitted.
+    """
+    symbols = list(symbols) if symbols else representative_coins()
+    calendar = aligned(df)
+    series = {coin: daily_close(df, coin, calendar=calendar) for coin in symbols}
+
+    if fixed_order is not None:
+        p, d, q = fixed_order
+        rows = []
+        for coin, s in series.items():
+            d_coin, p_value = difference_order(s.to_numpy(), max_d=1) if d is None else (d, np.nan)
+            rows.append({"coin": coin, "p": p, "d": d_coin, "q": q, "adf_pvalue": p_value,
+                         "n_fits": 1, "params": None})
+        orders = pd.DataFrame(rows)
+    else:
+        orders = search_orders(series, ic=ic, max_p=max_p, max_q=max_q, max_d=max_d,
+                               stepwise=stepwise, n_jobs=n_jobs)
+
+    results = fit_forecast(series, orders, steps=steps, n_jobs=n_jobs)
+    orders["error"] = [results[coin].get("error") for coin in orders["coin"]]
+    fitted = [coin for coin in orders["coin"] if "error" not in results[coin]]
+    if not fitted:
+        raise ValueError(f"ARIMA fit failed for every coin: {dict(zip(orders['coin'], orders['error']))}")
+    frame = pd.concat([
+        to_store_frame(coin, MODEL_NAME, series[coin], results[coin]["fitted"], results[coin]["forecast"],
+                       results[coin]["quantiles"])
+        for coin in fitted
+    ], ignore_index=True)
+    return frame, orders
+
+
+def main():
+    import argparse
+    import time
+    from src.forecast_store import publish_run
+    from src.io import load_dataset
+    from src.registry import register_many
+
+    parser = argparse.ArgumentParser(description="Auto-ARIMA order search and forecasts.")
+    parser.add_argument("--symbols", nargs="*", default=None,
+                        help="Coins to model (default: cluster representatives)")
+    parser.add_argument("--all", action="store_true", help="Model every symbol in the dataset")
+    parser.add_argument("--ic", choices=["aic", "bic"], default="aic")
+    parser.add_argument("--max-p", type=int, default=5)
+    parser.add_argument("--max-q", type=int, default=5)
+    parser.add_argument("--max-d", type=int, default=2)
+    parser.add_argument("--full-grid", action="store_true", help="Fit every (p, q) instead of stepwise")
+    parser.add_argument("--fixed", action="store_true", help="Notebook mode: order (5, d, 0)")
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--no-publish", action="store_true", help="Do not write store / registry")
+    args = parser.parse_args()
+
+    df = load_dataset()
+    symbols = sorted(df["symbol"].unique()) if args.all else args.symbols
+    start = time.perf_counter()
+    frame, orders = run_arima(df, symbols, ic=args.ic, max_p=args.max_p, max_q=args.max_q,
+                              max_d=args.max_d, stepwise=not args.full_grid, n_jobs=args.n_jobs,
+                              fixed_order=NOTEBOOK_ORDER if args.fixed else None)
+    elapsed = time.perf_counter() - start
+    print(orders.drop(columns=["params", "error"]).to_string(index=False))
+    print(f"\n{orders['n_fits'].sum()} fits for {len(orders)} coins in {elapsed:.1f}s")
+    failed = orders[orders["error"].notna()]
+    for row in failed.itertuples():
+        print(f"Final fit failed for {row.coin}: {row.error}")
+    orders = orders[orders["error"].isna()]
+
+    if args.no_publish:
+        return
+    search = "fixed" if args.fixed else ("grid" if args.full_grid else "stepwise")
+    register_many(MODEL_NAME, {
+        row.coin: {
+            "order": [int(row.p), int(row.d), int(row.q)],
+            "criterion": args.ic,
+            "aic": None if pd.isna(getattr(row, "aic", np.nan)) else float(row.aic),
+            "bic": None if pd.isna(getattr(row, "bic", np.nan)) else float(row.bic),
+            "adf_pvalue": None if pd.isna(row.adf_pvalue) else float(row.adf_pvalue),
+            "search": search,
+            "n_fits": int(row.n_fits),
+        }
+        for row in orders.itertuples()
+    })
+    run_id = publish_run(frame, description=f"ARIMA {search} ({args.ic}) for {len(orders)} coins")
+    print(f"Published run {run_id}")
+
+
+if __name__ == "__main__":
+    main()
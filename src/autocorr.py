@@ -0,0 +1,141 @@
+# src/autocorr.py
+"""
+Batched ACF / PACF for every symbol at once.
+
+Series are left-aligned into a zero-padded (symbol x time) matrix after
+demeaning, autocovariances come from one real FFT over the whole matrix and
+PACF follows from a Levinson-Durbin recursion vectorized across symbols.
+Results match statsmodels `acf(..., adjusted=False, fft=True)` and
+`pacf(..., method="ywm")`, with Bartlett (ACF) and 1/sqrt(n) (PACF) bands.
+
+Functions
+---------
+- padded_matrix(df, value_col) -> (np.ndarray, np.ndarray, list[str])
+- batched_acf(x, lengths, nlags=40) -> np.ndarray
+- batched_pacf(acf) -> np.ndarray
+- acf_bands(acf, lengths, alpha=0.05) -> (np.ndarray, np.ndarray)
+- acf_pacf_table(df, nlags=40, alpha=0.05, freq="D") -> pd.DataFrame
+- load_acf_pacf(symbol, series="close", path=None) -> pd.DataFrame
+"""
+
+from pathlib import Path
+from typing import Tuple
+import numpy as np
+import pandas as pd
+from scipy.fft import next_fast_len
+from scipy.stats import norm
+
+from src.alignment import calendar_returns
+
+PROJECT_ROOT = Path(__file__).parents[1]
+ACF_PATH = PROJECT_ROOT / "data" / "EDA" / "lag" / "acf_pacf.parquet"
+MAX_LAGS = 40
+SERIES = ["close", "returns", "squared_returns"]
+
+
+def padded_matrix(df: pd.DataFrame, value_col: str) -> Tuple[np.ndarray, np.ndarray, list]:
+    """
+    Left-align each symbol's non-missing values (in date order) into a
+    (symbol x max_len) matrix padded with NaN. Returns (x, lengths, symbols).
+    """
+    df = df[["symbol", "date", value_col]].dropna().sort_values(["symbol", "date"])
+    codes, symbols = pd.factorize(df["symbol"], sort=True)
+    lengths = np.bincount(codes, minlength=len(symbols))
+    pos = np.arange(len(df)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    x = np.full((len(symbols), lengths.max() if len(lengths) else 0), np.nan)
+    x[codes, pos] = df[value_col].to_numpy(dtype=np.float64)
+    return x, lengths, list(symbols)
+
+
+def batched_acf(x: np.ndarray, lengths: np.ndarray, nlags: int = MAX_LAGS) -> np.ndarray:
+    """
+    (S x nlags+1) autocorrelations from biased autocovariances (divided by n),
+    all rows computed with a single zero-padded FFT.
+    """
+    valid = np.arange(x.shape[1])[None, :] < lengths[:, None]
+    mean = np.where(valid, x, 0.0).sum(axis=1) / np.maximum(lengths, 1)
+    centred = np.where(valid, x - mean[:, None], 0.0)
+    nfft = next_fast_len(2 * x.shape[1] - 1, real=True)
+    spec = np.fft.rfft(centred, n=nfft, axis=1)
+    acov = np.fft.irfft(spec * spec.conj(), n=nfft, axis=1)[:, : nlags + 1]
+    acov /= np.maximum(lengths, 1)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        acf = acov / acov[:, :1]
+    # lags beyond a series' own length are undefined
+    acf[np.arange(nlags + 1)[None, :] >= lengths[:, None]] = np.nan
+    return acf
+
+
+def batched_pacf(acf: np.ndarray) -> np.ndarray:
+    """
+    (S x nlags+1) partial autocorrelations via Levinson-Durbin on the ACF
+    rows (Yule-Walker with biased autocovariances, i.e. statsmodels "ywm").
+    """
+    s, m = acf.shape
+    pacf = np.full((s, m), np.nan)
+    pacf[:, 0] = 1.0
+    phi = np.zeros((s, m))
+    err = acf[:, 0].copy()
+    for k in range(1, m):
+        # reflection coefficient for order k
+        num = acf[:, k] - np.einsum("ij,ij->i", phi[:, 1:k], acf[:, k - 1:0:-1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            refl = num / err
+        prev = phi[:, 1:k].copy()
+        phi[:, 1:k] = prev - refl[:, None] * prev[:, ::-1]
+        phi[:, k] = refl
+        err = err * (1 - refl ** 2)
+        pacf[:, k] = refl
+    return pacf
+
+
+def acf_bands(acf: np.ndarray, lengths: np.ndarray, alpha: float = 0.05) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Half-widths of the (1 - alpha) bands: Bartlett's formula for the ACF
+    (as statsmodels `acf(alpha=...)`) and z / sqrt(n) for the PACF.
+    """
+    z = norm.ppf(1 - alpha / 2)
+    n = np.maximum(lengths, 1)[:, None].astype(float)
+    var = np.ones_like(acf) / n
+    var[:, 0] = 0.0
+    var[:, 2:] = (1 + 2 * np.nancumsum(acf[:, 1:-1] ** 2, axis=1)) / n
+    pacf_band = np.full_like(acf, z) / np.sqrt(n)
+    pacf_band[:, 0] = 0.0
+    return z * np.sqrt(var), pacf_band
+
+
+def acf_pacf_table(df: pd.DataFrame, nlags: int = MAX_LAGS, alpha: float = 0.05, freq: str = "D") -> pd.DataFrame:
+    """
+    Long table (symbol, series, lag, acf, pacf, acf_band, pacf_band) for close,
+    daily returns and squared returns of a long OHLCV frame (lowercase columns).
+    Returns are taken on the shared calendar, so a return spanning a gap is
+    NaN and left out of the series rather than counted as one step.
+    """
+    df = df.sort_values(["symbol", "date"])
+    returns = calendar_returns(df, freq)
+    df = df.assign(returns=returns, squared_returns=returns ** 2)
+
+    parts = []
+    for series in SERIES:
+        x, lengths, symbols = padded_matrix(df, series)
+        acf = batched_acf(x, lengths, nlags)
+        pacf = batched_pacf(acf)
+        acf_band, pacf_band = acf_bands(acf, lengths, alpha)
+        parts.append(pd.DataFrame({
+            "symbol": np.repeat(symbols, nlags + 1),
+            "series": series,
+            "lag": np.tile(np.arange(nlags + 1, dtype=np.int16), len(symbols)),
+            "acf": acf.ravel(),
+            "pacf": pacf.ravel(),
+            "acf_band": acf_band.ravel(),
+            "pacf_band": pacf_band.ravel(),
+        }))
+    return pd.concat(parts, ignore_index=True)
+
+
+def load_acf_pacf(symbol: str, series: str = "close", path: str = None) -> pd.DataFrame:
+    path = Path(path) if path else ACF_PATH
+    if not path.exists():
+        raise FileNotFoundError(f"ACF/PACF table not found: {path}")
+    df = pd.read_parquet(path, filters=[("symbol", "==", symbol), ("series", "==", series)])
+    return df.drop(columns=["symbol", "series"]).sort_values("lag").reset_index(drop=True)
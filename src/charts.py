@@ -15,12 +15,17 @@ New functions:
  - get_figure_by_name(df, name, **kwargs) -> convenience router
 """
 
+from __future__ import annotations
+
 from typing import List, Optional
-import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
 import numpy as np
 
+from src.lazy import lazy_import
+
+go = lazy_import("plotly.graph_objects")
+px = lazy_import("plotly.express")
+
 
 def candlestick_figure(df: pd.DataFrame, title: str = "OHLC") -> go.Figure:
     df = df.copy()
@@ -0,0 +1,356 @@
+# src/clustering.py
+"""
+Reproducible clustering pipeline (notebook clustering cells as a module + CLI).
+
+Steps: engineered features -> per-symbol aggregates (cached by data hash)
+-> StandardScaler -> PCA -> KMeans / MiniBatchKMeans over a k-range scored
+by silhouette -> representative selection -> data/EDA/clustering artifacts.
+
+Functions
+---------
+- symbol_aggregates(feat) -> pd.DataFrame
+- cached_aggregates(df, cache_dir=None) -> pd.DataFrame
+- embed(agg, n_components=10) -> np.ndarray
+- score_k_range(X, k_range, algorithm="kmeans", n_jobs=-1) -> (pd.DataFrame, dict)
+- select_representatives(agg) -> pd.DataFrame
+- run_pipeline(df, out_dir=None, k=None, ...) -> dict
+- window_feature_sums(df, freq="D") -> dict          (prefix sums for O(1) window features)
+- rolling_regimes(df, window=90, step=7, k=4) -> pd.DataFrame   (window x symbol labels)
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+
+from src.alignment import aligned
+from src.features import FEATURE_COLUMNS, add_features, clean_features
+from src.io import data_hash
+
+PROJECT_ROOT = Path(__file__).parents[1]
+DEFAULT_OUT_DIR = PROJECT_ROOT / "data" / "EDA" / "clustering"
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "data" / "processed" / ".cache"
+RANDOM_STATE = 42
+CLUSTER_DIMS = 5
+DEFAULT_K = 4
+REGIME_FEATURES = ["ret_mean", "ret_std", "sharpe_ratio", "autocorr1", "log_volume"]
+
+
+def symbol_aggregates(feat: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-symbol mean/std of every engineered feature plus Sharpe ratio and
+    lag-1 autocorrelation of daily returns, in a single grouped aggregation.
+    The autocorrelation is assembled from grouped sums of the lagged pairs,
+    so no per-group Python callbacks are needed.
+    """
+    x = feat["pct_change"]
+    y = x.groupby(feat["symbol"]).shift(1)
+    pair = x.notna() & y.notna()
+    helpers = pd.DataFrame({
+        "_n": pair.astype(float),
+        "_x": x.where(pair, 0.0),
+        "_y": y.where(pair, 0.0),
+    })
+    helpers["_xy"] = helpers["_x"] * helpers["_y"]
+    helpers["_xx"] = helpers["_x"] ** 2
+    helpers["_yy"] = helpers["_y"] ** 2
+    work = pd.concat([feat[["symbol"] + FEATURE_COLUMNS], helpers], axis=1)
+
+    spec = {c: ["mean", "std"] for c in FEATURE_COLUMNS}
+    spec.update({c: "sum" for c in helpers.columns})
+    agg = work.groupby("symbol").agg(spec)
+    agg.columns = [f"{a}_{b}" if b != "sum" else a for a, b in agg.columns]
+
+    n = agg.pop("_n")
+    sx, sy, sxy, sxx, syy = (agg.pop(c) for c in ["_x", "_y", "_xy", "_xx", "_yy"])
+    cov = sxy - sx * sy / n
+    denom = np.sqrt((sxx - sx ** 2 / n) * (syy - sy ** 2 / n))
+    agg["sharpe_ratio"] = agg["pct_change_mean"] / (agg["pct_change_std"] + 1e-9)
+    agg["autocorr1"] = cov / denom.where(denom > 0)
+    return agg.reset_index()
+
+
+def cached_aggregates(df: pd.DataFrame, cache_dir: str = None) -> pd.DataFrame:
+    """
+    Feature aggregates for the raw OHLCV frame, cached on disk keyed by the
+    hash of the input data so an unchanged dataset is never re-aggregated.
+    Features are computed on the shared (linear) calendar, as the trainers
+    do; obs_count counts the observed bars only.
+    """
+    cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+    # v2: features on the shared calendar rather than the raw rows
+    cache_file = cache_dir / f"cluster_aggregates_v2_{data_hash(df)}.parquet"
+    if cache_file.exists():
+        return pd.read_parquet(cache_file)
+
+    feat = clean_features(add_features(aligned(df).long()))
+    agg = symbol_aggregates(feat)
+    meta = feat.groupby("symbol").agg(
+        avg_volume=("volume", "mean"),
+        obs_count=("valid", "sum"),
+        avg_drawdown=("drawdown_30", "mean"),
+    ).reset_index()
+    agg = agg.merge(meta, on="symbol", how="left")
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    agg.to_parquet(cache_file, index=False)
+    return agg
+
+
+def embed(agg: pd.DataFrame, n_components: int = 10) -> np.ndarray:
+    """Standardize the aggregate features and project them with PCA."""
+    from sklearn.decomposition import PCA
+    from sklearn.preprocessing import StandardScaler
+
+    meta_cols = {"symbol", "avg_volume", "obs_count", "avg_drawdown"}
+    X = agg.drop(columns=[c for c in agg.columns if c in meta_cols])
+    X = X.select_dtypes(include=[np.number]).fillna(0)
+    X_scaled = StandardScaler().fit_transform(X)
+    n_components = min(n_components, *X_scaled.shape)
+    return PCA(n_components=n_components, random_state=RANDOM_STATE).fit_transform(X_scaled)
+
+
+def _fit_k(X: np.ndarray, k: int, algorithm: str, n_init: int) -> tuple:
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
+
+    if algorithm == "minibatch":
+        model = MiniBatchKMeans(n_clusters=k, random_state=RANDOM_STATE, n_init=n_init)
+    else:
+        model = KMeans(n_clusters=k, random_state=RANDOM_STATE, n_init=n_init)
+    labels = model.fit_predict(X)
+    sil = silhouette_score(X, labels) if len(np.unique(labels)) > 1 else np.nan
+    return k, labels, float(model.inertia_), float(sil)
+
+
+def score_k_range(X: np.ndarray, k_range: Iterable[int] = range(2, 9), algorithm: str = "kmeans",
+                  n_init: int = 20, n_jobs: int = -1) -> tuple:
+    """
+    Fit one clustering per k in parallel and score each by silhouette.
+    Returns (scores_df, labels_by_k).
+    """
+    from joblib import Parallel, delayed
+
+    ks = [k for k in k_range if 2 <= k < X.shape[0]]
+    if not ks:
+        raise ValueError(f"No valid k in range for {X.shape[0]} samples.")
+    results = Parallel(n_jobs=n_jobs)(delayed(_fit_k)(X, k, algorithm, n_init) for k in ks)
+    scores = pd.DataFrame(
+        [(k, inertia, sil) for k, _, inertia, sil in results],
+        columns=["k", "inertia", "silhouette"],
+    )
+    return scores, {k: labels for k, labels, _, _ in results}
+
+
+def select_representatives(agg: pd.DataFrame) -> pd.DataFrame:
+    """
+    One coin per cluster: highest average volume, then most observations,
+    then shallowest average drawdown.
+    """
+    ranked = agg.sort_values(
+        ["cluster", "avg_volume", "obs_count", "avg_drawdown"],
+        ascending=[True, False, False, True],
+    )
+    best = ranked.groupby("cluster", sort=True).head(1)
+    return best.rename(columns={"symbol": "selected_coin"})[
+        ["cluster", "selected_coin", "avg_volume", "obs_count", "avg_drawdown"]
+    ].reset_index(drop=True)
+
+
+def _returns_pivot(df: pd.DataFrame, freq: str = "D") -> pd.DataFrame:
+    close = aligned(df, policy="mask", freq=freq, fields=("close",)).frame("close")
+    return close.pct_change(fill_method=None)
+
+
+def run_pipeline(df: pd.DataFrame, out_dir: str = None, k: Optional[int] = None,
+                 k_range: Iterable[int] = range(2, 9), algorithm: str = "kmeans",
+                 n_jobs: int = -1, cache_dir: str = None) -> dict:
+    """
+    Run the full clustering pipeline and write every artifact used by the
+    Clustering page. If k is None the k with the best silhouette is used.
+    """
+    out_dir = Path(out_dir) if out_dir else DEFAULT_OUT_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    agg = cached_aggregates(df, cache_dir=cache_dir).sort_values("symbol").reset_index(drop=True)
+    X_pca = embed(agg)
+    X = X_pca[:, :min(CLUSTER_DIMS, X_pca.shape[1])]
+
+    k_range = sorted(set(k_range) | ({k} if k else set()))
+    scores, labels_by_k = score_k_range(X, k_range, algorithm=algorithm, n_jobs=n_jobs)
+    chosen_k = k if k else int(scores.loc[scores["silhouette"].idxmax(), "k"])
+    agg["cluster"] = labels_by_k[chosen_k]
+
+    cluster_labels = pd.DataFrame({
+        "symbol": agg["symbol"],
+        "cluster": agg["cluster"],
+        "pca_1": X_pca[:, 0],
+        "pca_2": X_pca[:, 1],
+    })
+    cluster_labels.to_csv(out_dir / "cluster_labels.csv", index=False)
+
+    groups = cluster_labels.groupby("cluster")["symbol"].apply(list)
+    with open(out_dir / "cluster_groups.json", "w") as f:
+        json.dump({str(c): coins for c, coins in groups.items()}, f, indent=2)
+
+    reasoning = select_representatives(agg)
+    reasoning.to_csv(out_dir / "cluster_representatives_reasoning.csv", index=False)
+    reps = reasoning.rename(columns={"selected_coin": "representative_coin"})[
+        ["cluster", "representative_coin"]
+    ]
+    reps.to_csv(out_dir / "cluster_representatives.csv", index=False)
+
+    scores["selected"] = scores["k"] == chosen_k
+    scores.to_csv(out_dir / "cluster_scores.csv", index=False)
+
+    pivot = _returns_pivot(df)
+    for coin in reps["representative_coin"]:
+        corr = pivot.corrwith(pivot[coin]).drop(index=coin).sort_values(ascending=False)
+        corr.rename_axis("Symbol").to_csv(
+            out_dir / f"cluster_correlation_{coin}.csv", header=["correlation"]
+        )
+
+    return {"k": chosen_k, "labels": cluster_labels, "representatives": reps, "scores": scores}
+
+
+def window_feature_sums(df: pd.DataFrame, freq: str = "D") -> dict:
+    """
+    Cumulative sums over a dense (date x symbol) calendar of bar frequency
+    `freq` from which the regime features of any [start, stop) window follow
+    in O(1) per symbol: return moments, lag-1 cross products and log-volume totals.
+    """
+    calendar = aligned(df, policy="mask", freq=freq, fields=("close", "volume"))
+    dates = calendar.dates
+    close = calendar.frame("close")
+    volume = calendar.frame("volume")
+
+    r = close.pct_change(fill_method=None).to_numpy()
+    r_prev = np.vstack([np.full((1, r.shape[1]), np.nan), r[:-1]])
+    ok = np.isfinite(r)
+    pair = ok & np.isfinite(r_prev)
+    x = np.where(pair, r, 0.0)
+    y = np.where(pair, r_prev, 0.0)
+    lv = np.log1p(volume.to_numpy())
+    lv_ok = np.isfinite(lv)
+
+    parts = {
+        "n": ok, "r": np.where(ok, r, 0.0), "rr": np.where(ok, r * r, 0.0),
+        "pn": pair, "x": x, "y": y, "xy": x * y, "xx": x * x, "yy": y * y,
+        "vn": lv_ok, "v": np.where(lv_ok, lv, 0.0),
+    }
+    sums = {}
+    for key, arr in parts.items():
+        cum = np.zeros((arr.shape[0] + 1, arr.shape[1]))
+        np.cumsum(arr, axis=0, out=cum[1:])
+        sums[key] = cum
+    return {"dates": dates, "symbols": list(close.columns), "sums": sums}
+
+
+def _window_features(sums: dict, start: int, stop: int) -> tuple:
+    """Regime features for every symbol over rows [start, stop) of the calendar."""
+    w = {k: v[stop] - v[start] for k, v in sums.items()}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = w["n"]
+        mean = w["r"] / n
+        std = np.sqrt(np.maximum(w["rr"] / n - mean ** 2, 0) * n / (n - 1))
+        pn = w["pn"]
+        cov = w["xy"] - w["x"] * w["y"] / pn
+        denom = np.sqrt((w["xx"] - w["x"] ** 2 / pn) * (w["yy"] - w["y"] ** 2 / pn))
+        feats = np.column_stack([
+            mean, std, mean / (std + 1e-9), cov / denom, w["v"] / w["vn"],
+        ])
+    return feats, n
+
+
+def rolling_regimes(df: pd.DataFrame, window: int = 90, step: int = 7, k: int = DEFAULT_K,
+                    min_coverage: float = 0.8) -> pd.DataFrame:
+    """
+    Sliding-window regime clustering.
+
+    Features are recomputed for each window from prefix sums (no rescans),
+    standardized cross-sectionally and clustered with KMeans warm-started from
+    the previous window's centroids. Labels are aligned to the previous window
+    with Hungarian matching on centroid distance so a cluster id keeps its
+    meaning over time. Returns a (window_end x symbol) int8 label matrix; -1
+    marks symbols without enough observations in that window.
+    """
+    from scipy.optimize import linear_sum_assignment
+    from sklearn.cluster import KMeans
+
+    panel = window_feature_sums(df)
+    dates, symbols, sums = panel["dates"], panel["symbols"], panel["sums"]
+    ends = list(range(window, len(dates) + 1, step))
+    if not ends:
+        raise ValueError(f"History of {len(dates)} days is shorter than window={window}.")
+
+    labels = np.full((len(ends), len(symbols)), -1, dtype=np.int8)
+    prev_centers = None
+    for row, stop in enumerate(ends):
+        feats, n_obs = _window_features(sums, stop - window, stop)
+        valid = (n_obs >= min_coverage * (window - 1)) & np.isfinite(feats).all(axis=1)
+        if valid.sum() <= k:
+            continue
+        X = feats[valid]
+        X = (X - X.mean(axis=0)) / np.where(X.std(axis=0) > 0, X.std(axis=0), 1.0)
+
+        if prev_centers is None:
+            model = KMeans(n_clusters=k, random_state=RANDOM_STATE, n_init=20).fit(X)
+        else:
+            model = KMeans(n_clusters=k, init=prev_centers, n_init=1).fit(X)
+        centers, window_labels = model.cluster_centers_, model.labels_
+
+        if prev_centers is not None:
+            cost = ((centers[:, None, :] - prev_centers[None, :, :]) ** 2).sum(axis=2)
+            new_ids, old_ids = linear_sum_assignment(cost)
+            mapping = np.empty(k, dtype=int)
+            mapping[new_ids] = old_ids
+            window_labels = mapping[window_labels]
+            matched = np.empty_like(centers)
+            matched[mapping] = centers
+            centers = matched
+
+        labels[row, valid] = window_labels
+        prev_centers = centers
+
+    return pd.DataFrame(
+        labels, index=pd.Index(dates[np.array(ends) - 1], name="window_end"), columns=symbols
+    )
+
+
+def main():
+    import argparse
+    from src.io import load_dataset
+
+    parser = argparse.ArgumentParser(description="Run the cryptocurrency clustering pipeline.")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="Fixed cluster count")
+    parser.add_argument("--auto-k", action="store_true", help="Use the k with the best silhouette score")
+    parser.add_argument("--k-min", type=int, default=2)
+    parser.add_argument("--k-max", type=int, default=8)
+    parser.add_argument("--algorithm", choices=["kmeans", "minibatch"], default="kmeans")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--out-dir", default=None)
+    parser.add_argument("--regimes", action="store_true",
+                        help="Also write the rolling-window regime label matrix")
+    parser.add_argument("--window", type=int, default=90, help="Regime window length (days)")
+    parser.add_argument("--step", type=int, default=7, help="Regime window step (days)")
+    args = parser.parse_args()
+
+    df = load_dataset()
+    if args.regimes:
+        regimes = rolling_regimes(df, window=args.window, step=args.step, k=args.k)
+        out_dir = Path(args.out_dir) if args.out_dir else DEFAULT_OUT_DIR
+        out_dir.mkdir(parents=True, exist_ok=True)
+        regimes.to_parquet(out_dir / "cluster_regimes.parquet")
+        print(f"Saved {regimes.shape[0]} regime windows x {regimes.shape[1]} symbols")
+    result = run_pipeline(
+        df, out_dir=args.out_dir, k=None if args.auto_k else args.k, k_range=range(args.k_min, args.k_max + 1),
+        algorithm=args.algorithm, n_jobs=args.n_jobs,
+    )
+    print(result["scores"].to_string(index=False))
+    print(f"\nClustering artifacts written with k={result['k']}")
+    print(result["representatives"].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
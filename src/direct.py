@@ -0,0 +1,256 @@
+# src/direct.py
+"""
+Direct multi-horizon forecasting: one model per horizon, no recursion.
+
+Each head is a global HistGradientBoostingRegressor (same scale-free
+features and symbol / cluster encodings as src.global_model) trained on the
+h-day-ahead log return log(close[t+h] / close[t]). A forecast for any
+horizon is a single predict() over all coins, and the heads are independent,
+so they train in parallel.
+
+The 180-day path stored for the Forecast page is exact at the head horizons
+(1, 7, 14, 30, 90, 180 days, covering SIGNAL_HORIZONS) and interpolates the
+cumulative log return linearly between them. Quantile paths are built the
+same way from each coin's empirical out-of-sample h-day residual quantiles,
+collected over walk-forward folds (HOLDOUT_FOLDS windows of HOLDOUT_DAYS at
+the end of the training period, each scored by heads fit on the targets
+dated before it).
+
+Functions
+---------
+- horizon_targets(feat, horizons=HORIZONS) -> pd.DataFrame
+- train_direct(df, horizons=HORIZONS, train_end=None, n_jobs=None, **params) -> dict
+- predict_horizons(bundle, frame) -> pd.DataFrame
+- holdout_residuals(frame, horizons, train_end=None, days=HOLDOUT_DAYS, folds=HOLDOUT_FOLDS, n_jobs=None, **params)
+  -> pd.DataFrame
+- residual_quantiles(residuals, symbols, quantiles=QUANTILES, min_count=MIN_RESIDUALS) -> pd.DataFrame
+- forecast_path(log_returns, horizons, steps=FORECAST_DAYS) -> np.ndarray
+- run_direct(df, symbols=None, horizons=HORIZONS, train_end=None, n_jobs=None, residual_days=HOLDOUT_DAYS,
+  residual_folds=HOLDOUT_FOLDS, **params) -> (pd.DataFrame, dict, dict)
+"""
+
+from typing import Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from src.alignment import aligned
+from src.features import add_features, clean_features
+from src.forecasting import (FORECAST_DAYS, HOLDOUT_DAYS, HOLDOUT_FOLDS, MIN_RESIDUALS, PROJECT_ROOT, QUANTILES,
+                             WARMUP_DAYS, daily_close, to_store_frame)
+from src.global_model import CATEGORICAL, DEFAULT_PARAMS, cluster_labels, design_matrix, global_features
+
+MODEL_NAME = "Direct GBM"
+MODEL_PATH = PROJECT_ROOT / "models" / "global" / "direct_gbm.joblib"
+HORIZONS = [1, 7, 14, 30, 90, 180]
+
+
+def horizon_targets(feat: pd.DataFrame, horizons: Sequence[int] = HORIZONS) -> pd.DataFrame:
+    """log(close[t+h] / close[t]) per symbol for each h (NaN where t+h is past the data)."""
+    grp = feat.groupby("symbol", sort=False)["close"]
+    log_close = np.log(feat["close"])
+    return pd.DataFrame({f"target_{h}": np.log(grp.shift(-h)) - log_close for h in horizons},
+                        index=feat.index)
+
+
+def _feature_frame(df: pd.DataFrame, horizons: Sequence[int]) -> pd.DataFrame:
+    feat = add_features(aligned(df).long())
+    feat = pd.concat([feat, horizon_targets(feat, horizons)], axis=1)
+    # horizon targets may be NaN near the end; only the feature columns must be complete
+    clean = clean_features(feat.drop(columns=[f"target_{h}" for h in horizons]), warmup=WARMUP_DAYS)
+    keys = feat[["symbol", "date"] + [f"target_{h}" for h in horizons]]
+    clean = clean.merge(keys, on=["symbol", "date"], how="left")
+    return pd.concat([clean[["date", "symbol", "close"] + [f"target_{h}" for h in horizons]],
+                      global_features(clean)], axis=1)
+
+
+def _fit_head(X: pd.DataFrame, y: np.ndarray, params: dict):
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    model = HistGradientBoostingRegressor(
+        categorical_features=[X.columns.get_loc(c) for c in CATEGORICAL], **params)
+    return model.fit(X, y)
+
+
+def train_direct(df: pd.DataFrame, horizons: Sequence[int] = HORIZONS, train_end: Optional[str] = None,
+                 n_jobs: Optional[int] = None, **params) -> dict:
+    """
+    Fit one head per horizon on every symbol (in parallel with joblib).
+    With train_end, a head only sees rows whose target date is <= train_end.
+    """
+    horizons = sorted(horizons)
+    return _train_heads(_feature_frame(df, horizons), horizons, train_end, n_jobs, params)
+
+
+def _train_heads(frame: pd.DataFrame, horizons: Sequence[int], train_end: Optional[str], n_jobs: Optional[int],
+                 params: dict) -> dict:
+    from joblib import Parallel, delayed
+
+    symbols = sorted(frame["symbol"].unique())
+    clusters = cluster_labels()
+    X = design_matrix(frame, symbols, clusters)
+    params = {**DEFAULT_PARAMS, **params}
+
+    jobs = []
+    for h in horizons:
+        mask = frame[f"target_{h}"].notna()
+        if train_end is not None:
+            mask &= frame["date"] + pd.Timedelta(days=h) <= pd.Timestamp(train_end)
+        if not mask.any():
+            raise ValueError(f"No training rows for horizon {h}")
+        jobs.append(delayed(_fit_head)(X[mask], frame.loc[mask, f"target_{h}"].to_numpy(), params))
+    heads = Parallel(n_jobs=n_jobs or 1)(jobs)
+
+    return {
+        "heads": dict(zip(horizons, heads)),
+        "symbols": symbols,
+        "clusters": {s: clusters[s] for s in symbols if s in clusters},
+        "features": list(X.columns),
+        "train_end": str(pd.Timestamp(train_end).date()) if train_end is not None else str(frame["date"].max().date()),
+    }
+
+
+def predict_horizons(bundle: dict, frame: pd.DataFrame) -> pd.DataFrame:
+    """Predicted h-day log returns (one column per head) for every row of a feature frame."""
+    X = design_matrix(frame, bundle["symbols"], bundle["clusters"])
+    return pd.DataFrame({h: head.predict(X) for h, head in bundle["heads"].items()}, index=frame.index)
+
+
+def holdout_residuals(frame: pd.DataFrame, horizons: Sequence[int], train_end: Optional[str] = None,
+                      days: int = HOLDOUT_DAYS, folds: int = HOLDOUT_FOLDS, n_jobs: Optional[int] = None,
+                      **params) -> pd.DataFrame:
+    """
+    Out-of-sample h-day log residuals (target - prediction) of a feature frame,
+    one column per horizon, over `folds` walk-forward windows of `days` ending
+    at train_end (default: the last date). For each window the heads are
+    refit on the targets dated before it and scored on the rows whose target
+    date falls inside it; rows outside every window are NaN.
+    """
+    horizons = sorted(horizons)
+    params = {**DEFAULT_PARAMS, **params}
+    end = frame["date"].max() if train_end is None else pd.Timestamp(train_end)
+    resid = pd.DataFrame(np.nan, index=frame.index, columns=horizons)
+    for k in range(folds, 0, -1):
+        start, stop = end - pd.Timedelta(days=k * days), end - pd.Timedelta(days=(k - 1) * days)
+        try:
+            bundle = _train_heads(frame, horizons, start, n_jobs, params)
+        except ValueError:
+            continue  # too little history before this window for some head
+        preds = predict_horizons(bundle, frame)
+        for h in horizons:
+            target_date = frame["date"] + pd.Timedelta(days=h)
+            held_out = (target_date > start) & (target_date <= stop)
+            resid.loc[held_out, h] = (frame[f"target_{h}"] - preds[h])[held_out]
+    return resid
+
+
+def residual_quantiles(residuals: pd.DataFrame, symbols: pd.Series, quantiles: list = QUANTILES,
+                       min_count: int = MIN_RESIDUALS) -> pd.DataFrame:
+    """
+    Per-symbol quantiles of the centred h-day log residuals, indexed by
+    (symbol, quantile) with one column per horizon. Symbols with fewer than
+    `min_count` residuals for a horizon get the quantiles pooled over all symbols.
+    """
+    centred = residuals - residuals.groupby(symbols).transform("mean")
+    grouped = centred.groupby(symbols)
+    spread = grouped.quantile(quantiles)
+    enough = grouped.count().loc[spread.index.get_level_values(0)].to_numpy() >= min_count
+    pooled = centred.quantile(quantiles).loc[spread.index.get_level_values(1)].to_numpy()
+    return spread.where(enough, pooled)
+
+
+def forecast_path(log_returns: np.ndarray, horizons: Sequence[int], steps: int = FORECAST_DAYS) -> np.ndarray:
+    """
+    (coins x steps) cumulative log returns, exact at the head horizons and
+    linearly interpolated between them (0 at day 0, flat beyond the last head).
+    """
+    knots = np.concatenate([[0], horizons])
+    values = np.column_stack([np.zeros(len(log_returns)), log_returns])
+    days = np.arange(1, steps + 1)
+    return np.vstack([np.interp(days, knots, row) for row in values])
+
+
+def run_direct(df: pd.DataFrame, symbols: Sequence[str] = None, horizons: Sequence[int] = HORIZONS,
+               train_end: Optional[str] = None, n_jobs: Optional[int] = None, steps: int = FORECAST_DAYS,
+               residual_days: int = HOLDOUT_DAYS, residual_folds: int = HOLDOUT_FOLDS, **params) -> Tuple[pd.DataFrame, dict, dict]:
+    """
+    Train the heads, then forecast every requested coin from its last
+    training-window day. Fitted values are the 1-day head's in-sample
+    predictions; the quantile paths use the walk-forward residuals of
+    holdout_residuals. Returns (store_frame, {coin: registry metadata}, bundle).
+    """
+    horizons = sorted(horizons)
+    full = _feature_frame(df, horizons)
+    bundle = _train_heads(full, horizons, train_end, n_jobs, {**DEFAULT_PARAMS, **params})
+    symbols = list(symbols) if symbols else bundle["symbols"]
+    residuals = holdout_residuals(full, horizons, train_end, residual_days, residual_folds, n_jobs, **params)
+
+    in_symbols = full["symbol"].isin(symbols)
+    frame = full[in_symbols]
+    preds = predict_horizons(bundle, frame)
+
+    last_idx = frame.groupby("symbol").tail(1).index
+    origin = frame.loc[last_idx, "symbol"]
+    last_close = frame.loc[last_idx, "close"].set_axis(origin).loc[symbols]
+    last_preds = preds.loc[last_idx].set_axis(origin).loc[symbols]
+    paths = forecast_path(last_preds[horizons].to_numpy(), horizons, steps)
+    spread = residual_quantiles(residuals[in_symbols], frame["symbol"])
+    # (coins x steps x quantiles) log-return paths, one per quantile
+    qpaths = np.stack([
+        forecast_path(last_preds[horizons].to_numpy() + spread.xs(q, level=1).loc[symbols, horizons].to_numpy(),
+                      horizons, steps)
+        for q in QUANTILES
+    ], axis=-1)
+
+    calendar = aligned(df)
+    parts, meta = [], {}
+    for i, coin in enumerate(symbols):
+        close = daily_close(df, coin, calendar=calendar)
+        rows = frame["symbol"] == coin
+        fitted = pd.Series(frame.loc[rows, "close"].to_numpy() * np.exp(preds.loc[rows, horizons[0]].to_numpy()),
+                           index=frame.loc[rows, "date"] + pd.Timedelta(days=horizons[0]))
+        forecast = last_close[coin] * np.exp(paths[i])
+        quantiles = last_close[coin] * np.exp(qpaths[i])
+        parts.append(to_store_frame(coin, MODEL_NAME, close, fitted[fitted.index <= close.index[-1]], forecast,
+                                    quantiles))
+        meta[coin] = {"horizons": horizons, "train_end": bundle["train_end"],
+                      "cluster": bundle["clusters"].get(coin)}
+    return pd.concat(parts, ignore_index=True), meta, bundle
+
+
+def main():
+    import argparse
+    import time
+    from src.forecast_store import publish_run
+    from src.global_model import save_model
+    from src.io import load_dataset
+    from src.registry import register_many
+
+    parser = argparse.ArgumentParser(description="Train direct multi-horizon models across all coins.")
+    parser.add_argument("--symbols", nargs="*", default=None, help="Coins to publish (default: every coin)")
+    parser.add_argument("--horizons", nargs="*", type=int, default=HORIZONS)
+    parser.add_argument("--train-end", default=None, help="Last target date used for training (YYYY-MM-DD)")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Heads trained in parallel")
+    parser.add_argument("--residual-days", type=int, default=HOLDOUT_DAYS,
+                        help="Days per walk-forward fold whose residuals set the forecast bands")
+    parser.add_argument("--residual-folds", type=int, default=HOLDOUT_FOLDS, help="Walk-forward folds")
+    parser.add_argument("--no-publish", action="store_true", help="Do not write model / store / registry")
+    args = parser.parse_args()
+
+    df = load_dataset()
+    start = time.perf_counter()
+    frame, meta, bundle = run_direct(df, args.symbols, args.horizons, train_end=args.train_end,
+                                     n_jobs=args.n_jobs, residual_days=args.residual_days,
+                                     residual_folds=args.residual_folds)
+    print(f"Trained {len(bundle['heads'])} horizon heads, forecast {len(meta)} coins "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    if args.no_publish:
+        return
+    print(f"Model saved to {save_model(bundle, MODEL_PATH)}")
+    register_many(MODEL_NAME, meta)
+    run_id = publish_run(frame, description=f"Direct GBM for {len(meta)} coins")
+    print(f"Published run {run_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# src/distributions.py
+"""
+Pre-binned distribution summaries computed for every symbol in one pass.
+
+Instead of shipping raw close / returns series to the browser, the EDA build
+stores per-symbol fixed-width histograms, equal-frequency (quantile)
+histograms, a binned Gaussian KDE on a fixed grid and summary quantiles.
+Everything is computed on flat arrays indexed by symbol code (bincount,
+one lexsort, batched FFT), so cost is one pass over the data regardless of
+the number of symbols.
+
+Functions
+---------
+- distribution_tables(df, value_col, series, bins=50, kde_points=200) -> (bins_df, summary_df)
+- build_distributions(df, bins=50, kde_points=200, freq="D") -> (bins_df, summary_df)
+- write_distributions(df, out_dir=None, bins=50, kde_points=200, freq="D") -> tuple[Path, Path]
+- load_distribution(symbol, series, kind="fixed", path=None) -> pd.DataFrame
+- load_distribution_summary(symbol=None, path=None) -> pd.DataFrame
+"""
+
+from pathlib import Path
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+from src.alignment import calendar_returns
+
+PROJECT_ROOT = Path(__file__).parents[1]
+DIST_DIR = PROJECT_ROOT / "data" / "EDA" / "distributions"
+BINS_PATH = DIST_DIR / "histograms.parquet"
+SUMMARY_PATH = DIST_DIR / "distribution_summary.parquet"
+
+DEFAULT_BINS = 50
+KDE_POINTS = 200
+SUMMARY_QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+SERIES = ("price", "returns")
+KINDS = ("fixed", "quantile", "kde")
+
+
+def _codes(df: pd.DataFrame, value_col: str) -> Tuple[np.ndarray, np.ndarray, list]:
+    """Finite values with their integer symbol codes."""
+    values = pd.to_numeric(df[value_col], errors="coerce").to_numpy(dtype=np.float64)
+    codes, symbols = pd.factorize(df["symbol"], sort=True)
+    keep = np.isfinite(values) & (codes >= 0)
+    return codes[keep], values[keep], list(symbols)
+
+
+def _group_stats(codes: np.ndarray, values: np.ndarray, n_sym: int) -> dict:
+    count = np.bincount(codes, minlength=n_sym).astype(np.float64)
+    total = np.bincount(codes, weights=values, minlength=n_sym)
+    mean = total / np.maximum(count, 1)
+    sq = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=n_sym)
+    std = np.sqrt(sq / np.maximum(count - 1, 1))
+    vmin = np.full(n_sym, np.inf)
+    vmax = np.full(n_sym, -np.inf)
+    np.minimum.at(vmin, codes, values)
+    np.maximum.at(vmax, codes, values)
+    return {"count": count, "mean": mean, "std": std, "min": vmin, "max": vmax}
+
+
+def _fixed_histogram(codes, values, stats, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(S x bins) counts and (S x bins+1) edges spanning each symbol's [min, max]."""
+    n_sym = len(stats["count"])
+    span = stats["max"] - stats["min"]
+    width = np.where(span > 0, span / bins, 1.0)
+    idx = np.floor((values - stats["min"][codes]) / width[codes]).astype(np.int64)
+    idx = np.clip(idx, 0, bins - 1)  # the maximum lands in the last bin
+    counts = np.bincount(codes * bins + idx, minlength=n_sym * bins).reshape(n_sym, bins)
+    edges = stats["min"][:, None] + width[:, None] * np.arange(bins + 1)
+    return counts, edges
+
+
+def _sorted_quantiles(codes, values, stats, probs: np.ndarray) -> np.ndarray:
+    """
+    (S x len(probs)) linear-interpolated quantiles (numpy's default method)
+    from a single lexsort of all values by (symbol, value).
+    """
+    count = stats["count"].astype(np.int64)
+    if count.sum() == 0:
+        return np.full((len(count), len(probs)), np.nan)
+    ordered = values[np.lexsort((values, codes))]
+    last = np.maximum(count - 1, 0)[:, None]
+    starts = (np.cumsum(count) - count)[:, None]
+    pos = probs[None, :] * last
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, last)
+    frac = pos - lo
+    top = len(ordered) - 1
+    q = ordered[np.minimum(starts + lo, top)] * (1 - frac) + ordered[np.minimum(starts + hi, top)] * frac
+    q[count == 0] = np.nan
+    return q
+
+
+def _quantile_histogram(stats, edges: np.ndarray) -> np.ndarray:
+    """Equal-frequency bin counts implied by rank boundaries (n/bins each, up to rounding)."""
+    bins = edges.shape[1] - 1
+    bounds = np.ceil(stats["count"][:, None] * np.arange(bins + 1) / bins)
+    return np.diff(bounds, axis=1)
+
+
+def _binned_kde(codes, values, stats, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gaussian KDE (Scott bandwidth) evaluated on a per-symbol grid by binning
+    onto the grid and convolving with the kernel via a batched FFT.
+    """
+    n_sym = len(stats["count"])
+    n = np.maximum(stats["count"], 1)
+    bw = stats["std"] * n ** (-1 / 5)
+    bw = np.where(bw > 0, bw, 1e-12)
+    lo = stats["min"] - 3 * bw
+    hi = stats["max"] + 3 * bw
+    dx = (hi - lo) / (points - 1)
+    grid = lo[:, None] + dx[:, None] * np.arange(points)
+
+    # linear binning onto the grid
+    pos = (values - lo[codes]) / dx[codes]
+    left = np.clip(np.floor(pos).astype(np.int64), 0, points - 2)
+    w_right = np.clip(pos - left, 0.0, 1.0)
+    flat = codes * points + left
+    mass = np.bincount(flat, weights=1 - w_right, minlength=n_sym * points)
+    mass += np.bincount(flat + 1, weights=w_right, minlength=n_sym * points)
+    mass = mass.reshape(n_sym, points)
+
+    size = 2 * points
+    offsets = np.arange(size)
+    offsets = np.where(offsets < points, offsets, offsets - size)
+    kernel = np.exp(-0.5 * (offsets[None, :] * dx[:, None] / bw[:, None]) ** 2)
+    kernel /= np.sqrt(2 * np.pi) * bw[:, None]
+    smooth = np.fft.irfft(np.fft.rfft(mass, size, axis=1) * np.fft.rfft(kernel, axis=1), size, axis=1)
+    density = np.maximum(smooth[:, :points], 0.0) / n[:, None]
+    return grid, density
+
+
+def distribution_tables(df: pd.DataFrame, value_col: str, series: str, bins: int = DEFAULT_BINS,
+                        kde_points: int = KDE_POINTS) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Histogram / KDE rows and summary statistics of one column for every symbol.
+
+    bins_df columns: symbol, series, kind ("fixed" | "quantile" | "kde"),
+    bin, x0, x1, count, density. For KDE rows x0 == x1 is the grid point.
+    """
+    codes, values, symbols = _codes(df, value_col)
+    n_sym = len(symbols)
+    stats = _group_stats(codes, values, n_sym)
+    n = np.maximum(stats["count"], 1)[:, None]
+
+    fixed_counts, fixed_edges = _fixed_histogram(codes, values, stats, bins)
+    q_edges = _sorted_quantiles(codes, values, stats, np.linspace(0, 1, bins + 1))
+    q_counts = _quantile_histogram(stats, q_edges)
+    grid, kde = _binned_kde(codes, values, stats, kde_points)
+
+    def block(kind, x0, x1, counts, density):
+        m = x0.shape[1]
+        return pd.DataFrame({
+            "symbol": np.repeat(symbols, m),
+            "kind": kind,
+            "bin": np.tile(np.arange(m, dtype=np.int16), n_sym),
+            "x0": x0.ravel(),
+            "x1": x1.ravel(),
+            "count": counts.ravel(),
+            "density": density.ravel(),
+        })
+
+    fixed_width = np.diff(fixed_edges, axis=1)
+    q_width = np.diff(q_edges, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q_density = np.where(q_width > 0, q_counts / (n * q_width), np.nan)
+    bins_df = pd.concat([
+        block("fixed", fixed_edges[:, :-1], fixed_edges[:, 1:], fixed_counts,
+              fixed_counts / (n * fixed_width)),
+        block("quantile", q_edges[:, :-1], q_edges[:, 1:], q_counts, q_density),
+        block("kde", grid, grid, np.full(grid.shape, np.nan), kde),
+    ], ignore_index=True)
+    bins_df.insert(1, "series", series)
+    for col in ["x0", "x1", "count", "density"]:
+        bins_df[col] = bins_df[col].astype(np.float32)
+
+    quantiles = _sorted_quantiles(codes, values, stats, np.asarray(SUMMARY_QUANTILES))
+    summary = pd.DataFrame({
+        "symbol": symbols,
+        "series": series,
+        "count": stats["count"].astype(np.int64),
+        "mean": stats["mean"],
+        "std": stats["std"],
+        "min": stats["min"],
+        **{f"p{int(round(q * 100)):02d}": quantiles[:, i] for i, q in enumerate(SUMMARY_QUANTILES)},
+        "max": stats["max"],
+    })
+    return bins_df, summary
+
+
+def build_distributions(df: pd.DataFrame, bins: int = DEFAULT_BINS, kde_points: int = KDE_POINTS,
+                        freq: str = "D") -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Price ("close") and daily returns distributions for a long OHLCV frame
+    (lowercase columns). Returns come from the shared calendar: one spanning
+    a gap is NaN and left out of the returns tables.
+    """
+    df = df.sort_values(["symbol", "date"])
+    df = df.assign(returns=calendar_returns(df, freq))
+    parts = [distribution_tables(df, col, series, bins, kde_points)
+             for col, series in (("close", "price"), ("returns", "returns"))]
+    bins_df = pd.concat([p[0] for p in parts], ignore_index=True)
+    summary = pd.concat([p[1] for p in parts], ignore_index=True)
+    for col in ["symbol", "series", "kind"]:
+        bins_df[col] = bins_df[col].astype("category")
+    return bins_df, summary
+
+
+def write_distributions(df: pd.DataFrame, out_dir: str = None, bins: int = DEFAULT_BINS,
+                        kde_points: int = KDE_POINTS, freq: str = "D") -> Tuple[Path, Path]:
+    """Build and save histograms.parquet and distribution_summary.parquet."""
+    out_dir = Path(out_dir) if out_dir else DIST_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    bins_df, summary = build_distributions(df, bins=bins, kde_points=kde_points, freq=freq)
+    bins_path, summary_path = out_dir / BINS_PATH.name, out_dir / SUMMARY_PATH.name
+    bins_df.to_parquet(bins_path, index=False)
+    summary.to_parquet(summary_path, index=False)
+    return bins_path, summary_path
+
+
+def load_distribution(symbol: str, series: str, kind: str = "fixed", path: str = None) -> pd.DataFrame:
+    """Read the pre-binned rows of one symbol / series / kind."""
+    if series not in SERIES:
+        raise ValueError(f"Invalid series: {series!r} ({' or '.join(SERIES)})")
+    if kind not in KINDS:
+        raise ValueError(f"Invalid kind: {kind!r} ({', '.join(KINDS)})")
+    path = Path(path) if path else BINS_PATH
+    if not path.exists():
+        raise FileNotFoundError(f"Distribution histograms not found: {path}")
+    filters = [("symbol", "==", symbol), ("series", "==", series), ("kind", "==", kind)]
+    df = pd.read_parquet(path, filters=filters, columns=["bin", "x0", "x1", "count", "density"])
+    return df.sort_values("bin").reset_index(drop=True)
+
+
+def load_distribution_summary(symbol: str = None, path: str = None) -> pd.DataFrame:
+    path = Path(path) if path else SUMMARY_PATH
+    if not path.exists():
+        raise FileNotFoundError(f"Distribution summary not found: {path}")
+    filters = [("symbol", "==", symbol)] if symbol else None
+    return pd.read_parquet(path, filters=filters)
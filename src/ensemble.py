@@ -0,0 +1,293 @@
+# src/ensemble.py
+"""
+Ensembles of the base models already in the forecast store (no retraining).
+
+Weights are fitted on the stored "holdout" rows: the base models'
+multi-step forecasts over their test window, made from a fit that ended
+before it. The "fitted" rows are in-sample (the legacy Random Forest was
+trained on the full history), so weighting by their errors rewards
+overfitting. Over the test window the weights are walk-forward: the weight
+used on day t only sees holdout errors before t, so the ensemble's holdout
+rows are out-of-sample with respect to its weights; the forecasts use the
+weights from the whole window. Coins without holdout rows use weights
+fitted on the holdout errors of all coins together. Everything is computed
+in scale-free terms (moves relative to the last close before the test
+window) with cumulative sums over the (coin x model x date) arrays of
+src.evaluation, so all coins and dates are solved at once.
+
+Methods:
+ - "equal":          1 / M over the models available on the day
+ - "inverse_error":  proportional to 1 / MSE of the relative errors
+                     (expanding, or over the last `window` days)
+ - "stacked":        ridge regression of the actual move on the models'
+                     predicted moves, shrunk towards equal weights
+
+The combination is base + sum_m w_m (pred_m - base), with base the previous
+close (fitted, combined with the final weights), the last close before the
+test window (holdout) or the last training close (forecast and forecast
+quantiles). Results are published as model "Ensemble" with the same kinds as
+the base models; src.forecast_store.available_series only lists it first
+for a coin when its holdout error is the lowest.
+
+Functions
+---------
+- walk_forward_weights(ap, method="inverse_error", window=None, alpha=1.0, base=None) -> np.ndarray
+- final_weights(ap, method="inverse_error", window=None, alpha=1.0, base=None) -> np.ndarray
+- combine(base, preds, weights) -> np.ndarray
+- build_ensemble(run_id=None, method="inverse_error", models=None, window=None, alpha=1.0) -> (pd.DataFrame, dict)
+"""
+
+from typing import Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from src.evaluation import AlignedPredictions, load_stored
+from src.forecast_store import ENSEMBLE_MODEL, read_forecasts, store_rows
+
+METHODS = ("equal", "inverse_error", "stacked")
+MIN_HISTORY = 30
+
+
+def _windowed_sum(x: np.ndarray, window: Optional[int]) -> np.ndarray:
+    """Sum over dates strictly before t (expanding, or the last `window` days); date is the last axis."""
+    cs = np.concatenate([np.zeros(x.shape[:-1] + (1,)), np.cumsum(x, axis=-1)], axis=-1)[..., :-1]
+    if window:
+        lagged = np.concatenate([np.zeros(x.shape[:-1] + (window,)), cs[..., :-window]], axis=-1)
+        cs = cs - lagged[..., : cs.shape[-1]]
+    return cs
+
+
+def _equal_weights(available: np.ndarray) -> np.ndarray:
+    counts = available.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(available, 1.0 / counts, np.nan)
+
+
+def _weights_path(ap: AlignedPredictions, method: str, window: Optional[int], alpha: float,
+                  base: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    (coin x model x date+1) weights; column t only uses residuals before
+    dates[t] and the extra last column uses all of them (for forecasting).
+    Moves are measured from `base` (coin x date; default: the previous close).
+    Days with fewer than MIN_HISTORY usable residuals fall back to equal weights.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown ensemble method {method!r}; expected one of {METHODS}")
+    c, m = ap.pred.shape[:2]
+    actual = np.column_stack([ap.actual, np.full(c, np.nan)])
+    pred = np.concatenate([ap.pred, np.full((c, m, 1), np.nan)], axis=2)
+    if base is None:
+        prev = np.column_stack([np.full(c, np.nan), actual[:, :-1]])
+    else:
+        prev = np.column_stack([base, np.full(c, np.nan)])
+    available = np.isfinite(pred)
+    available[:, :, -1] = np.isfinite(ap.pred).any(axis=2)
+    equal = _equal_weights(available)
+    if method == "equal":
+        return equal
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x = pred / prev[:, None, :] - 1             # predicted move
+        y = actual / prev - 1                       # actual move
+    usable = np.isfinite(x) & np.isfinite(y)[:, None, :]
+
+    if method == "inverse_error":
+        sq = np.where(usable, (x - y[:, None, :]) ** 2, 0.0)
+        n = _windowed_sum(usable.astype(float), window)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            inv = np.where(available & (n >= MIN_HISTORY), n / _windowed_sum(sq, window), np.nan)
+            weights = inv / np.nansum(inv, axis=1, keepdims=True)
+        fallback = ~np.isfinite(weights).any(axis=1, keepdims=True)
+        return np.where(fallback, equal, np.where(available, np.nan_to_num(weights), np.nan))
+
+    # stacked: running Gram matrices over days where every model is present
+    complete = usable.all(axis=1)                                        # (coin x date)
+    xc = np.where(complete[:, None, :], x, 0.0)
+    yc = np.where(complete, y, 0.0)
+    gram = _windowed_sum(np.einsum("cmd,cnd->cmnd", xc, xc), window)     # (coin x M x M x date)
+    cross = _windowed_sum(xc * yc[:, None, :], window)                   # (coin x M x date)
+    n = _windowed_sum(complete.astype(float), window)                    # (coin x date)
+
+    gram = np.moveaxis(gram, -1, 1)                                      # (coin x date x M x M)
+    cross = np.moveaxis(cross, -1, 1)                                    # (coin x date x M)
+    lam = alpha * np.trace(gram, axis1=-2, axis2=-1) / m + 1e-12
+    rhs = cross + lam[..., None] / m
+    weights = np.linalg.solve(gram + lam[..., None, None] * np.eye(m), rhs[..., None])[..., 0]
+    weights = np.moveaxis(weights, 1, -1)                                # (coin x M x date)
+    ok = (n >= MIN_HISTORY)[:, None, :] & available.all(axis=1, keepdims=True)
+    return np.where(ok, weights, equal)
+
+
+def walk_forward_weights(ap: AlignedPredictions, method: str = "inverse_error", window: Optional[int] = None,
+                         alpha: float = 1.0, base: Optional[np.ndarray] = None) -> np.ndarray:
+    """(coin x model x date) weights for each day from the residuals before it."""
+    return _weights_path(ap, method, window, alpha, base)[:, :, :-1]
+
+
+def final_weights(ap: AlignedPredictions, method: str = "inverse_error", window: Optional[int] = None,
+                  alpha: float = 1.0, base: Optional[np.ndarray] = None) -> np.ndarray:
+    """(coin x model) weights from every stored residual, used for the forecasts."""
+    return _weights_path(ap, method, window, alpha, base)[:, :, -1]
+
+
+def combine(base: np.ndarray, preds: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    base + sum_m w_m (pred_m - base) over the model axis (axis 1). Missing
+    predictions are dropped; with weights that sum to one this is the usual
+    weighted mean.
+    """
+    contrib = weights * (preds - base[:, None, ...])
+    out = base + np.nansum(contrib, axis=1)
+    return np.where(np.isfinite(contrib).any(axis=1), out, np.nan)
+
+
+def _forecast_cube(rows: pd.DataFrame, symbols: list, models: list, kind: str) -> Tuple[np.ndarray, pd.DataFrame]:
+    """(coin x model x day_number) array of one forecast kind plus its date grid."""
+    rows = rows[rows["kind"] == kind]
+    days = np.sort(rows["day_number"].dropna().unique()).astype(int)
+    cube = np.full((len(symbols), len(models), len(days)), np.nan)
+    if rows.empty:
+        return cube, pd.DataFrame(columns=["coin", "day_number", "date"])
+    s_idx = {s: i for i, s in enumerate(symbols)}
+    m_idx = {m: i for i, m in enumerate(models)}
+    rows = rows[rows["coin"].isin(s_idx) & rows["model"].isin(m_idx)]
+    cube[rows["coin"].map(s_idx).to_numpy(), rows["model"].map(m_idx).to_numpy(),
+         np.searchsorted(days, rows["day_number"].to_numpy())] = rows["value"].to_numpy()
+    grid = rows.drop_duplicates(["coin", "day_number"])[["coin", "day_number", "date"]]
+    return cube, grid
+
+
+def _holdout(run_id: Optional[str], symbols: list, names: list,
+             fitted: AlignedPredictions) -> Tuple[Optional[AlignedPredictions], Optional[np.ndarray]]:
+    """
+    The stored holdout predictions of `names` for the coins in `symbols`, and
+    each coin's last close before its test window broadcast over the dates
+    (the base the moves are measured from). (None, None) without holdout rows.
+    """
+    try:
+        hold = load_stored("holdout", run_id)
+    except FileNotFoundError:
+        return None, None
+    rows, base = [], []
+    for coin in symbols:
+        if coin not in hold.symbols:
+            continue
+        h = hold.symbols.index(coin)
+        present = np.isfinite(hold.pred[h]).any(axis=0)
+        if not present.any():
+            continue
+        i, t = symbols.index(coin), fitted.dates.searchsorted(hold.dates[present][0])
+        if t == 0 or not np.isfinite(fitted.actual[i, t - 1]):
+            continue
+        rows.append(h)
+        base.append(fitted.actual[i, t - 1])
+    if not rows:
+        return None, None
+    cols = [hold.models.index(m) if m in hold.models else None for m in names]
+    pred = np.stack([np.full((len(rows), len(hold.dates)), np.nan) if c is None else hold.pred[rows, c]
+                     for c in cols], axis=1)
+    ap = AlignedPredictions([hold.symbols[h] for h in rows], list(names), hold.dates, hold.actual[rows], pred)
+    return ap, np.broadcast_to(np.array(base)[:, None], ap.actual.shape)
+
+
+def _pooled_weights(hold: AlignedPredictions, base: np.ndarray, method: str, window: Optional[int],
+                    alpha: float) -> np.ndarray:
+    """(model,) weights fitted on the holdout errors of every coin at once (date-major, coins side by side)."""
+    c, m, d = hold.pred.shape
+    pooled = AlignedPredictions(["pooled"], hold.models, hold.dates,
+                                hold.actual.T.reshape(1, d * c), hold.pred.transpose(1, 2, 0).reshape(1, m, d * c))
+    return final_weights(pooled, method, window * c if window else None, alpha, base.T.reshape(1, d * c))[0]
+
+
+def build_ensemble(run_id: Optional[str] = None, method: str = "inverse_error",
+                   models: Optional[Sequence[str]] = None, window: Optional[int] = None,
+                   alpha: float = 1.0) -> Tuple[pd.DataFrame, dict]:
+    """
+    Combine the base models of a store run with weights fitted on their
+    holdout errors. Returns (store_frame, {coin: registry metadata}) where the
+    frame holds "Ensemble" fitted / holdout / forecast rows.
+    """
+    fitted = load_stored("fitted", run_id)
+    keep = [i for i, m in enumerate(fitted.models)
+            if m != ENSEMBLE_MODEL and (models is None or m in models)]
+    if len(keep) < 2:
+        raise ValueError("An ensemble needs at least two base models")
+    fitted.models = [fitted.models[i] for i in keep]
+    fitted.pred = fitted.pred[:, keep]
+    symbols, names = fitted.symbols, fitted.models
+
+    hold, hold_base = _holdout(run_id, symbols, names, fitted)
+    if hold is None:
+        raise ValueError(f"No holdout rows for the base models in forecast run {run_id or 'latest'}; "
+                         "the ensemble weights are fitted on them")
+    path = _weights_path(hold, method, window, alpha, hold_base)
+    pooled = _pooled_weights(hold, hold_base, method, window, alpha)
+    final = np.vstack([path[hold.symbols.index(coin), :, -1] if coin in hold.symbols else pooled
+                       for coin in symbols])
+
+    # fitted: the base models' in-sample values combined with the final weights
+    prev = np.column_stack([np.full(len(symbols), np.nan), fitted.actual[:, :-1]])
+    ens_fitted = combine(prev, fitted.pred, final[:, :, None])
+
+    parts, meta = [], {}
+    for i, coin in enumerate(symbols):
+        parts.append(store_rows(coin, ENSEMBLE_MODEL, "fitted", fitted.dates, ens_fitted[i]).dropna(subset=["value"]))
+        meta[coin] = {"method": method, "window": window, "models": names,
+                      "weights_from": "holdout" if coin in hold.symbols else "pooled holdout",
+                      "weights": {m: (None if not np.isfinite(w) else round(float(w), 6))
+                                  for m, w in zip(names, final[i])}}
+
+    rows = read_forecasts(coin=symbols, model=names, run_id=run_id)
+    last_close = pd.Series([
+        fitted.actual[i][np.isfinite(fitted.actual[i])][-1] if np.isfinite(fitted.actual[i]).any() else np.nan
+        for i in range(len(symbols))], index=symbols)
+    kinds = sorted(k for k in rows["kind"].unique() if k.startswith("forecast"))
+    for kind in kinds:
+        cube, grid = _forecast_cube(rows, symbols, names, kind)
+        values = combine(np.broadcast_to(last_close.to_numpy()[:, None], (len(symbols), cube.shape[2])),
+                         cube, final[:, :, None])
+        days = np.sort(grid["day_number"].unique()).astype(int)
+        for i, coin in enumerate(symbols):
+            g = grid[grid["coin"] == coin].set_index("day_number")["date"]
+            ok = np.isfinite(values[i]) & np.isin(days, g.index)
+            if ok.any():
+                parts.append(store_rows(coin, ENSEMBLE_MODEL, kind, g.loc[days[ok]].to_numpy(),
+                                        values[i, ok], days[ok]))
+
+    # holdout: walk-forward weights, each day only sees the holdout errors before it
+    values = combine(hold_base, hold.pred, path[:, :, :-1])
+    for i, coin in enumerate(hold.symbols):
+        ok = np.isfinite(values[i]) & np.isfinite(hold.pred[i]).any(axis=0)
+        if ok.any():
+            parts.append(store_rows(coin, ENSEMBLE_MODEL, "holdout", hold.dates[ok], values[i, ok],
+                                    np.arange(1, ok.sum() + 1)))
+    return pd.concat(parts, ignore_index=True), meta
+
+
+def main():
+    import argparse
+    from src.forecast_store import publish_run
+    from src.registry import register_many
+
+    parser = argparse.ArgumentParser(description="Publish an ensemble of the stored base models.")
+    parser.add_argument("--method", choices=METHODS, default="inverse_error")
+    parser.add_argument("--models", nargs="*", default=None, help="Base models (default: all in the run)")
+    parser.add_argument("--window", type=int, default=None, help="Rolling residual window in days")
+    parser.add_argument("--alpha", type=float, default=1.0, help="Ridge shrinkage for --method stacked")
+    parser.add_argument("--run-id", default=None, help="Store run with the base models (default: latest)")
+    parser.add_argument("--no-publish", action="store_true")
+    args = parser.parse_args()
+
+    frame, meta = build_ensemble(args.run_id, args.method, args.models, args.window, args.alpha)
+    for coin, m in meta.items():
+        print(coin, m["weights"])
+    if args.no_publish:
+        return
+    register_many(ENSEMBLE_MODEL, meta)
+    run_id = publish_run(frame, description=f"Ensemble ({args.method}) of {', '.join(next(iter(meta.values()))['models'])}",
+                         base_run=args.run_id or "latest")
+    print(f"Published run {run_id}")
+
+
+if __name__ == "__main__":
+    main()
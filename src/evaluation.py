@@ -0,0 +1,350 @@
+# src/evaluation.py
+"""
+Vectorized model evaluation over aligned (coin x model x date) arrays.
+
+Two prediction sources are evaluated:
+ - "in_sample": models/{coin}_{model}_past_predictions.csv (one-step fitted values)
+ - "holdout":   data/forecasting/{coin}/actual_vs_predicted_{model}.csv
+                (multi-step forecasts from the train/test split, so the
+                 position in the test window is the forecast horizon)
+
+Every metric (MAE, RMSE, MAPE, R2, directional accuracy, MASE against the
+naive last-value forecast) is computed for all coins and models at once from
+masked arrays. Results are stored in one columnar file that the pages slice.
+When the forecast store has a published run, both sources are read from it
+("fitted" and "holdout" kinds) instead of the CSVs.
+
+Functions
+---------
+- load_in_sample(models_dir=None) -> AlignedPredictions
+- load_holdout(forecasting_dir=None) -> AlignedPredictions
+- load_stored(kind="fitted", run_id=None) -> AlignedPredictions
+- global_metrics(ap) -> pd.DataFrame
+- rolling_metrics(ap, window=30) -> pd.DataFrame
+- horizon_metrics(ap, horizons=HORIZON_BUCKETS) -> pd.DataFrame
+- evaluate_all(...) -> pd.DataFrame
+- load_metrics(scope="global", source="in_sample", symbol=None, model=None) -> pd.DataFrame
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parents[1]
+MODELS_DIR = PROJECT_ROOT / "models"
+FORECASTING_DIR = PROJECT_ROOT / "data" / "forecasting"
+METRICS_PATH = MODELS_DIR / "evaluation_metrics.parquet"
+LEGACY_RESULTS_PATH = MODELS_DIR / "evaluation_results.csv"
+
+PAST_PREDICTION_FILES = {
+    "Random Forest": ("rf_past_predictions", "rf_predicted_close"),
+    "ARIMA": ("arima_past_predictions", "arima_fitted_close"),
+    "LSTM": ("lstm_past_predictions", "lstm_predicted_close"),
+    "Prophet": ("prophet_past_predictions", "prophet_predicted_close"),
+}
+
+HOLDOUT_MODEL_NAMES = {
+    "xgb_or_rf": "Random Forest",
+    "arima": "ARIMA",
+    "lstm": "LSTM",
+    "prophet": "Prophet",
+}
+
+HORIZON_BUCKETS = [1, 7, 14, 30, 90, 180]
+
+METRIC_COLUMNS = ["MAE", "RMSE", "MAPE (%)", "R2", "Directional Accuracy (%)", "MASE", "N"]
+SOURCES = ("in_sample", "holdout")
+SCOPES = ("global", "rolling", "horizon")
+
+
+@dataclass
+class AlignedPredictions:
+    """actual: (coin x date), pred: (coin x model x date); NaN where missing."""
+    symbols: list
+    models: list
+    dates: pd.DatetimeIndex
+    actual: np.ndarray
+    pred: np.ndarray
+
+
+def _align(frames: dict) -> AlignedPredictions:
+    """frames: {(symbol, model): DataFrame[date, actual, pred]} -> aligned arrays."""
+    symbols = sorted({s for s, _ in frames})
+    models = [m for m in PAST_PREDICTION_FILES if any(fm == m for _, fm in frames)]
+    models += sorted({m for _, m in frames} - set(models))
+    dates = pd.DatetimeIndex(sorted(set().union(*(f["date"] for f in frames.values()))))
+
+    actual = np.full((len(symbols), len(dates)), np.nan)
+    pred = np.full((len(symbols), len(models), len(dates)), np.nan)
+    s_idx = {s: i for i, s in enumerate(symbols)}
+    m_idx = {m: i for i, m in enumerate(models)}
+    for (sym, model), f in frames.items():
+        cols = dates.get_indexer(f["date"])
+        i = s_idx[sym]
+        pred[i, m_idx[model], cols] = f["pred"].to_numpy(dtype=float)
+        known = np.isfinite(actual[i, cols])
+        actual[i, cols] = np.where(known, actual[i, cols], f["actual"].to_numpy(dtype=float))
+    return AlignedPredictions(symbols, models, dates, actual, pred)
+
+
+def load_in_sample(models_dir: str = None) -> AlignedPredictions:
+    """Load every *_past_predictions.csv into one aligned array."""
+    models_dir = Path(models_dir) if models_dir else MODELS_DIR
+    frames = {}
+    for model, (suffix, pred_col) in PAST_PREDICTION_FILES.items():
+        for path in sorted(models_dir.glob(f"*_{suffix}.csv")):
+            symbol = path.name[: -len(f"_{suffix}.csv")]
+            df = pd.read_csv(path, parse_dates=["Date"])
+            frames[(symbol, model)] = pd.DataFrame({
+                "date": df["Date"], "actual": df["Close"], "pred": df[pred_col],
+            })
+    if not frames:
+        raise FileNotFoundError(f"No *_past_predictions.csv files found in {models_dir}")
+    return _align(frames)
+
+
+def load_holdout(forecasting_dir: str = None) -> AlignedPredictions:
+    """Load every data/forecasting/{coin}/actual_vs_predicted_*.csv into one aligned array."""
+    forecasting_dir = Path(forecasting_dir) if forecasting_dir else FORECASTING_DIR
+    frames = {}
+    for path in sorted(forecasting_dir.glob("*/actual_vs_predicted_*.csv")):
+        key = path.stem.replace("actual_vs_predicted_", "")
+        model = HOLDOUT_MODEL_NAMES.get(key, key)
+        df = pd.read_csv(path, parse_dates=["date"])
+        frames[(path.parent.name, model)] = pd.DataFrame({
+            "date": df["date"], "actual": df["actual_close"], "pred": df["predicted_close"],
+        })
+    if not frames:
+        raise FileNotFoundError(f"No actual_vs_predicted_*.csv files found in {forecasting_dir}")
+    return _align(frames)
+
+
+def load_stored(kind: str = "fitted", run_id: Optional[str] = None) -> AlignedPredictions:
+    """Load one prediction kind ("fitted" or "holdout") from the forecast store."""
+    from src.forecast_store import read_forecasts
+
+    rows = read_forecasts(kind=[kind, "actual"], run_id=run_id)
+    actual = rows.loc[rows["kind"] == "actual", ["coin", "date", "value"]]
+    preds = rows[rows["kind"] == kind].merge(actual, on=["coin", "date"], how="left",
+                                             suffixes=("", "_actual"))
+    if preds.empty:
+        raise FileNotFoundError(f"No {kind!r} rows in forecast run {run_id or 'latest'}")
+    frames = {
+        (coin, model): pd.DataFrame({"date": g["date"], "actual": g["value_actual"], "pred": g["value"]})
+        for (coin, model), g in preds.groupby(["coin", "model"], sort=False)
+    }
+    return _align(frames)
+
+
+def _error_terms(ap: AlignedPredictions) -> dict:
+    """Element-wise error terms shared by every metric, masked to valid points."""
+    y = ap.actual[:, None, :]
+    yhat = ap.pred
+    valid = np.isfinite(y) & np.isfinite(yhat)
+    err = np.where(valid, yhat - y, 0.0)
+    denom = np.where(y == 0, 1.0, y)
+    prev = np.concatenate([np.full(ap.actual[:, :1].shape, np.nan), ap.actual[:, :-1]], axis=1)[:, None, :]
+    step = valid & np.isfinite(prev)
+    actual_move = np.where(step, y - prev, 0.0)
+    pred_move = np.where(step, yhat - prev, 0.0)
+    return {
+        "valid": valid,
+        "abs": np.abs(err),
+        "sq": err ** 2,
+        "ape": np.where(valid, np.abs(err / denom), 0.0),
+        "y": np.where(valid, y, 0.0),
+        "step": step,
+        "hit": step & (np.sign(actual_move) == np.sign(pred_move)),
+        "naive_abs": np.abs(actual_move),
+    }
+
+
+def _metrics_from_sums(n, s_abs, s_sq, s_ape, s_y, s_y2, n_step, s_hit, s_naive) -> dict:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n_f = np.where(n > 0, n, np.nan)
+        mae = s_abs / n_f
+        sst = s_y2 - s_y ** 2 / n_f
+        naive_mae = s_naive / np.where(n_step > 0, n_step, np.nan)
+        return {
+            "MAE": mae,
+            "RMSE": np.sqrt(s_sq / n_f),
+            "MAPE (%)": s_ape / n_f * 100,
+            "R2": 1 - s_sq / np.where(sst > 0, sst, np.nan),
+            "Directional Accuracy (%)": s_hit / np.where(n_step > 0, n_step, np.nan) * 100,
+            "MASE": mae / naive_mae,
+            "N": n,
+        }
+
+
+def _reduce(terms: dict, axis, sl=slice(None)) -> dict:
+    t = {k: v[..., sl] for k, v in terms.items()}
+    return _metrics_from_sums(
+        t["valid"].sum(axis=axis), t["abs"].sum(axis=axis), t["sq"].sum(axis=axis),
+        t["ape"].sum(axis=axis), t["y"].sum(axis=axis), (t["y"] ** 2).sum(axis=axis),
+        t["step"].sum(axis=axis), t["hit"].sum(axis=axis), t["naive_abs"].sum(axis=axis),
+    )
+
+
+def _to_frame(ap: AlignedPredictions, metrics: dict, **extra) -> pd.DataFrame:
+    sym, mod = np.meshgrid(np.arange(len(ap.symbols)), np.arange(len(ap.models)), indexing="ij")
+    out = pd.DataFrame({
+        "Symbol": np.array(ap.symbols)[sym.ravel()],
+        "Model": np.array(ap.models)[mod.ravel()],
+        **{k: np.asarray(v).ravel() for k, v in metrics.items()},
+        **extra,
+    })
+    return out[out["N"] > 0].reset_index(drop=True)
+
+
+def global_metrics(ap: AlignedPredictions) -> pd.DataFrame:
+    """One row per (symbol, model) over every valid date."""
+    return _to_frame(ap, _reduce(_error_terms(ap), axis=2))
+
+
+def rolling_metrics(ap: AlignedPredictions, window: int = 30, min_periods: int = None) -> pd.DataFrame:
+    """
+    Trailing-window metrics for every (symbol, model, date), computed from
+    cumulative sums along the date axis (one pass, no per-window loops).
+    """
+    min_periods = min_periods or max(1, window // 2)
+    terms = _error_terms(ap)
+    terms["y2"] = terms["y"] ** 2
+
+    hi = np.arange(1, ap.pred.shape[2] + 1)
+    lo = np.maximum(hi - window, 0)
+
+    def windowed(a):
+        c = np.concatenate([np.zeros(a.shape[:-1] + (1,)), np.cumsum(a, axis=-1)], axis=-1)
+        return c[..., hi] - c[..., lo]
+
+    metrics = _metrics_from_sums(
+        windowed(terms["valid"].astype(float)), windowed(terms["abs"]), windowed(terms["sq"]),
+        windowed(terms["ape"]), windowed(terms["y"]), windowed(terms["y2"]),
+        windowed(terms["step"].astype(float)), windowed(terms["hit"].astype(float)),
+        windowed(terms["naive_abs"]),
+    )
+    c, m, d = ap.pred.shape
+    sym = np.repeat(np.array(ap.symbols), m * d)
+    mod = np.tile(np.repeat(np.array(ap.models), d), c)
+    date = np.tile(ap.dates.to_numpy(), c * m)
+    out = pd.DataFrame({
+        "Symbol": sym, "Model": mod, "Date": date,
+        **{k: np.asarray(v).ravel() for k, v in metrics.items()},
+    })
+    return out[out["N"] >= min_periods].reset_index(drop=True)
+
+
+def horizon_metrics(ap: AlignedPredictions, horizons: list = None) -> pd.DataFrame:
+    """
+    Metrics per forecast-horizon bucket for multi-step holdout forecasts.
+    The horizon of a point is its position (1-based) from the first valid
+    date of each (symbol, model) series; bucket h covers (previous h, h].
+    """
+    horizons = horizons or HORIZON_BUCKETS
+    terms = _error_terms(ap)
+    # shift every series so index 0 is its forecast origin
+    first = np.argmax(terms["valid"], axis=2)
+    d = ap.pred.shape[2]
+    offsets = (np.arange(d)[None, None, :] + first[..., None])
+    inside = offsets < d
+    offsets = np.minimum(offsets, d - 1)
+    shifted = {
+        k: np.where(inside, np.take_along_axis(v, offsets, axis=2), 0)
+        for k, v in terms.items()
+    }
+    # the first step of a shifted series has no in-window previous actual
+    shifted["step"][..., 0] = False
+    shifted["hit"][..., 0] = False
+    shifted["naive_abs"][..., 0] = 0
+
+    frames, lo = [], 0
+    for h in horizons:
+        if lo >= d:
+            break
+        frames.append(_to_frame(ap, _reduce(shifted, axis=2, sl=slice(lo, h)), Horizon=h))
+        lo = h
+    return pd.concat(frames, ignore_index=True)
+
+
+def evaluate_all(models_dir: str = None, forecasting_dir: str = None, window: int = 30,
+                 out_path: str = None, legacy_path: str = None, run_id: str = None) -> pd.DataFrame:
+    """
+    Run every evaluation and write one columnar metrics file (plus the legacy
+    evaluation_results.csv consumed by older tooling). Reads the forecast store
+    unless explicit CSV directories are given or nothing has been published.
+    """
+    from src.forecast_store import latest_run_id
+
+    use_store = models_dir is None and forecasting_dir is None and latest_run_id() is not None
+    in_sample = load_stored("fitted", run_id) if use_store else load_in_sample(models_dir)
+    parts = [
+        global_metrics(in_sample).assign(source="in_sample", scope="global"),
+        rolling_metrics(in_sample, window=window).assign(source="in_sample", scope="rolling"),
+    ]
+    try:
+        holdout = load_stored("holdout", run_id) if use_store else load_holdout(forecasting_dir)
+    except FileNotFoundError:
+        holdout = None
+    if holdout is not None:
+        parts += [
+            global_metrics(holdout).assign(source="holdout", scope="global"),
+            rolling_metrics(holdout, window=window).assign(source="holdout", scope="rolling"),
+            horizon_metrics(holdout).assign(source="holdout", scope="horizon"),
+        ]
+    metrics = pd.concat(parts, ignore_index=True)
+    metrics = metrics[["source", "scope", "Symbol", "Model", "Date", "Horizon"] + METRIC_COLUMNS]
+    metrics["Horizon"] = metrics["Horizon"].fillna(0).astype("int16")
+    metrics["N"] = metrics["N"].astype("int32")
+
+    out = Path(out_path) if out_path else METRICS_PATH
+    out.parent.mkdir(parents=True, exist_ok=True)
+    metrics.to_parquet(out, index=False)
+
+    legacy = metrics[(metrics["source"] == "in_sample") & (metrics["scope"] == "global")]
+    legacy[["Symbol", "Model", "MAE", "RMSE", "MAPE (%)", "R2"]].to_csv(
+        Path(legacy_path) if legacy_path else LEGACY_RESULTS_PATH, index=False
+    )
+    return metrics
+
+
+def load_metrics(scope: str = "global", source: str = "in_sample", symbol: Optional[str] = None,
+                 model: Optional[str] = None, path: str = None) -> pd.DataFrame:
+    """Read a slice of the stored metrics without loading or recomputing the rest."""
+    if scope not in SCOPES:
+        raise ValueError(f"Invalid scope: {scope!r} ({', '.join(SCOPES)})")
+    if source not in SOURCES:
+        raise ValueError(f"Invalid source: {source!r} ({' or '.join(SOURCES)})")
+    path = Path(path) if path else METRICS_PATH
+    if not path.exists():
+        raise FileNotFoundError(f"Evaluation metrics not found: {path}")
+    filters = [("scope", "==", scope), ("source", "==", source)]
+    if symbol is not None:
+        filters.append(("Symbol", "==", symbol))
+    if model is not None:
+        filters.append(("Model", "==", model))
+    df = pd.read_parquet(path, filters=filters)
+    keep = [c for c in df.columns if c not in ("source", "scope")]
+    if scope != "rolling":
+        keep.remove("Date")
+    if scope != "horizon":
+        keep.remove("Horizon")
+    return df[keep].reset_index(drop=True)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Evaluate every stored model prediction.")
+    parser.add_argument("--window", type=int, default=30, help="Rolling window (days)")
+    parser.add_argument("--run-id", default=None, help="Forecast store run (default: latest)")
+    args = parser.parse_args()
+
+    metrics = evaluate_all(window=args.window, run_id=args.run_id)
+    print(metrics[metrics["scope"] == "global"].drop(columns=["Date", "Horizon"]).to_string(index=False))
+    print(f"\nSaved {len(metrics)} metric rows → {METRICS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# src/features.py
+"""
+Vectorized feature engineering shared by the clustering and forecasting code.
+
+Mirrors the notebook feature cell (returns, lags, rolling windows, RSI, ATR,
+MACD, drawdown, volume means, next-day targets) but computes everything with
+grouped rolling / ewm operations instead of per-group lambdas.
+
+Functions
+---------
+- add_features(df) -> pd.DataFrame
+- clean_features(df, warmup=30) -> pd.DataFrame
+- FEATURE_COLUMNS, TARGET_COLUMNS
+"""
+
+import numpy as np
+import pandas as pd
+
+ROLL_WINDOWS = [7, 14, 21]
+TARGET_COLUMNS = ["target_next_close", "target_next_pct"]
+
+
+def _grouped_rolling(grp, col: str, window: int, how: str, **kwargs) -> pd.Series:
+    roll = grp[col].rolling(window=window, min_periods=1)
+    return getattr(roll, how)(**kwargs).reset_index(level=0, drop=True)
+
+
+def add_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add engineered features to a long OHLCV frame (lowercase columns).
+    Returns a new frame sorted by (symbol, date) with a fresh RangeIndex.
+    Lags, returns and windows count rows, so callers pass the shared calendar
+    (`aligned(df).long()`) to keep them from spanning gaps.
+    """
+    df = df.sort_values(["symbol", "date"]).reset_index(drop=True)
+    for col in ["open", "high", "low", "close", "volume"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    grp = df.groupby("symbol", sort=False)
+
+    df["pct_change"] = grp["close"].pct_change()
+    df["log_return"] = np.log(df["close"]).groupby(df["symbol"], sort=False).diff()
+
+    df["lag_1"] = grp["close"].shift(1)
+    df["lag_7"] = grp["close"].shift(7)
+
+    for w in ROLL_WINDOWS:
+        df[f"roll_mean_{w}"] = _grouped_rolling(grp, "close", w, "mean")
+        df[f"roll_std_{w}"] = _grouped_rolling(grp, "close", w, "std", ddof=0).fillna(0)
+        df[f"roll_max_{w}"] = _grouped_rolling(grp, "close", w, "max")
+        df[f"roll_min_{w}"] = _grouped_rolling(grp, "close", w, "min")
+        df[f"volatility_{w}"] = _grouped_rolling(grp, "pct_change", w, "std").fillna(0) * np.sqrt(252)
+
+    # RSI(14) from grouped rolling means of gains / losses
+    delta = grp["close"].diff()
+    gains = delta.clip(lower=0).groupby(df["symbol"], sort=False)
+    losses = (-delta).clip(lower=0).groupby(df["symbol"], sort=False)
+    ma_up = gains.rolling(14, min_periods=1).mean().reset_index(level=0, drop=True)
+    ma_down = losses.rolling(14, min_periods=1).mean().reset_index(level=0, drop=True)
+    df["rsi_14"] = 100 - (100 / (1 + ma_up / (ma_down + 1e-12)))
+
+    # ATR(14)
+    prev_close = grp["close"].shift(1)
+    true_range = pd.concat([
+        df["high"] - df["low"],
+        (df["high"] - prev_close).abs(),
+        (df["low"] - prev_close).abs(),
+    ], axis=1).max(axis=1)
+    df["atr_14"] = (
+        true_range.groupby(df["symbol"], sort=False)
+        .rolling(14, min_periods=1).mean()
+        .reset_index(level=0, drop=True)
+    )
+
+    # MACD(12, 26, 9)
+    ema_fast = grp["close"].ewm(span=12, adjust=False).mean().reset_index(level=0, drop=True)
+    ema_slow = grp["close"].ewm(span=26, adjust=False).mean().reset_index(level=0, drop=True)
+    df["macd"] = ema_fast - ema_slow
+    df["macd_signal"] = (
+        df.groupby("symbol", sort=False)["macd"]
+        .ewm(span=9, adjust=False).mean()
+        .reset_index(level=0, drop=True)
+    )
+    df["macd_hist"] = df["macd"] - df["macd_signal"]
+
+    # 30-day rolling max drawdown
+    roll_max = _grouped_rolling(grp, "close", 30, "max")
+    df["_dd"] = df["close"] / roll_max - 1
+    df["drawdown_30"] = (
+        df.groupby("symbol", sort=False)["_dd"]
+        .rolling(30, min_periods=1).min()
+        .reset_index(level=0, drop=True)
+    )
+    df = df.drop(columns="_dd")
+
+    df["vol_mean_7"] = _grouped_rolling(grp, "volume", 7, "mean")
+    df["vol_mean_21"] = _grouped_rolling(grp, "volume", 21, "mean")
+
+    df["target_next_close"] = grp["close"].shift(-1)
+    df["target_next_pct"] = df["target_next_close"] / df["close"] - 1
+
+    return df.replace([np.inf, -np.inf], np.nan)
+
+
+def clean_features(df: pd.DataFrame, warmup: int = 30) -> pd.DataFrame:
+    """
+    Drop the rolling-window warm-up rows and the last row (no next-day target)
+    of every symbol, then any remaining incomplete rows.
+    """
+    row_num = df.groupby("symbol").cumcount()
+    max_row = df.groupby("symbol")["date"].transform("size") - 1
+    out = df[(row_num >= warmup) & (row_num != max_row)].copy()
+    out["volatility_21"] = out.groupby("symbol")["volatility_21"].ffill()
+    return out.dropna().reset_index(drop=True)
+
+
+FEATURE_COLUMNS = [
+    "open", "high", "low", "close", "volume", "pct_change", "log_return", "lag_1", "lag_7",
+    *[f"{kind}_{w}" for w in ROLL_WINDOWS
+      for kind in ("roll_mean", "roll_std", "roll_max", "roll_min", "volatility")],
+    "rsi_14", "atr_14", "macd", "macd_signal", "macd_hist", "drawdown_30",
+    "vol_mean_7", "vol_mean_21",
+]
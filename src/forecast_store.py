@@ -0,0 +1,427 @@
+# src/forecast_store.py
+"""
+Columnar forecast store: one Parquet dataset instead of per-coin/per-model CSVs.
+
+Layout (under models/store/):
+ - runs.parquet                          versioned run table
+ - forecasts/run_id=<id>/part-0.parquet  rows (coin, model, kind, date, day_number, value)
+
+Kinds: "actual" (model "Actual"), "fitted" (one-step past predictions),
+"holdout" (multi-step test-window predictions), "forecast" (point forecast)
+and "forecast_pXX" quantiles. Publishing writes the run into
+a hidden temp directory, renames it into place and only then appends it to
+the run table, so readers never see a half-written run. Publishers take a
+file lock (models/store/.runs.lock) for the whole publish, so trainers
+publishing at once neither drop each other's run table entries nor miss
+each other's series in the carried-over base run. Published runs
+are immutable, so preload_run can keep whole runs in memory; reads of a
+preloaded run are filtered in memory instead of going back to Parquet.
+
+Functions
+---------
+- publish_run(frame, description="", base_run="latest") -> str
+- list_runs() -> pd.DataFrame
+- latest_run_id() -> Optional[str]
+- read_forecasts(coin=None, model=None, kind=None, run_id=None) -> pd.DataFrame
+- preload_run(run_id=None) -> str
+- past_frame(coin, model, run_id=None) -> pd.DataFrame       (Date, Close, Predicted_Close)
+- forecast_frame(coin, model, run_id=None) -> pd.DataFrame   (Date, Day_Number, Forecast_Close[, pXX])
+- available_series(run_id=None) -> pd.DataFrame               (coin, model)
+- store_rows(coin, model, kind, dates, values, day_number=None) -> pd.DataFrame
+- import_legacy(models_dir=None, forecasting_dir=None, quantiles=True) -> pd.DataFrame
+"""
+
+import hashlib
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parents[1]
+STORE_DIR = PROJECT_ROOT / "models" / "store"
+LEGACY_MODELS_DIR = PROJECT_ROOT / "models"
+LEGACY_FORECASTING_DIR = PROJECT_ROOT / "data" / "forecasting"
+
+STORE_COLUMNS = ["run_id", "coin", "model", "kind", "date", "day_number", "value"]
+ACTUAL_MODEL = "Actual"
+ENSEMBLE_MODEL = "Ensemble"
+MAX_PRELOADED_RUNS = 2
+
+# (store_dir, run_id) -> whole run, see preload_run
+_preloaded = {}
+
+# display name -> legacy models/ file prefix and prediction column
+LEGACY_MODELS = {
+    "Random Forest": ("rf", "rf_predicted_close"),
+    "ARIMA": ("arima", "arima_fitted_close"),
+    "LSTM": ("lstm", "lstm_predicted_close"),
+    "Prophet": ("prophet", "prophet_predicted_close"),
+}
+
+# data/forecasting/{coin}/actual_vs_predicted_<key>.csv -> display name
+LEGACY_HOLDOUT_MODELS = {
+    "xgb_or_rf": "Random Forest",
+    "arima": "ARIMA",
+    "lstm": "LSTM",
+    "prophet": "Prophet",
+}
+# legacy models whose fitted values are genuine one-step predictions (bands bootstrapped from them)
+ONE_STEP_MODELS = ("ARIMA",)
+
+
+def _runs_path(store_dir: Path) -> Path:
+    return store_dir / "runs.parquet"
+
+
+def _run_dir(store_dir: Path, run_id: str) -> Path:
+    return store_dir / "forecasts" / f"run_id={run_id}"
+
+
+@contextmanager
+def _publish_lock(store_dir: Path):
+    """Exclusive lock on the store's run table, across processes and threads."""
+    store_dir.mkdir(parents=True, exist_ok=True)
+    with open(store_dir / ".runs.lock", "a+b") as fh:
+        if os.name == "nt":
+            import msvcrt
+
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after ~10s; keep waiting
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _atomic_write_parquet(df: pd.DataFrame, path: Path) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def store_rows(coin: str, model: str, kind: str, dates, values,
+               day_number: Optional[Sequence[int]] = None) -> pd.DataFrame:
+    """Build store-format rows (without run_id) for one coin/model/kind series."""
+    dates = pd.to_datetime(pd.Series(dates)).reset_index(drop=True)
+    values = np.asarray(values, dtype=float)
+    if day_number is None:
+        day_number = np.zeros(len(values), dtype=int)
+    return pd.DataFrame({
+        "coin": coin,
+        "model": model,
+        "kind": kind,
+        "date": dates,
+        "day_number": np.asarray(day_number, dtype=int),
+        "value": values,
+    })
+
+
+def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+    missing = set(STORE_COLUMNS) - {"run_id"} - set(frame.columns)
+    if missing:
+        raise ValueError(f"Forecast frame missing columns: {missing}")
+    out = frame[[c for c in STORE_COLUMNS if c != "run_id"]].copy()
+    out["date"] = pd.to_datetime(out["date"])
+    out["day_number"] = out["day_number"].fillna(0).astype("int16")
+    out["value"] = out["value"].astype("float64")
+    for col in ["coin", "model", "kind"]:
+        out[col] = out[col].astype(str)
+    return out.sort_values(["coin", "model", "kind", "date"]).reset_index(drop=True)
+
+
+def list_runs(store_dir: str = None) -> pd.DataFrame:
+    """Return the run table (oldest first); empty if nothing was published yet."""
+    store_dir = Path(store_dir) if store_dir else STORE_DIR
+    path = _runs_path(store_dir)
+    if not path.exists():
+        return pd.DataFrame(columns=["run_id", "created_at", "description", "base_run", "n_rows"])
+    return pd.read_parquet(path)
+
+
+def latest_run_id(store_dir: str = None) -> Optional[str]:
+    runs = list_runs(store_dir)
+    return None if runs.empty else str(runs["run_id"].iloc[-1])
+
+
+def publish_run(frame: pd.DataFrame, description: str = "", base_run: Optional[str] = "latest",
+                store_dir: str = None) -> str:
+    """
+    Atomically publish a new run and return its run_id.
+
+    Series (coin, model, kind) already present in base_run but absent from
+    frame are carried over, so retraining a single model produces a complete run.
+    Pass base_run=None to publish the frame on its own.
+    """
+    store_dir = Path(store_dir) if store_dir else STORE_DIR
+    new = _normalize(frame)
+    with _publish_lock(store_dir):
+        return _publish_locked(new, description, base_run, store_dir)
+
+
+def _publish_locked(new: pd.DataFrame, description: str, base_run: Optional[str], store_dir: Path) -> str:
+    base_id = latest_run_id(store_dir) if base_run == "latest" else base_run
+    if base_id is not None:
+        base = read_forecasts(run_id=base_id, store_dir=store_dir).drop(columns="run_id")
+        key = ["coin", "model", "kind"]
+        replaced = pd.MultiIndex.from_frame(new[key].drop_duplicates())
+        keep = ~pd.MultiIndex.from_frame(base[key]).isin(replaced)
+        new = _normalize(pd.concat([base[keep], new], ignore_index=True))
+
+    created = datetime.now(timezone.utc)
+    digest = hashlib.sha1(pd.util.hash_pandas_object(new, index=False).to_numpy().tobytes()).hexdigest()
+    run_id = f"{created:%Y%m%dT%H%M%S}-{digest[:8]}"
+
+    final_dir = _run_dir(store_dir, run_id)
+    tmp_dir = final_dir.with_name(f".tmp-{run_id}")
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        new.to_parquet(tmp_dir / "part-0.parquet", index=False, row_group_size=50_000)
+        os.replace(tmp_dir, final_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    runs = list_runs(store_dir)
+    entry = pd.DataFrame([{
+        "run_id": run_id,
+        "created_at": pd.Timestamp(created),
+        "description": description,
+        "base_run": base_id or "",
+        "n_rows": len(new),
+    }])
+    runs = entry if runs.empty else pd.concat([runs, entry], ignore_index=True)
+    _atomic_write_parquet(runs, _runs_path(store_dir))
+    return run_id
+
+
+def _as_filter(col: str, value) -> tuple:
+    if isinstance(value, (list, tuple, set)):
+        return (col, "in", list(value))
+    return (col, "==", value)
+
+
+def read_forecasts(coin: Union[str, Sequence[str], None] = None,
+                   model: Union[str, Sequence[str], None] = None,
+                   kind: Union[str, Sequence[str], None] = None,
+                   run_id: Union[str, Sequence[str], None] = None,
+                   store_dir: str = None) -> pd.DataFrame:
+    """
+    Filtered read of the store. run_id=None reads the latest published run,
+    run_id="all" every published run; filters are pushed down to Parquet.
+    """
+    store_dir = Path(store_dir) if store_dir else STORE_DIR
+    if run_id is None or run_id == "all":
+        runs = list_runs(store_dir)
+        if runs.empty:
+            raise FileNotFoundError(f"No forecast runs published under {store_dir}")
+        all_ids = runs["run_id"].astype(str).tolist()
+        run_ids = all_ids[-1:] if run_id is None else all_ids
+    else:
+        run_ids = [run_id] if isinstance(run_id, str) else list(run_id)
+
+    filters = [_as_filter(c, v) for c, v in (("coin", coin), ("model", model), ("kind", kind))
+               if v is not None]
+    parts = []
+    for rid in run_ids:
+        cached = _preloaded.get((str(store_dir), rid))
+        if cached is not None:
+            part = _filter_frame(cached, filters)
+        else:
+            path = _run_dir(store_dir, rid) / "part-0.parquet"
+            if not path.exists():
+                raise FileNotFoundError(f"Forecast run not found: {rid}")
+            part = pd.read_parquet(path, filters=filters or None)
+        part.insert(0, "run_id", rid)
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+def _filter_frame(frame: pd.DataFrame, filters: list) -> pd.DataFrame:
+    """Apply read_forecasts filters to an in-memory run (always returns a copy)."""
+    mask = np.ones(len(frame), dtype=bool)
+    for col, op, value in filters:
+        mask &= frame[col].isin(value).to_numpy() if op == "in" else (frame[col] == value).to_numpy()
+    return frame[mask].reset_index(drop=True)
+
+
+def preload_run(run_id: str = None, store_dir: str = None) -> str:
+    """
+    Keep a whole run (default: the latest) in memory for this process so
+    later reads of it skip Parquet. Returns the run_id; at most
+    MAX_PRELOADED_RUNS runs are kept (oldest dropped first).
+    """
+    store_dir = Path(store_dir) if store_dir else STORE_DIR
+    run_id = run_id or latest_run_id(store_dir)
+    if run_id is None:
+        raise FileNotFoundError(f"No forecast runs published under {store_dir}")
+    key = (str(store_dir), run_id)
+    if key not in _preloaded:
+        path = _run_dir(store_dir, run_id) / "part-0.parquet"
+        if not path.exists():
+            raise FileNotFoundError(f"Forecast run not found: {run_id}")
+        frame = pd.read_parquet(path)
+        while len(_preloaded) >= MAX_PRELOADED_RUNS:
+            _preloaded.pop(next(iter(_preloaded)))
+        _preloaded[key] = frame
+    return run_id
+
+
+def past_frame(coin: str, model: str, run_id: str = None, store_dir: str = None) -> pd.DataFrame:
+    """Actual close joined with a model's fitted values: Date, Close, Predicted_Close."""
+    rows = read_forecasts(coin=coin, model=[model, ACTUAL_MODEL], kind=["actual", "fitted"],
+                          run_id=run_id, store_dir=store_dir)
+    wide = rows.pivot_table(index="date", columns="kind", values="value")
+    if "fitted" not in wide.columns:
+        return pd.DataFrame(columns=["Date", "Close", "Predicted_Close"])
+    wide = wide.dropna(subset=["fitted"]).reset_index()
+    return pd.DataFrame({
+        "Date": wide["date"],
+        "Close": wide.get("actual"),
+        "Predicted_Close": wide["fitted"],
+    })
+
+
+def forecast_frame(coin: str, model: str, run_id: str = None, store_dir: str = None) -> pd.DataFrame:
+    """Point forecast plus any stored quantiles: Date, Day_Number, Forecast_Close[, pXX...]."""
+    rows = read_forecasts(coin=coin, model=model, run_id=run_id, store_dir=store_dir)
+    rows = rows[rows["kind"].str.startswith("forecast")]
+    if rows.empty:
+        return pd.DataFrame(columns=["Date", "Day_Number", "Forecast_Close"])
+    wide = rows.pivot_table(index=["date", "day_number"], columns="kind", values="value").reset_index()
+    wide = wide.rename(columns={"date": "Date", "day_number": "Day_Number", "forecast": "Forecast_Close"})
+    wide.columns = [c.replace("forecast_", "") for c in wide.columns]
+    wide.columns.name = None
+    return wide.sort_values("Day_Number").reset_index(drop=True)
+
+
+def available_series(run_id: str = None, store_dir: str = None) -> pd.DataFrame:
+    """
+    (coin, model) pairs that have a point forecast in the run, lowest holdout
+    MAPE first (so the first model of a coin is the pages' default). Coins
+    without holdout rows rank each model by its median holdout MAPE over the
+    other coins; models without any holdout rows come last, known models first.
+    """
+    rows = read_forecasts(kind=["forecast", "holdout", "actual"], run_id=run_id, store_dir=store_dir)
+    pairs = rows.loc[rows["kind"] == "forecast", ["coin", "model"]].drop_duplicates()
+    actual = rows.loc[rows["kind"] == "actual", ["coin", "date", "value"]]
+    hold = rows[rows["kind"] == "holdout"].merge(actual, on=["coin", "date"], suffixes=("", "_actual"))
+    ape = (hold["value"] - hold["value_actual"]).abs() / hold["value_actual"]
+    mape = ape.groupby([hold["coin"], hold["model"]]).mean()
+    pooled = mape.groupby(level="model").median()
+    own = pd.Series(mape.reindex(pd.MultiIndex.from_frame(pairs)).to_numpy(), index=pairs.index)
+    score = own.fillna(pairs["model"].map(pooled)).fillna(np.inf)
+    order = {m: i for i, m in enumerate([*LEGACY_MODELS, ENSEMBLE_MODEL])}
+    rank = pairs["model"].map(order).fillna(len(order))
+    return pairs.assign(_score=score, _rank=rank).sort_values(["coin", "_score", "_rank", "model"]) \
+        .drop(columns=["_score", "_rank"]).reset_index(drop=True)
+
+
+def import_legacy(models_dir: str = None, forecasting_dir: str = None, quantiles: bool = True) -> pd.DataFrame:
+    """
+    Convert the legacy CSV artifacts to store rows:
+     - models/{coin}_{model}_past_predictions.csv        -> "fitted" (+ "actual")
+     - models/{coin}_{model}_forecast_next_6_months.csv  -> "forecast"
+       (+ "forecast_pXX" when quantiles=True, see below)
+     - data/forecasting/{coin}/actual_vs_predicted_*.csv -> "holdout" (+ "actual")
+
+    Quantiles of the one-step models (ONE_STEP_MODELS) are bootstrapped from
+    their fitted residuals. The other models' fitted values are in-sample
+    (Random Forest, LSTM) or a smooth fit whose residuals are far from
+    independent (Prophet), so their bands are lognormal with the scale of
+    their h-step holdout errors (src.forecasting.horizon_log_scale); coins
+    without a holdout window get a random-walk band from the volatility of
+    their daily log returns.
+    """
+    from src.forecasting import (QUANTILES, bootstrap_quantiles, horizon_log_scale, log_residuals,
+                                 lognormal_quantiles, quantile_kind)
+
+    models_dir = Path(models_dir) if models_dir else LEGACY_MODELS_DIR
+    forecasting_dir = Path(forecasting_dir) if forecasting_dir else LEGACY_FORECASTING_DIR
+    parts, actuals, scales = [], [], {}
+    for path in sorted(forecasting_dir.glob("*/actual_vs_predicted_*.csv")):
+        coin = path.parent.name
+        key = path.stem.replace("actual_vs_predicted_", "")
+        model = LEGACY_HOLDOUT_MODELS.get(key, key)
+        hold = pd.read_csv(path, parse_dates=["date"])
+        # day_number is the step into the test window, i.e. the forecast horizon
+        horizons = np.arange(1, len(hold) + 1)
+        parts.append(store_rows(coin, model, "holdout", hold["date"], hold["predicted_close"], horizons))
+        actuals.append(pd.DataFrame({"coin": coin, "date": hold["date"], "value": hold["actual_close"]}))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            errors = np.log(hold["actual_close"].to_numpy() / hold["predicted_close"].to_numpy())
+        if np.isfinite(errors).any():
+            scales[(coin, model)] = horizon_log_scale(errors, horizons)
+
+    for model, (prefix, pred_col) in LEGACY_MODELS.items():
+        for past_path in sorted(models_dir.glob(f"*_{prefix}_past_predictions.csv")):
+            coin = past_path.name[: -len(f"_{prefix}_past_predictions.csv")]
+            past = pd.read_csv(past_path, parse_dates=["Date"])
+            parts.append(store_rows(coin, model, "fitted", past["Date"], past[pred_col]))
+            actuals.append(pd.DataFrame({"coin": coin, "date": past["Date"], "value": past["Close"]}))
+
+            fc_path = models_dir / f"{coin}_{prefix}_forecast_next_6_months.csv"
+            if fc_path.exists():
+                fc = pd.read_csv(fc_path, parse_dates=["Date"])
+                parts.append(store_rows(coin, model, "forecast", fc["Date"], fc["Forecast_Close"],
+                                        fc["Day_Number"]))
+                if quantiles:
+                    close = past.set_index("Date")["Close"]
+                    if model in ONE_STEP_MODELS:
+                        bands = bootstrap_quantiles(fc["Forecast_Close"].to_numpy(),
+                                                    log_residuals(close, past.set_index("Date")[pred_col]))
+                    else:
+                        scale = scales.get((coin, model))
+                        if scale is None:
+                            scale = np.log(close[close > 0]).diff().std()
+                        bands = lognormal_quantiles(fc["Forecast_Close"].to_numpy(),
+                                                    scale * np.sqrt(fc["Day_Number"].to_numpy()))
+                    for q, values in zip(QUANTILES, bands.T):
+                        parts.append(store_rows(coin, model, quantile_kind(q), fc["Date"], values,
+                                                fc["Day_Number"]))
+
+    if not parts:
+        raise FileNotFoundError(f"No legacy forecast CSVs found in {models_dir} or {forecasting_dir}")
+    actual = pd.concat(actuals).drop_duplicates(["coin", "date"]).sort_values(["coin", "date"])
+    for coin, g in actual.groupby("coin"):
+        parts.append(store_rows(coin, ACTUAL_MODEL, "actual", g["date"], g["value"]))
+    return pd.concat(parts, ignore_index=True)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the columnar forecast store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import-legacy", help="Publish a run from the legacy CSV artifacts")
+    imp.add_argument("--description", default="Imported from legacy CSV artifacts")
+    imp.add_argument("--no-quantiles", action="store_true", help="Point forecasts only")
+    sub.add_parser("list", help="List published runs")
+    args = parser.parse_args()
+
+    if args.command == "import-legacy":
+        run_id = publish_run(import_legacy(quantiles=not args.no_quantiles), description=args.description, base_run=None)
+        print(f"Published run {run_id} → {STORE_DIR}")
+    else:
+        print(list_runs().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# src/forecasting.py
+"""
+Helpers shared by the model trainers (ARIMA, Prophet, global models, LSTM).
+
+Training windows mirror the notebook: each symbol's history minus the
+30-day feature warm-up and the final row (no next-day target), on the
+shared daily calendar (src.alignment, linearly interpolated gaps). Trainer output is converted to
+forecast store rows so every model publishes the same way, optionally with
+quantile forecasts ("forecast_pXX" kinds) next to the point forecast.
+
+Functions
+---------
+- representative_coins(path=None) -> list[str]
+- daily_close(df, symbol, warmup=30, calendar=None) -> pd.Series
+- future_dates(last_date, steps=FORECAST_DAYS) -> pd.DatetimeIndex
+- quantile_kind(q) -> str
+- normal_quantiles(mean, std, quantiles=QUANTILES) -> np.ndarray
+- lognormal_quantiles(median, log_std, quantiles=QUANTILES) -> np.ndarray
+- horizon_log_scale(errors, horizons) -> float
+- log_residuals(close, fitted) -> np.ndarray
+- bootstrap_quantiles(forecast, residuals, quantiles=QUANTILES, n_paths=1000, seed=0) -> np.ndarray
+- to_store_frame(coin, model, close, fitted=None, forecast=None, quantiles=None) -> pd.DataFrame
+"""
+
+from pathlib import Path
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+from src.alignment import Calendar, aligned
+from src.forecast_store import ACTUAL_MODEL, store_rows
+
+PROJECT_ROOT = Path(__file__).parents[1]
+REPRESENTATIVES_PATH = PROJECT_ROOT / "data" / "EDA" / "clustering" / "cluster_representatives.csv"
+FORECAST_DAYS = 180
+WARMUP_DAYS = 30
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+# forecast bands of the global models come from out-of-sample residuals of walk-forward
+# folds: HOLDOUT_FOLDS consecutive windows of HOLDOUT_DAYS at the end of the training period,
+# each predicted by a model fit only on the data before it
+HOLDOUT_DAYS = 90
+HOLDOUT_FOLDS = 4
+# fewer held-out residuals than this: use the ones pooled over all coins
+MIN_RESIDUALS = 30
+
+
+def representative_coins(path: str = None) -> list:
+    """Cluster representative coins (the notebook's forecasting universe)."""
+    path = Path(path) if path else REPRESENTATIVES_PATH
+    if not path.exists():
+        raise FileNotFoundError(f"Cluster representatives not found: {path}")
+    return pd.read_csv(path)["representative_coin"].drop_duplicates().tolist()
+
+
+def daily_close(df: pd.DataFrame, symbol: str, warmup: int = WARMUP_DAYS,
+                calendar: Optional[Calendar] = None) -> pd.Series:
+    """
+    Close series of one symbol (long frame, lowercase columns) on the shared
+    daily calendar, trimmed like the notebook's cleaned feature frame. Pass
+    `calendar` (aligned(df)) when looping over symbols to skip the lookup.
+    """
+    calendar = calendar if calendar is not None else aligned(df)
+    j = calendar.column(symbol)
+    rows = np.flatnonzero(calendar.valid[:, j])
+    if len(rows) == 0:
+        raise ValueError(f"Symbol not found: {symbol}")
+    rows = rows[warmup:-1] if len(rows) > warmup + 1 else rows
+    span = slice(rows[0], rows[-1] + 1)
+    return pd.Series(calendar.values["close"][span, j].copy(), index=calendar.dates[span], name=symbol)
+
+
+def future_dates(last_date, steps: int = FORECAST_DAYS) -> pd.DatetimeIndex:
+    return pd.date_range(pd.Timestamp(last_date) + pd.Timedelta(days=1), periods=steps, freq="D")
+
+
+def quantile_kind(q: float) -> str:
+    """Store kind of a forecast quantile, e.g. 0.05 -> "forecast_p05"."""
+    return f"forecast_p{int(round(q * 100)):02d}"
+
+
+def normal_quantiles(mean: np.ndarray, std: np.ndarray, quantiles: list = QUANTILES) -> np.ndarray:
+    """(steps x quantiles) Gaussian quantiles for every horizon at once."""
+    from scipy.stats import norm
+
+    z = norm.ppf(np.asarray(quantiles, dtype=float))
+    return np.asarray(mean, dtype=float)[:, None] + np.asarray(std, dtype=float)[:, None] * z[None, :]
+
+
+def lognormal_quantiles(median: np.ndarray, log_std: np.ndarray, quantiles: list = QUANTILES) -> np.ndarray:
+    """(steps x quantiles) price quantiles median * exp(z * log_std): always positive, median = point forecast."""
+    from scipy.stats import norm
+
+    z = norm.ppf(np.asarray(quantiles, dtype=float))
+    return np.asarray(median, dtype=float)[:, None] * np.exp(np.asarray(log_std, dtype=float)[:, None] * z[None, :])
+
+
+def horizon_log_scale(errors: np.ndarray, horizons: np.ndarray) -> float:
+    """
+    Per-step log scale of h-step forecast errors log(actual / forecast),
+    assuming their variance grows linearly with the horizon:
+    sqrt(mean(e_h^2 / h)). The bias is kept, so a forecast that drifted off
+    over the test window gets wide bands.
+    """
+    errors, horizons = np.asarray(errors, dtype=float), np.asarray(horizons, dtype=float)
+    ok = np.isfinite(errors) & (horizons > 0)
+    if not ok.any():
+        raise ValueError("No h-step errors to scale from")
+    return float(np.sqrt(np.mean(errors[ok] ** 2 / horizons[ok])))
+
+
+def log_residuals(close: pd.Series, fitted: pd.Series) -> np.ndarray:
+    """One-step log errors log(actual / fitted) on the dates both series cover."""
+    pair = pd.concat([close, fitted], axis=1, join="inner").dropna()
+    pair = pair[(pair.iloc[:, 0] > 0) & (pair.iloc[:, 1] > 0)]
+    return np.log(pair.iloc[:, 0] / pair.iloc[:, 1]).to_numpy()
+
+
+def bootstrap_quantiles(forecast: np.ndarray, residuals: np.ndarray, quantiles: list = QUANTILES,
+                        n_paths: int = 1000, seed: int = 0) -> np.ndarray:
+    """
+    (steps x quantiles) price quantiles around a point forecast from
+    resampled one-step log residuals: every path draws all horizons at once,
+    cumulative sums give the h-step error and one np.quantile call reduces
+    all horizons. Residuals are centred so the point forecast stays the median.
+    """
+    forecast = np.asarray(forecast, dtype=float)
+    residuals = np.asarray(residuals, dtype=float)
+    residuals = residuals[np.isfinite(residuals)]
+    if residuals.size == 0:
+        raise ValueError("No residuals to bootstrap from")
+    rng = np.random.default_rng(seed)
+    draws = rng.choice(residuals - residuals.mean(), size=(n_paths, len(forecast)))
+    spread = np.quantile(draws.cumsum(axis=1), quantiles, axis=0).T
+    return forecast[:, None] * np.exp(spread)
+
+
+def to_store_frame(coin: str, model: str, close: pd.Series, fitted: Optional[pd.Series] = None,
+                   forecast: Optional[np.ndarray] = None,
+                   quantiles: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Actual, fitted, point-forecast and (optionally) quantile rows of one
+    coin/model in forecast store format. `quantiles` is (steps x len(QUANTILES)).
+    """
+    parts = [store_rows(coin, ACTUAL_MODEL, "actual", close.index, close.to_numpy())]
+    if fitted is not None:
+        fitted = fitted.dropna()
+        parts.append(store_rows(coin, model, "fitted", fitted.index, fitted.to_numpy()))
+    if forecast is not None:
+        forecast = np.asarray(forecast, dtype=float)
+        steps = len(forecast)
+        dates = future_dates(close.index[-1], steps)
+        parts.append(store_rows(coin, model, "forecast", dates, forecast, np.arange(1, steps + 1)))
+        if quantiles is not None:
+            for q, values in zip(QUANTILES, np.asarray(quantiles, dtype=float).T):
+                parts.append(store_rows(coin, model, quantile_kind(q), dates, values, np.arange(1, steps + 1)))
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,321 @@
+# src/global_model.py
+"""
+Global cross-coin model: one histogram gradient boosting regressor for all symbols.
+
+The notebook fits a RandomForestRegressor per coin on price-level features
+and a price-level target. Here the same indicators are made scale-free
+(ratios to the current close), the target is the next-day percentage change
+(target_next_pct) and symbol / cluster enter as categorical features, so one
+fit covers every coin and small coins borrow strength from the rest.
+
+Inference is batched: in-sample predictions for every coin come from one
+predict() call, and the 180-day recursive forecast advances all coins
+together (one predict() per step), recomputing the indicators from the
+rolled close buffer instead of the notebook's approximate updates.
+Forecast quantiles come from bootstrapping each coin's out-of-sample
+one-step residuals, collected over walk-forward folds (HOLDOUT_FOLDS windows
+of HOLDOUT_DAYS at the end of the training period, each predicted by a fit
+on the rows before it); in-sample residuals of a boosted model understate
+the forecast error.
+
+Functions
+---------
+- cluster_labels(path=None) -> dict
+- global_features(feat) -> pd.DataFrame
+- design_matrix(frame, symbols, clusters) -> pd.DataFrame
+- train_global(df, symbols=None, train_end=None, **params) -> dict
+- predict_next_close(bundle, feat) -> pd.Series
+- rollout(bundle, df, symbols, steps=FORECAST_DAYS) -> dict
+- holdout_residuals(df, train_end=None, days=HOLDOUT_DAYS, folds=HOLDOUT_FOLDS, **params) -> dict
+- run_global(df, symbols=None, train_end=None, steps=FORECAST_DAYS, residual_days=HOLDOUT_DAYS,
+  residual_folds=HOLDOUT_FOLDS, **params) -> (pd.DataFrame, dict, dict)
+- save_model(bundle, path=None) / load_model(path=None)
+"""
+
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from src.alignment import aligned
+from src.features import add_features, clean_features
+from src.forecasting import (FORECAST_DAYS, HOLDOUT_DAYS, HOLDOUT_FOLDS, MIN_RESIDUALS, PROJECT_ROOT, WARMUP_DAYS,
+                             bootstrap_quantiles, daily_close, to_store_frame)
+
+MODEL_NAME = "Global GBM"
+MODEL_PATH = PROJECT_ROOT / "models" / "global" / "global_gbm.joblib"
+CLUSTER_LABELS_PATH = PROJECT_ROOT / "data" / "EDA" / "clustering" / "cluster_labels.csv"
+
+GLOBAL_FEATURES = [
+    "lag_1_ratio", "lag_7_ratio", "roll_mean_7_ratio", "roll_std_7_ratio",
+    "volatility_7", "rsi_14", "macd_ratio", "macd_signal_ratio", "pct_change",
+]
+CATEGORICAL = ["symbol_code", "cluster_code"]
+TARGET = "target_next_pct"
+DEFAULT_PARAMS = {"max_iter": 300, "learning_rate": 0.05, "max_leaf_nodes": 31,
+                  "min_samples_leaf": 40, "l2_regularization": 1.0, "random_state": 42}
+BUFFER_DAYS = 15  # closes needed to recompute every feature (14 diffs for RSI)
+
+
+def cluster_labels(path: str = None) -> dict:
+    """{symbol: cluster} from the clustering pipeline output (empty if not run yet)."""
+    path = Path(path) if path else CLUSTER_LABELS_PATH
+    if not path.exists():
+        return {}
+    labels = pd.read_csv(path)
+    return dict(zip(labels["symbol"], labels["cluster"].astype(int)))
+
+
+def global_features(feat: pd.DataFrame) -> pd.DataFrame:
+    """Scale-free versions of the notebook RF features (output of add_features)."""
+    close = feat["close"]
+    return pd.DataFrame({
+        "lag_1_ratio": feat["lag_1"] / close - 1,
+        "lag_7_ratio": feat["lag_7"] / close - 1,
+        "roll_mean_7_ratio": feat["roll_mean_7"] / close - 1,
+        "roll_std_7_ratio": feat["roll_std_7"] / close,
+        "volatility_7": feat["volatility_7"],
+        "rsi_14": feat["rsi_14"],
+        "macd_ratio": feat["macd"] / close,
+        "macd_signal_ratio": feat["macd_signal"] / close,
+        "pct_change": feat["pct_change"],
+    }, index=feat.index)
+
+
+def design_matrix(frame: pd.DataFrame, symbols: Sequence[str], clusters: dict) -> pd.DataFrame:
+    """
+    Append integer symbol / cluster codes to a GLOBAL_FEATURES frame that has
+    a "symbol" column. Unknown symbols or clusters become NaN (missing category).
+    """
+    codes = {s: i for i, s in enumerate(symbols)}
+    X = frame[GLOBAL_FEATURES].astype(float)
+    X["symbol_code"] = frame["symbol"].map(codes).astype(float)
+    X["cluster_code"] = frame["symbol"].map(clusters).astype(float)
+    return X
+
+
+def _training_frame(df: pd.DataFrame, symbols: Sequence[str] = None) -> pd.DataFrame:
+    # same gap-filled daily calendar as the per-coin models (daily_close)
+    feat = clean_features(add_features(aligned(df).long()), warmup=WARMUP_DAYS)
+    if symbols:
+        feat = feat[feat["symbol"].isin(symbols)]
+    return pd.concat([feat[["date", "symbol", "close", TARGET]], global_features(feat)], axis=1)
+
+
+def train_global(df: pd.DataFrame, symbols: Sequence[str] = None, train_end: Optional[str] = None,
+                 **params) -> dict:
+    """
+    Fit one HistGradientBoostingRegressor on every (symbol, day) row.
+    Returns a bundle {"model", "symbols", "clusters", "features", "train_end", "n_rows"}.
+    """
+    frame = _training_frame(df, symbols)
+    if train_end is not None:
+        frame = frame[frame["date"] <= pd.Timestamp(train_end)]
+    return _fit(frame, **params)
+
+
+def _fit(frame: pd.DataFrame, **params) -> dict:
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    if frame.empty:
+        raise ValueError("No training rows for the requested symbols / dates")
+
+    all_symbols = sorted(frame["symbol"].unique())
+    clusters = cluster_labels()
+    X = design_matrix(frame, all_symbols, clusters)
+    model = HistGradientBoostingRegressor(
+        categorical_features=[X.columns.get_loc(c) for c in CATEGORICAL],
+        **{**DEFAULT_PARAMS, **params},
+    )
+    model.fit(X, frame[TARGET].to_numpy())
+    return {
+        "model": model,
+        "symbols": all_symbols,
+        "clusters": {s: clusters[s] for s in all_symbols if s in clusters},
+        "features": list(X.columns),
+        "train_end": str(frame["date"].max().date()),
+        "n_rows": int(len(frame)),
+    }
+
+
+def predict_next_close(bundle: dict, frame: pd.DataFrame) -> pd.Series:
+    """Next-day close for every row of a (symbol, close, GLOBAL_FEATURES) frame, in one call."""
+    X = design_matrix(frame, bundle["symbols"], bundle["clusters"])
+    pct = bundle["model"].predict(X)
+    return pd.Series(frame["close"].to_numpy() * (1 + pct), index=frame.index)
+
+
+def _ema_step(ema: np.ndarray, x: np.ndarray, span: int) -> np.ndarray:
+    alpha = 2 / (span + 1)
+    return ema + alpha * (x - ema)
+
+
+def _buffer_features(closes: np.ndarray, macd: np.ndarray, signal: np.ndarray) -> np.ndarray:
+    """GLOBAL_FEATURES for the last column of a (coins x BUFFER_DAYS) close buffer."""
+    last = closes[:, -1]
+    window = closes[:, -7:]
+    diffs = np.diff(closes[:, -15:], axis=1)
+    pct = closes[:, -8:][:, 1:] / closes[:, -8:][:, :-1] - 1
+    up = np.clip(diffs, 0, None).mean(axis=1)
+    down = np.clip(-diffs, 0, None).mean(axis=1)
+    return np.column_stack([
+        closes[:, -2] / last - 1,
+        closes[:, -8] / last - 1,
+        window.mean(axis=1) / last - 1,
+        window.std(axis=1) / last,
+        pct.std(axis=1, ddof=1) * np.sqrt(252),
+        100 - 100 / (1 + up / (down + 1e-12)),
+        macd / last,
+        signal / last,
+        pct[:, -1],
+    ])
+
+
+def rollout(bundle: dict, df: pd.DataFrame, symbols: Sequence[str], steps: int = FORECAST_DAYS) -> dict:
+    """
+    Recursive `steps`-day forecast for all symbols at once, starting from each
+    symbol's last training-window day (daily_close). Returns {symbol: np.ndarray}.
+    """
+    symbols = list(symbols)
+    calendar = aligned(df)
+    buffers, states = [], []
+    for s in symbols:
+        close = daily_close(df, s, calendar=calendar)
+        fast = close.ewm(span=12, adjust=False).mean()
+        slow = close.ewm(span=26, adjust=False).mean()
+        signal = (fast - slow).ewm(span=9, adjust=False).mean()
+        buffers.append(close.to_numpy()[-BUFFER_DAYS:])
+        states.append((fast.iloc[-1], slow.iloc[-1], signal.iloc[-1]))
+    closes = np.vstack(buffers)
+    fast, slow, signal = np.array(states).T
+
+    frame = pd.DataFrame({"symbol": symbols})
+    out = np.empty((len(symbols), steps))
+    for step in range(steps):
+        frame[GLOBAL_FEATURES] = _buffer_features(closes, fast - slow, signal)
+        frame["close"] = closes[:, -1]
+        nxt = predict_next_close(bundle, frame).to_numpy()
+        out[:, step] = nxt
+        closes = np.column_stack([closes[:, 1:], nxt])
+        fast, slow = _ema_step(fast, nxt, 12), _ema_step(slow, nxt, 26)
+        signal = _ema_step(signal, fast - slow, 9)
+    return dict(zip(symbols, out))
+
+
+def holdout_residuals(df: pd.DataFrame, train_end: Optional[str] = None, days: int = HOLDOUT_DAYS,
+                      folds: int = HOLDOUT_FOLDS, **params) -> dict:
+    """
+    Out-of-sample one-step log residuals {symbol: np.ndarray} over `folds`
+    walk-forward windows of `days` ending at train_end (default: the last
+    training day). For each window the model is refit on the rows before it
+    and predicts the next close on each day inside it.
+    """
+    frame = _training_frame(df)
+    end = frame["date"].max() if train_end is None else pd.Timestamp(train_end)
+    symbols, resid = [], []
+    for k in range(folds, 0, -1):
+        start, stop = end - pd.Timedelta(days=k * days), end - pd.Timedelta(days=(k - 1) * days)
+        train = frame[frame["date"] <= start]
+        window = frame[(frame["date"] > start) & (frame["date"] <= stop)]
+        if train.empty or window.empty:
+            continue
+        bundle = _fit(train, **params)
+        pct = bundle["model"].predict(design_matrix(window, bundle["symbols"], bundle["clusters"]))
+        symbols.append(window["symbol"].to_numpy())
+        resid.append(np.log1p(window[TARGET].to_numpy()) - np.log1p(pct))
+    if not resid:
+        raise ValueError("No held-out rows: the training period is shorter than one fold")
+    return {s: r.to_numpy() for s, r in pd.Series(np.concatenate(resid)).groupby(np.concatenate(symbols))}
+
+
+def run_global(df: pd.DataFrame, symbols: Sequence[str] = None, train_end: Optional[str] = None,
+               steps: int = FORECAST_DAYS, residual_days: int = HOLDOUT_DAYS, residual_folds: int = HOLDOUT_FOLDS,
+               **params) -> Tuple[pd.DataFrame, dict, dict]:
+    """
+    Train once on every symbol, then produce fitted values and forecasts for
+    `symbols` (default: all), with quantiles bootstrapped from the
+    walk-forward residuals of holdout_residuals (coins with fewer than
+    MIN_RESIDUALS of them use the residuals of all coins).
+    Returns (store_frame, {coin: registry metadata}, bundle).
+    """
+    bundle = train_global(df, train_end=train_end, **params)
+    symbols = list(symbols) if symbols else bundle["symbols"]
+    residuals = holdout_residuals(df, bundle["train_end"], residual_days, residual_folds, **params)
+    pooled = np.concatenate(list(residuals.values()))
+
+    frame = _training_frame(df, symbols)
+    # a prediction made on day t is the fitted value of day t + 1
+    fitted = frame[["symbol"]].assign(date=frame["date"] + pd.Timedelta(days=1),
+                                      value=predict_next_close(bundle, frame))
+    forecasts = rollout(bundle, df, symbols, steps)
+
+    calendar = aligned(df)
+    parts, meta = [], {}
+    for coin in symbols:
+        close = daily_close(df, coin, calendar=calendar)
+        f = fitted[fitted["symbol"] == coin].set_index("date")["value"]
+        f = f[f.index <= close.index[-1]]
+        own = residuals.get(coin, np.empty(0))
+        pooled_band = len(own) < MIN_RESIDUALS
+        quantiles = bootstrap_quantiles(forecasts[coin], pooled if pooled_band else own)
+        parts.append(to_store_frame(coin, MODEL_NAME, close, f, forecasts[coin], quantiles))
+        meta[coin] = {"train_end": bundle["train_end"], "n_rows": bundle["n_rows"],
+                      "cluster": bundle["clusters"].get(coin),
+                      "band_residuals": "pooled holdout" if pooled_band else "holdout"}
+    return pd.concat(parts, ignore_index=True), meta, bundle
+
+
+def save_model(bundle: dict, path: str = None) -> Path:
+    import joblib
+
+    path = Path(path) if path else MODEL_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(bundle, path)
+    return path
+
+
+def load_model(path: str = None) -> dict:
+    import joblib
+
+    path = Path(path) if path else MODEL_PATH
+    if not path.exists():
+        raise FileNotFoundError(f"Global model not found: {path}")
+    return joblib.load(path)
+
+
+def main():
+    import argparse
+    import time
+    from src.forecast_store import publish_run
+    from src.io import load_dataset
+    from src.registry import register_many
+
+    parser = argparse.ArgumentParser(description="Train one gradient boosting model across all coins.")
+    parser.add_argument("--symbols", nargs="*", default=None,
+                        help="Coins to publish (default: every coin; training always uses all)")
+    parser.add_argument("--train-end", default=None, help="Last training date (YYYY-MM-DD)")
+    parser.add_argument("--max-iter", type=int, default=DEFAULT_PARAMS["max_iter"])
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_PARAMS["learning_rate"])
+    parser.add_argument("--residual-days", type=int, default=HOLDOUT_DAYS,
+                        help="Days per walk-forward fold whose residuals set the forecast bands")
+    parser.add_argument("--residual-folds", type=int, default=HOLDOUT_FOLDS, help="Walk-forward folds")
+    parser.add_argument("--no-publish", action="store_true", help="Do not write model / store / registry")
+    args = parser.parse_args()
+
+    df = load_dataset()
+    start = time.perf_counter()
+    frame, meta, bundle = run_global(df, args.symbols, train_end=args.train_end, residual_days=args.residual_days,
+                                     residual_folds=args.residual_folds, max_iter=args.max_iter, learning_rate=args.learning_rate)
+    print(f"Trained on {bundle['n_rows']} rows / {len(bundle['symbols'])} coins, "
+          f"forecast {len(meta)} coins in {time.perf_counter() - start:.1f}s")
+
+    if args.no_publish:
+        return
+    print(f"Model saved to {save_model(bundle)}")
+    register_many(MODEL_NAME, meta)
+    run_id = publish_run(frame, description=f"Global GBM for {len(meta)} coins")
+    print(f"Published run {run_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,20 @@ Dataset loading and simple I/O helpers.
 
 Functions
 ---------
-- load_dataset(paths=None) -> pd.DataFrame
+- dataset_path(paths=None) -> Path
+- data_hash(df) -> str
+- load_dataset(paths=None, validate=True) -> pd.DataFrame
 - list_symbols(df) -> list[str]
 - save_parquet(df, path) -> None
 """
 
+import hashlib
+import logging
 from pathlib import Path
 import pandas as pd
 
+from src.profiling import profiled
+
 DEFAULT_CANDIDATES = [
     Path(__file__).parents[1] / "data" / "processed" / "final_df.parquet",
     Path(__file__).parents[1] / "data" / "processed" / "final_df.csv",
@@ -21,26 +27,41 @@ DEFAULT_CANDIDATES = [
 
 REQUIRED_COLS = {"date", "symbol", "open", "high", "low", "close", "volume"}
 
-def load_dataset(paths: list = None) -> pd.DataFrame:
-    """
-    Load processed dataset from one of the candidate paths.
-    Raises FileNotFoundError or ValueError (if columns missing).
-    """
+logger = logging.getLogger(__name__)
+
+def dataset_path(paths: list = None) -> Path:
+    """First existing candidate path; raises FileNotFoundError if none exists."""
     paths = paths or DEFAULT_CANDIDATES
-    csv_kwargs = {"parse_dates": ["date"], "infer_datetime_format": True}
-    found = None
     for p in paths:
         p = Path(p)
         if p.exists():
-            found = p
-            break
-    if found is None:
-        raise FileNotFoundError(f"No dataset found. Checked: {paths}")
+            return p
+    raise FileNotFoundError(f"No dataset found. Checked: {paths}")
+
+
+def data_hash(df: pd.DataFrame) -> str:
+    """Stable content hash of a frame (values + column names); keys the on-disk caches."""
+    h = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(",".join(map(str, df.columns)).encode())
+    return h.hexdigest()[:16]
+
+
+@profiled("load_dataset")
+def load_dataset(paths: list = None, validate: bool = True) -> pd.DataFrame:
+    """
+    Load processed dataset from one of the candidate paths.
+    With validate=True (default) rows failing src.validation checks are
+    quarantined (dropped, with a logged summary) and the rest come back
+    sorted by (symbol, date); run `python -m src.validation` for the report.
+    Raises FileNotFoundError or ValueError (if columns missing).
+    """
+    found = dataset_path(paths)
 
     if found.suffix == ".parquet":
         df = pd.read_parquet(found)
     else:
-        df = pd.read_csv(found, **csv_kwargs)
+        # headers may be capitalized (Date, Symbol, ...); dates are parsed after lowercasing
+        df = pd.read_csv(found)
     # normalize columns
     df.columns = [c.lower() for c in df.columns]
     if "date" in df.columns:
@@ -48,6 +69,14 @@ def load_dataset(paths: list = None) -> pd.DataFrame:
     missing = REQUIRED_COLS - set(df.columns)
     if missing:
         raise ValueError(f"Dataset missing required columns: {missing}")
+    if validate:
+        from src.validation import validate as run_checks
+
+        result = run_checks(df)
+        if len(result.quarantine):
+            counts = result.quarantine["issues"].str.split(",").explode().value_counts().to_dict()
+            logger.warning("Quarantined %d of %d rows from %s: %s", len(result.quarantine), len(df), found, counts)
+        df = result.clean
     return df
 
 def list_symbols(df: pd.DataFrame) -> list:
@@ -0,0 +1,77 @@
+# src/lazy.py
+"""
+Lazy imports for heavy optional modules (plotly, statsmodels, prophet, ...).
+
+    go = lazy_import("plotly.graph_objects")
+    fig = go.Figure()          # plotly is imported here, on first attribute access
+
+With APP_LAZY_IMPORTS=0 lazy_import imports eagerly, which surfaces import
+errors at page load (useful while debugging). Modules that were already
+imported (e.g. by the boot-time warmup) are returned as-is.
+
+Functions
+---------
+- lazy_import(name) -> module (or a proxy that imports on first use)
+- preload(names) -> dict {name: seconds}   (errors are recorded, not raised)
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+import types
+from typing import Iterable
+
+
+def _lazy_enabled() -> bool:
+    return os.environ.get("APP_LAZY_IMPORTS", "1") != "0"
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lock"] = threading.Lock()
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str):
+    """Return the module if already imported (or lazy imports are off), else a LazyModule."""
+    if name in sys.modules or not _lazy_enabled():
+        return importlib.import_module(name)
+    return LazyModule(name)
+
+
+def preload(names: Iterable[str]) -> dict:
+    """Import modules now; {name: seconds taken} or {name: "error: ..."} when an import fails."""
+    timings = {}
+    for name in names:
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            timings[name] = round(time.perf_counter() - t0, 4)
+        except Exception as e:
+            timings[name] = f"error: {e}"
+    return timings
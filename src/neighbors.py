@@ -0,0 +1,245 @@
+# src/neighbors.py
+"""
+Precomputed top-k correlated-neighbour index over daily returns.
+
+The EDA and Clustering pages only ever need the few most (and least)
+correlated coins for the selected symbol, so instead of materialising the
+full N x N correlation matrix we store the top-k positive and bottom-k
+neighbours per symbol and answer lookups from that table.
+
+Functions / classes
+-------------------
+- returns_matrix(df, freq="D") -> pd.DataFrame     (date x symbol returns per bar)
+- standardize_returns(returns) -> (np.ndarray, list[str])
+- build_exact(z, k, block_size) -> tuple[np.ndarray, ...]
+- build_approx(z, k, n_components, oversample, block_size, seed) -> tuple[np.ndarray, ...]
+- build_neighbor_index(df, k=10, method="exact", ...) -> NeighborIndex
+- NeighborIndex.top_positive(symbol, n) / .bottom(symbol, n) / .save(path) / .load(path)
+"""
+
+from pathlib import Path
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+
+DEFAULT_INDEX_PATH = Path(__file__).parents[1] / "data" / "EDA" / "correlation" / "neighbor_index.npz"
+
+
+def returns_matrix(df: pd.DataFrame, freq: str = "D") -> pd.DataFrame:
+    """
+    Date x symbol matrix of per-bar returns (daily by default) of a long
+    (date, symbol, close) frame, on the shared calendar (src.alignment) with
+    gaps left NaN.
+    """
+    from src.alignment import aligned
+
+    close = aligned(df, policy="mask", freq=freq, fields=("close",)).frame("close")
+    return close.pct_change(fill_method=None).dropna(how="all")
+
+
+def standardize_returns(returns: pd.DataFrame) -> Tuple[np.ndarray, list]:
+    """
+    Standardize each column over its own observed days and zero-fill the gaps.
+
+    Returns (z, symbols) where z is a (T x N) float32 matrix scaled so that
+    z[:, i] @ z[:, j] approximates the Pearson correlation of i and j. For
+    symbols sharing the same history this is exact; for coins listed later the
+    missing days contribute zero instead of being dropped pairwise.
+    """
+    values = returns.to_numpy(dtype=np.float64)
+    mask = np.isfinite(values)
+    counts = mask.sum(axis=0)
+    filled = np.where(mask, values, 0.0)
+    mean = filled.sum(axis=0) / np.maximum(counts, 1)
+    centred = np.where(mask, values - mean, 0.0)
+    norm = np.sqrt((centred ** 2).sum(axis=0))
+    z = centred / np.where(norm > 0, norm, 1.0)
+    return z.astype(np.float32), list(returns.columns)
+
+
+def _select_top_bottom(sims: np.ndarray, k: int) -> Tuple[np.ndarray, ...]:
+    """
+    Row-wise top-k (descending) and bottom-k (ascending) of a similarity block.
+    NaN entries (the symbol itself) are never selected.
+    """
+    k = min(k, sims.shape[1])
+    rows = np.arange(sims.shape[0])[:, None]
+
+    high = np.where(np.isnan(sims), -np.inf, sims)
+    top = np.argpartition(-high, k - 1, axis=1)[:, :k]
+    top = top[rows, np.argsort(-high[rows, top], axis=1)]
+
+    low = np.where(np.isnan(sims), np.inf, sims)
+    bottom = np.argpartition(low, k - 1, axis=1)[:, :k]
+    bottom = bottom[rows, np.argsort(low[rows, bottom], axis=1)]
+    return top, sims[rows, top], bottom, sims[rows, bottom]
+
+
+def build_exact(z: np.ndarray, k: int = 10, block_size: int = 256) -> Tuple[np.ndarray, ...]:
+    """
+    Exact build via blocked matrix multiply.
+
+    Only a (block_size x N) slab of similarities exists at any time, so peak
+    memory is O(block_size * N) rather than O(N^2).
+    Returns (pos_idx, pos_val, neg_idx, neg_val), each shaped (N x k).
+    """
+    n = z.shape[1]
+    k = min(k, n - 1)
+    pos_idx = np.empty((n, k), dtype=np.int32)
+    pos_val = np.empty((n, k), dtype=np.float32)
+    neg_idx = np.empty((n, k), dtype=np.int32)
+    neg_val = np.empty((n, k), dtype=np.float32)
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        sims = z[:, start:stop].T @ z
+        self_rows = np.arange(stop - start)
+        # exclude the symbol itself from both ends of the ranking
+        sims[self_rows, self_rows + start] = np.nan
+        top, top_v, bottom, bottom_v = _select_top_bottom(sims, k)
+        pos_idx[start:stop], pos_val[start:stop] = top, top_v
+        neg_idx[start:stop], neg_val[start:stop] = bottom, bottom_v
+    return pos_idx, pos_val, neg_idx, neg_val
+
+
+def build_approx(z: np.ndarray, k: int = 10, n_components: int = 64, oversample: int = 4,
+                 block_size: int = 256, seed: int = 42) -> Tuple[np.ndarray, ...]:
+    """
+    Approximate build via Gaussian random projection.
+
+    Return vectors are projected from T days down to n_components dimensions,
+    candidates (k * oversample per side) are shortlisted in the projected space
+    and then re-scored exactly against the original vectors, so the reported
+    correlations are exact even if an occasional true neighbour is missed.
+    """
+    t, n = z.shape
+    k = min(k, n - 1)
+    n_components = min(n_components, t)
+    rng = np.random.default_rng(seed)
+    proj = rng.standard_normal((t, n_components)).astype(np.float32) / np.sqrt(n_components)
+    zt = np.ascontiguousarray(z.T)  # (N x T), rows gathered during re-scoring
+    p = zt @ proj  # (N x d)
+    m = min(k * oversample, n - 1)
+    # bound the (rows x candidates x T) gather used for exact re-scoring to ~64MB
+    rerank_rows = max(1, int(16_000_000 // (2 * m * t)))
+
+    pos_idx = np.empty((n, k), dtype=np.int32)
+    pos_val = np.empty((n, k), dtype=np.float32)
+    neg_idx = np.empty((n, k), dtype=np.int32)
+    neg_val = np.empty((n, k), dtype=np.float32)
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        rows = np.arange(stop - start)
+        approx = p[start:stop] @ p.T
+        approx[rows, rows + start] = np.nan
+        cand_pos, _, cand_neg, _ = _select_top_bottom(approx, m)
+        cands = np.concatenate([cand_pos, cand_neg], axis=1)
+
+        # exact re-scoring of the shortlisted candidates only
+        exact = np.empty(cands.shape, dtype=np.float32)
+        for r0 in range(0, stop - start, rerank_rows):
+            r1 = min(r0 + rerank_rows, stop - start)
+            query = zt[start + r0:start + r1, :, None]
+            exact[r0:r1] = np.matmul(zt[cands[r0:r1]], query)[..., 0]
+        exact_pos, exact_neg = exact[:, :m], exact[:, m:]
+
+        order_pos = np.argsort(-exact_pos, axis=1)[:, :k]
+        order_neg = np.argsort(exact_neg, axis=1)[:, :k]
+        r = rows[:, None]
+        pos_idx[start:stop] = cand_pos[r, order_pos]
+        pos_val[start:stop] = exact_pos[r, order_pos]
+        neg_idx[start:stop] = cand_neg[r, order_neg]
+        neg_val[start:stop] = exact_neg[r, order_neg]
+    return pos_idx, pos_val, neg_idx, neg_val
+
+
+class NeighborIndex:
+    """Top-k positive and bottom-k correlated neighbours per symbol."""
+
+    def __init__(self, symbols: list, pos_idx: np.ndarray, pos_val: np.ndarray,
+                 neg_idx: np.ndarray, neg_val: np.ndarray):
+        self.symbols = list(symbols)
+        self.pos_idx, self.pos_val = pos_idx, pos_val
+        self.neg_idx, self.neg_val = neg_idx, neg_val
+        self._row = {s: i for i, s in enumerate(self.symbols)}
+
+    @property
+    def k(self) -> int:
+        return self.pos_idx.shape[1]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._row
+
+    def _lookup(self, symbol: str, idx: np.ndarray, val: np.ndarray, n: Optional[int]) -> pd.DataFrame:
+        if symbol not in self._row:
+            raise KeyError(f"{symbol} not found in neighbour index")
+        i = self._row[symbol]
+        n = self.k if n is None else min(n, self.k)
+        return pd.DataFrame({
+            "symbol": [self.symbols[j] for j in idx[i, :n]],
+            "correlation": val[i, :n].astype(float),
+        })
+
+    def top_positive(self, symbol: str, n: Optional[int] = None) -> pd.DataFrame:
+        """Most positively correlated neighbours, highest first."""
+        return self._lookup(symbol, self.pos_idx, self.pos_val, n)
+
+    def bottom(self, symbol: str, n: Optional[int] = None) -> pd.DataFrame:
+        """Least (most negatively) correlated neighbours, lowest first."""
+        return self._lookup(symbol, self.neg_idx, self.neg_val, n)
+
+    def save(self, path: str = None) -> Path:
+        out = Path(path) if path else DEFAULT_INDEX_PATH
+        out.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(out, symbols=np.array(self.symbols), pos_idx=self.pos_idx,
+                            pos_val=self.pos_val, neg_idx=self.neg_idx, neg_val=self.neg_val)
+        return out
+
+    @classmethod
+    def load(cls, path: str = None) -> "NeighborIndex":
+        src = Path(path) if path else DEFAULT_INDEX_PATH
+        if not src.exists():
+            raise FileNotFoundError(f"Neighbour index not found: {src}")
+        with np.load(src) as data:
+            return cls(data["symbols"].tolist(), data["pos_idx"], data["pos_val"],
+                       data["neg_idx"], data["neg_val"])
+
+
+def build_neighbor_index(df: pd.DataFrame, k: int = 10, method: str = "exact",
+                         block_size: int = 256, **approx_kwargs) -> NeighborIndex:
+    """
+    Build the neighbour index from a long OHLCV frame (lowercase columns).
+    method: "exact" (blocked matmul) or "approx" (random projection + exact re-rank).
+    """
+    z, symbols = standardize_returns(returns_matrix(df))
+    if len(symbols) < 2:
+        raise ValueError("Need at least two symbols to build a neighbour index.")
+    if method == "exact":
+        arrays = build_exact(z, k=k, block_size=block_size)
+    elif method == "approx":
+        arrays = build_approx(z, k=k, block_size=block_size, **approx_kwargs)
+    else:
+        raise ValueError(f"Unknown method: {method!r} (expected 'exact' or 'approx')")
+    return NeighborIndex(symbols, *arrays)
+
+
+def main():
+    import argparse
+    from src.io import load_dataset
+
+    parser = argparse.ArgumentParser(description="Build the correlated-neighbour index.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--method", choices=["exact", "approx"], default="exact")
+    parser.add_argument("--block-size", type=int, default=256)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    df = load_dataset()
+    index = build_neighbor_index(df, k=args.k, method=args.method, block_size=args.block_size)
+    out = index.save(args.out)
+    print(f"Saved neighbour index for {len(index.symbols)} symbols (k={index.k}) → {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# src/profiling.py
+"""
+Lightweight per-stage profiling for page runs.
+
+A page starts a profiler, wraps its work in named stages and finishes the
+run; every stage records wall time and the change in process memory (RSS)
+and the run is appended to logs/profile.jsonl, one JSON object per stage:
+
+    {"ts": ..., "run_id": ..., "page": "Dashboard", "stage": "load",
+     "parent": null, "depth": 0, "wall_ms": 12.3, "mem_delta_kb": 512, "sample_rate": 1.0}
+
+Stages nest (parent / depth); the page total is recorded as stage "total".
+Helpers called from several pages can use the `profiled` decorator, which
+is a no-op when no profiler is active.
+
+The current profiler is held in a context variable: Streamlit runs each
+session's script in its own thread, so concurrent sessions never record
+into each other's runs.
+
+Controlled by environment variables:
+ - APP_PROFILE        "off" (default), "on" (every run) or "sample"
+ - APP_PROFILE_RATE   fraction of runs recorded in "sample" mode (default 0.05)
+ - APP_PROFILE_PANEL  "1" to show the slowest stages in the sidebar
+
+Functions
+---------
+- start_page(page) -> PageProfiler
+- stage(name) -> context manager
+- profiled(name=None) -> decorator
+- read_profile(path=None, page=None) -> pd.DataFrame
+- slowest_stages(path=None, page=None, last_runs=50, n=10) -> pd.DataFrame
+- render_sidebar_panel(profiler, n=5)
+"""
+
+import functools
+import json
+import os
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parents[1]
+PROFILE_PATH = PROJECT_ROOT / "logs" / "profile.jsonl"
+MAX_LOG_BYTES = 20 * 1024 * 1024
+
+_current: ContextVar = ContextVar("page_profiler", default=None)
+
+
+def _settings() -> tuple:
+    mode = os.environ.get("APP_PROFILE", "off").lower()
+    if mode == "on":
+        return True, 1.0
+    if mode == "sample":
+        rate = float(os.environ.get("APP_PROFILE_RATE", "0.05"))
+        return random.random() < rate, rate
+    return False, 0.0
+
+
+def _rss_kb() -> int:
+    """Resident set size of this process in KiB (0 where unsupported)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        # peak RSS (KiB on Linux, bytes on macOS); a coarse fallback only
+        return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    except (ImportError, AttributeError):
+        return 0
+
+
+class PageProfiler:
+    """Collects the stages of one page run; inactive profilers record nothing."""
+
+    def __init__(self, page: str, active: bool, sample_rate: float, path: Path = None):
+        self.page = page
+        self.active = active
+        self.sample_rate = sample_rate
+        self.path = Path(path) if path else PROFILE_PATH
+        self.run_id = uuid.uuid4().hex[:12]
+        self.records = []
+        self._stack = []
+        self._start = time.perf_counter()
+        self._mem_start = _rss_kb() if active else 0
+        self._finished = False
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.active:
+            yield
+            return
+        parent = self._stack[-1] if self._stack else None
+        self._stack.append(name)
+        mem0, t0 = _rss_kb(), time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = (time.perf_counter() - t0) * 1000
+            self._stack.pop()
+            self.records.append({"stage": name, "parent": parent, "depth": len(self._stack),
+                                 "wall_ms": round(wall, 3), "mem_delta_kb": _rss_kb() - mem0})
+
+    def finish(self) -> list:
+        """Record the page total and append the run to the profile log (once)."""
+        if _current.get() is self:
+            _current.set(None)
+        if not self.active or self._finished:
+            return self.records
+        self._finished = True
+        self.records.append({"stage": "total", "parent": None, "depth": 0,
+                             "wall_ms": round((time.perf_counter() - self._start) * 1000, 3),
+                             "mem_delta_kb": _rss_kb() - self._mem_start})
+        ts = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        lines = [json.dumps({"ts": ts, "run_id": self.run_id, "page": self.page, **rec,
+                             "sample_rate": self.sample_rate}) for rec in self.records]
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size > MAX_LOG_BYTES:
+                os.replace(self.path, self.path.with_suffix(".jsonl.1"))
+            with open(self.path, "a") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError:
+            # profiling must never break a page
+            pass
+        return self.records
+
+
+def start_page(page: str, path: str = None) -> PageProfiler:
+    """Begin profiling a page run (sampling decided here) and make it current."""
+    previous = _current.get()
+    if previous is not None:
+        # previous run in this context ended early (e.g. an exception); keep what it measured
+        previous.finish()
+    active, rate = _settings()
+    profiler = PageProfiler(page, active, rate, path)
+    _current.set(profiler)
+    return profiler
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block under the current page profiler (no-op without one)."""
+    profiler = _current.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
+
+
+def profiled(name: Optional[str] = None):
+    """Decorator: run the function as a stage named `name` (default: function name)."""
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _current.get()
+            if profiler is None or not profiler.active:
+                return func(*args, **kwargs)
+            with profiler.stage(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def read_profile(path: str = None, page: Optional[str] = None) -> pd.DataFrame:
+    path = Path(path) if path else PROFILE_PATH
+    if not path.exists():
+        return pd.DataFrame(columns=["ts", "run_id", "page", "stage", "parent", "depth",
+                                     "wall_ms", "mem_delta_kb", "sample_rate"])
+    df = pd.read_json(path, lines=True)
+    return df if page is None else df[df["page"] == page].reset_index(drop=True)
+
+
+def slowest_stages(path: str = None, page: Optional[str] = None, last_runs: int = 50,
+                   n: int = 10) -> pd.DataFrame:
+    """p50 / p95 / max wall time per (page, stage) over the most recent runs."""
+    df = read_profile(path, page)
+    if df.empty:
+        return pd.DataFrame(columns=["page", "stage", "runs", "p50_ms", "p95_ms", "max_ms", "mem_p50_kb"])
+    recent = df.drop_duplicates("run_id", keep="last").tail(last_runs)["run_id"]
+    df = df[df["run_id"].isin(recent)]
+    out = df.groupby(["page", "stage"]).agg(
+        runs=("run_id", "nunique"),
+        p50_ms=("wall_ms", "median"),
+        p95_ms=("wall_ms", lambda s: s.quantile(0.95)),
+        max_ms=("wall_ms", "max"),
+        mem_p50_kb=("mem_delta_kb", "median"),
+    ).reset_index()
+    return out.sort_values("p95_ms", ascending=False).head(n).reset_index(drop=True)
+
+
+def render_sidebar_panel(profiler: PageProfiler, n: int = 5) -> None:
+    """Sidebar expander with this run's slowest stages and the recent p95s (APP_PROFILE_PANEL=1)."""
+    if os.environ.get("APP_PROFILE_PANEL") != "1" or not profiler.active:
+        return
+    import streamlit as st
+
+    with st.sidebar.expander("Profiler", expanded=False):
+        current = pd.DataFrame(profiler.records)
+        if not current.empty:
+            st.caption(f"This run ({profiler.run_id})")
+            st.dataframe(current.sort_values("wall_ms", ascending=False).head(n)
+                         [["stage", "wall_ms", "mem_delta_kb"]], use_container_width=True)
+        history = slowest_stages(profiler.path, profiler.page, n=n)
+        if not history.empty:
+            st.caption("Recent runs (p95)")
+            st.dataframe(history[["stage", "runs", "p50_ms", "p95_ms"]], use_container_width=True)
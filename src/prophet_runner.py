@@ -0,0 +1,206 @@
+# src/prophet_runner.py
+"""
+Batched Prophet fitting for many coins.
+
+Differences from the notebook cell (one fresh Prophet per coin, in sequence):
+ - fits run in a process pool; each worker loads the Stan backend once in
+   its initializer and every Prophet it builds reuses it
+ - uncertainty_samples defaults to 0, so predict() returns yhat without
+   simulating intervals; with a positive number, posterior predictive
+   samples are drawn for the forecast horizon only and reduced to the
+   store quantiles in one np.quantile call
+ - history and forecast horizon are predicted in one call
+ - fits can warm-start from the parameters of the previous run (Prophet's
+   `init` argument), which are kept in the model registry
+ - daily_seasonality is off by default: on one bar per day it is not
+   identifiable (use --daily-seasonality to reproduce the notebook);
+   weekly and yearly seasonality keep Prophet's "auto" setting
+
+Functions
+---------
+- make_prophet(**kwargs) -> Prophet
+- warm_start_params(model) -> dict
+- fit_prophet(ds, y, steps, prophet_kwargs=None, init=None) -> dict
+- run_prophet(df, symbols=None, n_jobs=None, uncertainty_samples=0, warm_start=True, ...) -> (pd.DataFrame, dict)
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from src.alignment import aligned
+from src.forecasting import FORECAST_DAYS, QUANTILES, daily_close, representative_coins, to_store_frame
+
+MODEL_NAME = "Prophet"
+PROPHET_KWARGS = {"daily_seasonality": False}
+
+_BACKEND = None
+_PROPHET_CLASS = None
+
+
+def _quiet() -> None:
+    for name in ("cmdstanpy", "prophet"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def _shared_backend():
+    """The process-wide Stan backend (compiled model loaded once)."""
+    global _BACKEND
+    if _BACKEND is None:
+        from prophet.models import StanBackendEnum
+
+        _BACKEND = StanBackendEnum.get_backend_class(StanBackendEnum.CMDSTANPY.name)()
+    return _BACKEND
+
+
+def _init_worker() -> None:
+    _quiet()
+    _shared_backend()
+
+
+def make_prophet(**kwargs):
+    """A Prophet instance that uses the shared backend instead of loading its own."""
+    global _PROPHET_CLASS
+    if _PROPHET_CLASS is None:
+        from prophet import Prophet
+
+        class SharedBackendProphet(Prophet):
+            def _load_stan_backend(self, stan_backend):
+                self.stan_backend = _shared_backend()
+
+        _PROPHET_CLASS = SharedBackendProphet
+    return _PROPHET_CLASS(**kwargs)
+
+
+def warm_start_params(model) -> dict:
+    """Fitted MAP parameters in the form accepted by Prophet.fit(init=...)."""
+    params = {name: float(model.params[name][0][0]) for name in ("k", "m", "sigma_obs")}
+    params.update({name: model.params[name][0].astype(float).tolist() for name in ("delta", "beta")})
+    return params
+
+
+def fit_prophet(ds: pd.DatetimeIndex, y: np.ndarray, steps: int = FORECAST_DAYS,
+                prophet_kwargs: dict = None, init: Optional[dict] = None) -> dict:
+    """
+    Fit one series and predict history plus `steps` future days in one call.
+    A stale init (e.g. different number of seasonal terms) falls back to a cold start.
+    """
+    history = pd.DataFrame({"ds": ds, "y": y})
+    if init:
+        # registry JSON stores vectors as lists; Prophet expects arrays
+        init = {name: np.asarray(v, dtype=float) if isinstance(v, list) else v for name, v in init.items()}
+    kwargs = {**PROPHET_KWARGS, **(prophet_kwargs or {})}
+    model = make_prophet(**kwargs)
+    try:
+        model.fit(history, **({"init": init} if init else {}))
+        warm = bool(init)
+    except Exception:
+        if not init:
+            raise
+        model = make_prophet(**kwargs)
+        model.fit(history)
+        warm = False
+
+    future = model.make_future_dataframe(periods=steps, freq="D", include_history=True)
+    n = len(history)
+    # point predictions without interval simulation; samples only where quantiles are needed
+    n_samples, model.uncertainty_samples = model.uncertainty_samples, 0
+    yhat = model.predict(future)["yhat"].to_numpy()
+    model.uncertainty_samples = n_samples
+    quantiles = None
+    if n_samples:
+        samples = model.predictive_samples(future.iloc[n:])["yhat"]
+        quantiles = np.quantile(samples, QUANTILES, axis=1).T
+    return {
+        "fitted": pd.Series(yhat[:n], index=pd.DatetimeIndex(ds)),
+        "forecast": yhat[n:],
+        "quantiles": quantiles,
+        "params": warm_start_params(model),
+        "warm": warm,
+    }
+
+
+def _fit_job(job: tuple) -> dict:
+    coin, ds, y, steps, prophet_kwargs, init = job
+    return {"coin": coin, **fit_prophet(ds, y, steps, prophet_kwargs, init)}
+
+
+def run_prophet(df: pd.DataFrame, symbols: Sequence[str] = None, n_jobs: Optional[int] = None,
+                uncertainty_samples: int = 0, warm_start: bool = True, daily_seasonality: bool = False,
+                steps: int = FORECAST_DAYS) -> Tuple[pd.DataFrame, dict]:
+    """
+    Fit every coin and return (store_frame, {coin: registry metadata}).
+    Warm starts come from the "Prophet" entries of the model registry.
+    """
+    from src.registry import load_registry
+
+    symbols = list(symbols) if symbols else representative_coins()
+    calendar = aligned(df)
+    series = {coin: daily_close(df, coin, calendar=calendar) for coin in symbols}
+    prophet_kwargs = {"uncertainty_samples": uncertainty_samples, "daily_seasonality": daily_seasonality}
+    previous = load_registry().get(MODEL_NAME, {}) if warm_start else {}
+    jobs = [(coin, s.index, s.to_numpy(), steps, prophet_kwargs, previous.get(coin, {}).get("init"))
+            for coin, s in series.items()]
+
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(jobs))
+    if n_jobs <= 1:
+        _init_worker()
+        results = [_fit_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker) as pool:
+            results = list(pool.map(_fit_job, jobs))
+
+    frame = pd.concat([
+        to_store_frame(res["coin"], MODEL_NAME, series[res["coin"]], res["fitted"], res["forecast"],
+                       res["quantiles"])
+        for res in results
+    ], ignore_index=True)
+    meta = {
+        res["coin"]: {"init": res["params"], "warm_start": res["warm"],
+                      "train_end": str(series[res["coin"]].index[-1].date()), **prophet_kwargs}
+        for res in results
+    }
+    return frame, meta
+
+
+def main():
+    import argparse
+    import time
+    from src.forecast_store import publish_run
+    from src.io import load_dataset
+    from src.registry import register_many
+
+    parser = argparse.ArgumentParser(description="Fit Prophet for many coins in parallel.")
+    parser.add_argument("--symbols", nargs="*", default=None,
+                        help="Coins to model (default: cluster representatives)")
+    parser.add_argument("--all", action="store_true", help="Model every symbol in the dataset")
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--uncertainty-samples", type=int, default=0)
+    parser.add_argument("--no-warm-start", action="store_true")
+    parser.add_argument("--daily-seasonality", action="store_true", help="Notebook setting")
+    parser.add_argument("--no-publish", action="store_true", help="Do not write store / registry")
+    args = parser.parse_args()
+
+    _quiet()
+    df = load_dataset()
+    symbols = sorted(df["symbol"].unique()) if args.all else args.symbols
+    start = time.perf_counter()
+    frame, meta = run_prophet(df, symbols, n_jobs=args.n_jobs,
+                              uncertainty_samples=args.uncertainty_samples,
+                              warm_start=not args.no_warm_start,
+                              daily_seasonality=args.daily_seasonality)
+    warm = sum(m["warm_start"] for m in meta.values())
+    print(f"Fitted {len(meta)} coins ({warm} warm-started) in {time.perf_counter() - start:.1f}s")
+
+    if args.no_publish:
+        return
+    register_many(MODEL_NAME, meta)
+    run_id = publish_run(frame, description=f"Prophet for {len(meta)} coins")
+    print(f"Published run {run_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# src/registry.py
+"""
+Model registry: per-model, per-coin training metadata in one JSON file.
+
+Layout of models/model_registry.json:
+    {"ARIMA": {"BTC-USD": {"order": [2, 1, 2], "aic": ..., "updated_at": ...}, ...}, ...}
+
+Functions
+---------
+- load_registry(path=None) -> dict
+- get_entry(model, coin, path=None) -> Optional[dict]
+- register(model, coin, metadata, path=None) -> dict
+- register_many(model, entries, path=None) -> dict
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+REGISTRY_PATH = Path(__file__).parents[1] / "models" / "model_registry.json"
+
+
+def load_registry(path: str = None) -> dict:
+    path = Path(path) if path else REGISTRY_PATH
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def get_entry(model: str, coin: str, path: str = None) -> Optional[dict]:
+    return load_registry(path).get(model, {}).get(coin)
+
+
+def register_many(model: str, entries: dict, path: str = None) -> dict:
+    """
+    Merge {coin: metadata} into the registry and rewrite it atomically.
+    Each entry gets an updated_at timestamp; other models/coins are untouched.
+    """
+    path = Path(path) if path else REGISTRY_PATH
+    registry = load_registry(path)
+    stamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    section = registry.setdefault(model, {})
+    for coin, metadata in entries.items():
+        section[coin] = {**metadata, "updated_at": stamp}
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(registry, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    return registry
+
+
+def register(model: str, coin: str, metadata: dict, path: str = None) -> dict:
+    return register_many(model, {coin: metadata}, path)
@@ -0,0 +1,291 @@
+# src/replay.py
+"""
+Historical market replay: bars from the per-symbol files in data/datasets
+(or Parquet files) emitted in global timestamp order across symbols, to
+drive streaming and alerting code offline.
+
+Every source yields one symbol's bars in date order, reading its file in
+chunks. The sources are combined by a k-way heap merge (heapq.merge), so
+nothing is concatenated and memory holds about one chunk per symbol. Bars
+with the same timestamp come out in symbol order.
+
+Speed is a multiple of real time over the bar timestamps: speed=None
+replays as fast as possible, 1.0 in real time (a daily bar per day),
+86400 one day of history per second.
+
+    for bar in ReplayEngine(speed=None):          # sync, e.g. LiveBook(ReplayEngine(...))
+        ...
+
+    engine = ReplayEngine(speed=3600.0)
+    sub = engine.subscribe(maxsize=1000)           # async, bounded queue
+    async def consume():
+        async for bar in sub:
+            ...
+    await asyncio.gather(engine.run(), consume())
+
+Subscribers have bounded queues and run() awaits space in each of them, so
+the slowest subscriber sets the pace (backpressure) and nothing is dropped.
+
+Functions
+---------
+- file_sources(paths=None, symbols=None, start=None, end=None, chunk_rows=CHUNK_ROWS) -> list[Iterator[Bar]]
+- frame_sources(df, symbols=None, start=None, end=None) -> list[Iterator[Bar]]
+- merge_bars(sources) -> Iterator[Bar]
+- ReplayEngine(sources=None, speed=None, ...) / .subscribe(maxsize) / .run() / iter()
+"""
+
+import asyncio
+import heapq
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from src.streaming import Bar
+
+PROJECT_ROOT = Path(__file__).parents[1]
+DATASETS_DIR = PROJECT_ROOT / "data" / "datasets"
+CHUNK_ROWS = 50_000
+DEFAULT_QUEUE_SIZE = 1_000
+BAR_COLUMNS = ["date", "symbol", "open", "high", "low", "close", "volume"]
+# pauses shorter than this are carried over instead of slept, so fast replays do not sleep per bar
+MIN_SLEEP = 0.001
+
+_END = object()
+
+
+def _chunk_bars(chunk: pd.DataFrame, start, end, where: str, last_ns: int):
+    """Keyed bars (ns, symbol, Bar) of one chunk and the chunk's last timestamp; checks date order."""
+    chunk.columns = [c.lower() for c in chunk.columns]
+    missing = set(BAR_COLUMNS) - set(chunk.columns)
+    if missing:
+        raise ValueError(f"{where} missing required columns: {missing}")
+    dates = pd.to_datetime(chunk["date"])
+    ns = dates.to_numpy("datetime64[ns]").view("int64")
+    if len(ns) and (ns[0] < last_ns or (np.diff(ns) < 0).any()):
+        raise ValueError(f"{where} is not sorted by date")
+    new_last = int(ns[-1]) if len(ns) else last_ns
+    keep = np.ones(len(ns), dtype=bool)
+    if start is not None:
+        keep &= ns >= pd.Timestamp(start).value
+    if end is not None:
+        keep &= ns <= pd.Timestamp(end).value
+    if not keep.all():
+        chunk, dates, ns = chunk[keep], dates[keep], ns[keep]
+    symbols = chunk["symbol"].tolist()
+    prices = [chunk[c].astype(float).tolist() for c in ("open", "high", "low", "close", "volume")]
+    bars = [(n, s, Bar(s, d, *p))
+            for n, s, d, *p in zip(ns.tolist(), symbols, dates.tolist(), *prices)]
+    return bars, new_last
+
+
+def _keyed(chunks: Iterable[pd.DataFrame], start, end, where: str) -> Iterator[tuple]:
+    last_ns = np.iinfo("int64").min
+    for chunk in chunks:
+        bars, last_ns = _chunk_bars(chunk, start, end, where, last_ns)
+        yield from bars
+
+
+def _csv_chunks(path: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+def _parquet_chunks(path: Path, chunk_rows: int, symbol: str) -> Iterator[pd.DataFrame]:
+    import pyarrow.dataset as ds
+
+    # the symbol filter prunes row groups by their statistics
+    column = "Symbol" if "Symbol" in ds.dataset(path).schema.names else "symbol"
+    scanner = ds.dataset(path).scanner(filter=ds.field(column) == symbol, batch_size=chunk_rows)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def _parquet_symbols(path: Path) -> List[str]:
+    import pyarrow.parquet as pq
+
+    names = pq.read_schema(path).names
+    column = "Symbol" if "Symbol" in names else "symbol"
+    return sorted(pq.read_table(path, columns=[column]).column(0).unique().to_pylist())
+
+
+def file_sources(paths: Optional[Sequence] = None, symbols: Optional[Sequence[str]] = None, start=None, end=None,
+                 chunk_rows: int = CHUNK_ROWS) -> List[Iterator[tuple]]:
+    """
+    One lazy source per symbol. CSV files hold one symbol each (named
+    <SYMBOL>.csv, as in data/datasets); Parquet files may hold many symbols,
+    which are read one at a time. Defaults to data/datasets/*.csv and *.parquet.
+    Raises FileNotFoundError when there is nothing to replay.
+    """
+    if paths is None:
+        paths = sorted(DATASETS_DIR.glob("*.csv")) + sorted(DATASETS_DIR.glob("*.parquet"))
+    wanted = set(symbols) if symbols is not None else None
+    sources = []
+    for path in map(Path, paths):
+        if not path.exists():
+            raise FileNotFoundError(f"Replay file not found: {path}")
+        if path.suffix == ".parquet":
+            for symbol in _parquet_symbols(path):
+                if wanted is None or symbol in wanted:
+                    sources.append(_keyed(_parquet_chunks(path, chunk_rows, symbol), start, end, f"{path}[{symbol}]"))
+        elif wanted is None or path.stem in wanted:
+            sources.append(_keyed(_csv_chunks(path, chunk_rows), start, end, str(path)))
+    if not sources:
+        raise FileNotFoundError(f"No replay files found in {paths or DATASETS_DIR}")
+    return sources
+
+
+def frame_sources(df: pd.DataFrame, symbols: Optional[Sequence[str]] = None, start=None,
+                  end=None) -> List[Iterator[tuple]]:
+    """One source per symbol of an in-memory long frame (e.g. the processed dataset)."""
+    if symbols is not None:
+        df = df[df["symbol"].isin(symbols)]
+    return [_keyed([group.sort_values("date", kind="stable")], start, end, f"symbol {symbol}")
+            for symbol, group in df.groupby("symbol", sort=True)]
+
+
+def merge_bars(sources: Iterable[Iterator[tuple]]) -> Iterator[Bar]:
+    """k-way heap merge of the sources into one stream ordered by (timestamp, symbol)."""
+    for _, _, bar in heapq.merge(*sources):
+        yield bar
+
+
+class _Clock:
+    """Maps bar timestamps to wall-clock deadlines at `speed` x real time."""
+
+    def __init__(self, speed: Optional[float]):
+        if speed is not None and speed <= 0:
+            raise ValueError("Replay speed must be positive (or None for as fast as possible)")
+        self.speed = speed
+        self.origin = None
+
+    def pause(self, bar: Bar) -> float:
+        """Seconds to wait before emitting `bar` (0 when on time or unpaced)."""
+        if self.speed is None:
+            return 0.0
+        if self.origin is None:
+            self.origin = (bar.date, time.perf_counter())
+            return 0.0
+        due = self.origin[1] + (bar.date - self.origin[0]).total_seconds() / self.speed
+        pause = due - time.perf_counter()
+        return pause if pause >= MIN_SLEEP else 0.0
+
+
+class Subscription:
+    """Bounded queue of bars for one async subscriber; iterate with `async for`."""
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE, symbols: Optional[Sequence[str]] = None):
+        if maxsize < 1:
+            raise ValueError("Subscriber queue size must be at least 1")
+        self.queue = asyncio.Queue(maxsize)
+        self.symbols = set(symbols) if symbols is not None else None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Bar:
+        bar = await self.queue.get()
+        if bar is _END:
+            raise StopAsyncIteration
+        return bar
+
+
+class ReplayEngine:
+    """
+    Replays `sources` (file_sources() of data/datasets by default) in
+    timestamp order. Iterate it directly for a sync feed, or subscribe()
+    and await run() to deliver to async subscribers with backpressure.
+    """
+
+    def __init__(self, sources: Optional[List[Iterator[tuple]]] = None, speed: Optional[float] = None,
+                 symbols: Optional[Sequence[str]] = None, start=None, end=None):
+        self.sources = sources if sources is not None else file_sources(symbols=symbols, start=start, end=end)
+        self.clock = _Clock(speed)
+        self.subscribers = []
+        self.bars = 0
+        self._used = False
+
+    def _bars(self) -> Iterator[Bar]:
+        if self._used:
+            raise RuntimeError("A ReplayEngine replays once; create a new one to replay again")
+        self._used = True
+        return merge_bars(self.sources)
+
+    def __iter__(self) -> Iterator[Bar]:
+        for bar in self._bars():
+            pause = self.clock.pause(bar)
+            if pause:
+                time.sleep(pause)
+            self.bars += 1
+            yield bar
+
+    def subscribe(self, maxsize: int = DEFAULT_QUEUE_SIZE, symbols: Optional[Sequence[str]] = None) -> Subscription:
+        """New subscriber receiving every bar (or only `symbols`); subscribe before run()."""
+        sub = Subscription(maxsize, symbols)
+        self.subscribers.append(sub)
+        return sub
+
+    async def run(self) -> int:
+        """Deliver the replay to all subscribers, then end their iteration; returns the bar count."""
+        try:
+            for bar in self._bars():
+                pause = self.clock.pause(bar)
+                if pause:
+                    await asyncio.sleep(pause)
+                for sub in self.subscribers:
+                    if sub.symbols is not None and bar.symbol not in sub.symbols:
+                        continue
+                    try:
+                        sub.queue.put_nowait(bar)
+                    except asyncio.QueueFull:
+                        # backpressure: wait for this subscriber to catch up
+                        await sub.queue.put(bar)
+                self.bars += 1
+        finally:
+            for sub in self.subscribers:
+                await sub.queue.put(_END)
+        return self.bars
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay historical bars in timestamp order and report throughput.")
+    parser.add_argument("paths", nargs="*", help="CSV / Parquet files (default: data/datasets)")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="Multiple of real time, e.g. 86400 = one day per second (default: as fast as possible)")
+    parser.add_argument("--symbols", nargs="*", default=None)
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--subscribers", type=int, default=0, help="Replay through N async subscribers")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    sources = file_sources(args.paths or None, args.symbols, args.start, args.end)
+    engine = ReplayEngine(sources, speed=args.speed)
+    first = last = None
+    if args.subscribers:
+        subs = [engine.subscribe(args.queue_size) for _ in range(args.subscribers)]
+
+        async def consume(sub):
+            return sum(1 for _ in [bar async for bar in sub])
+
+        async def replay():
+            return await asyncio.gather(engine.run(), *map(consume, subs))
+
+        counts = asyncio.run(replay())[1:]
+        print(f"Subscribers received {counts}")
+    else:
+        for bar in engine:
+            first = first or bar
+            last = bar
+    took = time.perf_counter() - t0
+    span = f" ({first.date.date()} .. {last.date.date()})" if first else ""
+    print(f"Replayed {engine.bars:,} bars from {len(sources)} symbols{span} in {took:.3f}s"
+          f" ({engine.bars / max(took, 1e-9):,.0f} bars/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,17 @@ Functions:
  - simulate_profit(current_price, quantity, sell_price) -> dict
  - simple_recommendation(current_price, expected_price, target_price=None) -> str
  - basic_backtest(df, strategy_fn) -> pd.DataFrame  (small utility)
+ - price_matrix(df, symbols=None, freq="D") -> pd.DataFrame  (date x symbol closes, NaN before listing)
+ - rebalance_dates(index, rebalance="M") -> pd.DatetimeIndex
+ - portfolio_backtest(prices, weights, rebalance="M", cost_bps=10.0, initial_capital=1.0) -> dict
 """
 
-from typing import Callable
+from typing import Callable, Sequence, Union
+import numpy as np
 import pandas as pd
 
+PERIODS_PER_YEAR = 365
+
 def simulate_profit(current_price: float, quantity: float, sell_price: float) -> dict:
     """Return cost, revenue, absolute profit and percent profit."""
     cost = current_price * quantity
@@ -51,3 +57,138 @@ def basic_backtest(df: pd.DataFrame, signal_fn: Callable[[pd.DataFrame], pd.Seri
     df["pnl"] = df["position"] * df["return"]
     df["cumulative_pnl"] = df["pnl"].cumsum()
     return df[["date", "close", "signal", "position", "pnl", "cumulative_pnl"]]
+
+def price_matrix(df: pd.DataFrame, symbols: Sequence[str] = None, freq: str = "D") -> pd.DataFrame:
+    """
+    Closes of a long frame (date, symbol, close) as date x symbol on the
+    shared calendar (src.alignment) of bar frequency `freq`; NaN where a
+    symbol has no bar.
+    """
+    from src.alignment import aligned
+
+    closes = aligned(df, policy="mask", freq=freq, fields=("close",)).frame("close")
+    if symbols is not None:
+        closes = closes.loc[:, closes.columns.isin(symbols)]
+    return closes.dropna(how="all")
+
+def rebalance_dates(index: pd.DatetimeIndex, rebalance: Union[str, int, Sequence, None] = "M") -> pd.DatetimeIndex:
+    """
+    Dates of `index` to rebalance on:
+      - period alias ("D", "W", "M", "Q", "Y") -> first date of each period
+      - int n -> every n-th date
+      - sequence of dates -> first date of `index` on or after each
+      - None -> the first date only (buy and hold)
+    """
+    index = pd.DatetimeIndex(index)
+    if len(index) == 0:
+        return index
+    if rebalance is None:
+        return index[:1]
+    if isinstance(rebalance, str):
+        periods = index.to_period(rebalance)
+        return index[np.r_[True, periods[1:] != periods[:-1]]]
+    if isinstance(rebalance, (int, np.integer)):
+        if rebalance < 1:
+            raise ValueError("Rebalance interval must be at least one period")
+        return index[::rebalance]
+    pos = index.searchsorted(pd.DatetimeIndex(rebalance))
+    return index[np.unique(pos[pos < len(index)])]
+
+def _target_weights(weights, prices: pd.DataFrame, dates: pd.DatetimeIndex) -> np.ndarray:
+    """Targets of one scheme (Series = static, DataFrame = as of each date) as a dates x symbols array."""
+    if isinstance(weights, pd.Series):
+        row = weights.reindex(prices.columns).fillna(0.0).to_numpy(float)
+        return np.tile(row, (len(dates), 1))
+    if isinstance(weights, pd.DataFrame):
+        frame = weights.sort_index().reindex(columns=prices.columns)
+        # the latest target known on each rebalance date; none yet -> cash
+        return frame.reindex(dates, method="ffill").fillna(0.0).to_numpy(float)
+    raise ValueError("Weights must be a Series (static) or a date x symbol DataFrame")
+
+def portfolio_backtest(prices: pd.DataFrame, weights, rebalance: Union[str, int, Sequence, None] = "M",
+                       cost_bps: float = 10.0, initial_capital: float = 1.0) -> dict:
+    """
+    Backtest target-weight portfolios over a date x symbol price matrix.
+
+    - weights: a Series (static weights), a date x symbol DataFrame (target
+      as of each rebalance date) or a dict {scheme: either} to evaluate
+      several schemes in one call. Weights not summing to 1 leave the rest
+      in cash.
+    - On each rebalance date (see rebalance_dates) holdings are traded to
+      the targets at that day's close, paying cost_bps on the traded value.
+      Coins without a price yet (not listed) cannot be held: their target
+      weight is spread over the listed coins pro rata. Between rebalances
+      units are held and valued at the last known price.
+
+    Returns a dict of DataFrames:
+      nav (date x scheme), holdings (date x (scheme, symbol) units),
+      turnover and costs (rebalance date x scheme; turnover = traded value / NAV),
+      summary (scheme x total_return, cagr, volatility, sharpe, max_drawdown,
+      annual_turnover, total_costs).
+    """
+    schemes = weights if isinstance(weights, dict) else {"portfolio": weights}
+    if not schemes:
+        raise ValueError("No weight schemes given")
+    if prices.empty:
+        raise ValueError("Price matrix is empty")
+    prices = prices.sort_index()
+    names = list(schemes)
+    dates = rebalance_dates(prices.index, rebalance)
+    rows = prices.index.get_indexer(dates)
+    valued = prices.ffill().to_numpy(float)
+    listed = np.isfinite(valued)
+    mark = np.nan_to_num(valued)
+    rate = cost_bps / 10_000
+
+    # S x R x N targets, restricted to listed coins and rescaled to the intended exposure
+    targets = np.stack([_target_weights(schemes[n], prices, dates) for n in names])
+    intended = targets.sum(axis=2, keepdims=True)
+    targets = targets * listed[rows][None]
+    held = targets.sum(axis=2, keepdims=True)
+    targets = np.where(held != 0, targets * np.divide(intended, held, out=np.zeros_like(held), where=held != 0), 0.0)
+
+    n_s, n_t, n_n = len(names), len(prices), prices.shape[1]
+    nav = np.full((n_s, n_t), float(initial_capital))
+    units_path = np.zeros((n_s, n_t, n_n))
+    turnover = np.zeros((n_s, len(rows)))
+    costs = np.zeros((n_s, len(rows)))
+    units = np.zeros((n_s, n_n))
+    cash = np.full(n_s, float(initial_capital))
+    for k, r in enumerate(rows):
+        end = rows[k + 1] if k + 1 < len(rows) else n_t
+        before = units * mark[r]
+        nav_before = cash + before.sum(axis=1)
+        traded = np.abs(targets[:, k] * nav_before[:, None] - before).sum(axis=1)
+        costs[:, k] = rate * traded
+        turnover[:, k] = np.divide(traded, nav_before, out=np.zeros(n_s), where=nav_before != 0)
+        nav_after = nav_before - costs[:, k]
+        target_value = targets[:, k] * nav_after[:, None]
+        units = np.divide(target_value, mark[r], out=np.zeros_like(target_value), where=mark[r] != 0)
+        cash = nav_after - target_value.sum(axis=1)
+        nav[:, r:end] = cash[:, None] + units @ mark[r:end].T
+        units_path[:, r:end] = units[:, None, :]
+
+    nav = pd.DataFrame(nav.T, index=prices.index, columns=names)
+    holdings = pd.DataFrame(units_path.transpose(1, 0, 2).reshape(n_t, n_s * n_n), index=prices.index,
+                            columns=pd.MultiIndex.from_product([names, prices.columns], names=["scheme", "symbol"]))
+    turnover = pd.DataFrame(turnover.T, index=dates, columns=names)
+    costs = pd.DataFrame(costs.T, index=dates, columns=names)
+    return {"nav": nav, "holdings": holdings, "turnover": turnover, "costs": costs,
+            "summary": _backtest_summary(nav, turnover, costs)}
+
+def _backtest_summary(nav: pd.DataFrame, turnover: pd.DataFrame, costs: pd.DataFrame) -> pd.DataFrame:
+    returns = nav.pct_change().iloc[1:]
+    years = max(len(nav) - 1, 1) / PERIODS_PER_YEAR
+    growth = nav.iloc[-1] / nav.iloc[0]
+    vol = returns.std() * np.sqrt(PERIODS_PER_YEAR)
+    summary = pd.DataFrame({
+        "total_return": growth - 1,
+        "cagr": growth ** (1 / years) - 1,
+        "volatility": vol,
+        "sharpe": returns.mean() * PERIODS_PER_YEAR / vol.replace(0.0, np.nan),
+        "max_drawdown": (nav / nav.cummax() - 1).min(),
+        "annual_turnover": turnover.sum() / years,
+        "total_costs": costs.sum(),
+    })
+    summary.index.name = "scheme"
+    return summary
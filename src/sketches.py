@@ -0,0 +1,224 @@
+# src/sketches.py
+"""
+Mergeable per-partition sketches for summary statistics and IQR outliers.
+
+Each (symbol, period) partition keeps
+ - a moment sketch: n, mean, central moments M2..M4, min, max, missing rows
+ - a t-digest: weighted centroids (k1 / arcsine scale) for quantiles
+
+Both merge exactly (moments) or with bounded error (t-digest), so summary
+stats and quantiles for any range of whole partitions come from merging the
+stored sketches rather than rescanning raw bars. Partitions are calendar
+months by default; use a finer freq (e.g. "D") for intraday data.
+
+Functions
+---------
+- build_sketches(df, value_col="close", freq="M", compression=200) -> (moments, digests)
+- merge_moments(moments, by=("symbol",)) -> pd.DataFrame
+- merge_digests(digests, by=("symbol",), compression=200) -> pd.DataFrame
+- digest_quantiles(digests, probs, bounds, by=("symbol",)) -> pd.DataFrame
+- range_summary(moments, digests, start=None, end=None, symbols=None) -> pd.DataFrame
+- iqr_bounds(summary, k=1.5) -> pd.DataFrame
+- save_sketches(moments, digests, out_dir=None) / load_sketches(out_dir=None)
+"""
+
+from pathlib import Path
+from typing import Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parents[1]
+SKETCH_DIR = PROJECT_ROOT / "data" / "EDA" / "sketches"
+DEFAULT_COMPRESSION = 200
+MOMENT_COLUMNS = ["n", "mean", "m2", "m3", "m4", "min", "max", "missing"]
+
+
+def _k_bucket(q: np.ndarray, compression: int) -> np.ndarray:
+    """Integer k1-scale bucket of a quantile: small buckets in the tails, large in the middle."""
+    k = compression / (2 * np.pi) * (np.arcsin(np.clip(2 * q - 1, -1, 1)) + np.pi / 2)
+    return np.floor(k).astype(np.int64)
+
+
+def _compress(keys: pd.DataFrame, means: np.ndarray, weights: np.ndarray,
+              compression: int) -> pd.DataFrame:
+    """
+    Collapse weighted points (one row per point, grouped by keys) into
+    t-digest centroids for every group at once.
+    """
+    key_cols = list(keys.columns)
+    group = keys.groupby(key_cols, sort=False).ngroup().to_numpy()
+    order = np.lexsort((means, group))
+    group, means, weights = group[order], means[order], weights[order]
+    keys = keys.iloc[order].reset_index(drop=True)
+
+    cum = np.cumsum(weights)
+    totals = np.bincount(group, weights=weights)
+    starts = np.concatenate([[0.0], np.cumsum(totals)[:-1]])
+    q = (cum - starts[group] - weights / 2) / totals[group]
+    bucket = _k_bucket(q, compression)
+
+    # a new centroid starts wherever the group or the bucket changes
+    new = np.ones(len(group), dtype=bool)
+    new[1:] = (group[1:] != group[:-1]) | (bucket[1:] != bucket[:-1])
+    cid = np.cumsum(new) - 1
+    w = np.bincount(cid, weights=weights)
+    mean = np.bincount(cid, weights=means * weights) / w
+    out = keys.loc[new, key_cols].reset_index(drop=True)
+    out["centroid"] = mean
+    out["weight"] = w
+    return out
+
+
+def build_sketches(df: pd.DataFrame, value_col: str = "close", freq: str = "M",
+                   compression: int = DEFAULT_COMPRESSION) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Moment sketches and t-digests of value_col per (symbol, period).
+    df is a long frame with lowercase date / symbol columns.
+    """
+    period = pd.to_datetime(df["date"]).dt.to_period(freq).dt.start_time
+    values = pd.to_numeric(df[value_col], errors="coerce")
+    base = pd.DataFrame({
+        "symbol": df["symbol"].to_numpy(),
+        "period": period.to_numpy(),
+        "x": values.to_numpy(dtype=np.float64),
+        "missing": df.isnull().any(axis=1).to_numpy(),
+    })
+    grp = base.groupby(["symbol", "period"], sort=True)
+    moments = grp.agg(n=("x", "count"), mean=("x", "mean"), min=("x", "min"),
+                      max=("x", "max"), missing=("missing", "sum"))
+    dev = base["x"] - grp["x"].transform("mean")
+    powers = pd.DataFrame({"m2": dev ** 2, "m3": dev ** 3, "m4": dev ** 4})
+    moments = moments.join(powers.groupby([base["symbol"], base["period"]]).sum()).reset_index()
+    moments = moments[["symbol", "period"] + MOMENT_COLUMNS]
+
+    finite = base[np.isfinite(base["x"])]
+    digests = _compress(finite[["symbol", "period"]], finite["x"].to_numpy(),
+                        np.ones(len(finite)), compression)
+    return moments, digests
+
+
+def merge_moments(moments: pd.DataFrame, by: Sequence[str] = ("symbol",)) -> pd.DataFrame:
+    """
+    Exact k-way merge of moment sketches: central moments of each partition
+    are shifted to the combined mean (binomial expansion) and summed.
+    """
+    by = list(by)
+    m = moments[moments["n"] > 0]
+    grp = m.groupby(by, sort=True)
+    n = grp["n"].transform("sum")
+    mean = (m["n"] * m["mean"]).groupby([m[c] for c in by]).transform("sum") / n
+    d = m["mean"] - mean
+    shifted = pd.DataFrame({
+        "m2": m["m2"] + m["n"] * d ** 2,
+        "m3": m["m3"] + 3 * d * m["m2"] + m["n"] * d ** 3,
+        "m4": m["m4"] + 4 * d * m["m3"] + 6 * d ** 2 * m["m2"] + m["n"] * d ** 4,
+    })
+    out = grp.agg(n=("n", "sum"), min=("min", "min"), max=("max", "max"),
+                  missing=("missing", "sum"))
+    out["mean"] = mean.groupby([m[c] for c in by]).first()
+    out = out.join(shifted.groupby([m[c] for c in by]).sum())
+    return out.reset_index()[by + MOMENT_COLUMNS]
+
+
+def _moment_stats(merged: pd.DataFrame) -> pd.DataFrame:
+    """Sample std and pandas-compatible (bias-corrected) skew / excess kurtosis."""
+    n, m2, m3, m4 = (merged[c].astype(float) for c in ("n", "m2", "m3", "m4"))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(m2 / (n - 1))
+        g1 = np.sqrt(n) * m3 / m2 ** 1.5
+        skew = np.sqrt(n * (n - 1)) / (n - 2) * g1
+        kurt = ((n + 1) * n * (n - 1) * m4 / ((n - 2) * (n - 3) * m2 ** 2)
+                - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)))
+    return pd.DataFrame({
+        "std": std.where(n > 1),
+        "skew": skew.where((n > 2) & (m2 > 0)),
+        "kurtosis": kurt.where((n > 3) & (m2 > 0)),
+    }, index=merged.index)
+
+
+def merge_digests(digests: pd.DataFrame, by: Sequence[str] = ("symbol",),
+                  compression: int = DEFAULT_COMPRESSION) -> pd.DataFrame:
+    """Merge t-digest centroids across partitions into one digest per group."""
+    by = list(by)
+    return _compress(digests[by], digests["centroid"].to_numpy(),
+                     digests["weight"].to_numpy(), compression)
+
+
+def digest_quantiles(digests: pd.DataFrame, probs: Sequence[float], bounds: pd.DataFrame,
+                     by: Sequence[str] = ("symbol",)) -> pd.DataFrame:
+    """
+    Quantiles from merged digests by interpolating between centroid centres,
+    anchored at the exact min / max from bounds (columns by + [min, max]).
+
+    Ranks use numpy's linear convention, so digests made only of singleton
+    centroids reproduce Series.quantile exactly.
+    """
+    by = list(by)
+    probs = np.asarray(probs, dtype=float)
+    bounds = bounds.set_index(by)
+    rows = []
+    for key, g in digests.groupby(by, sort=True):
+        key = key if isinstance(key, tuple) else (key,)
+        lo, hi = bounds.loc[key if len(key) > 1 else key[0], ["min", "max"]]
+        w = g["weight"].to_numpy()
+        total = w.sum()
+        # piecewise-linear between (rank 0, min), centroid centres and (rank n-1, max)
+        xs = np.concatenate([[0.5], np.cumsum(w) - w / 2, [total - 0.5]])
+        ys = np.concatenate([[lo], g["centroid"].to_numpy(), [hi]])
+        values = np.interp(probs * (total - 1) + 0.5, xs, ys)
+        rows.append((*key, *values))
+    return pd.DataFrame(rows, columns=by + [f"q{p:g}" for p in probs])
+
+
+def _select(frame: pd.DataFrame, start, end, symbols) -> pd.DataFrame:
+    mask = np.ones(len(frame), dtype=bool)
+    if start is not None:
+        mask &= frame["period"] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= frame["period"] <= pd.Timestamp(end)
+    if symbols is not None:
+        mask &= frame["symbol"].isin(list(symbols))
+    return frame[mask]
+
+
+def range_summary(moments: pd.DataFrame, digests: pd.DataFrame, start=None, end=None,
+                  symbols: Sequence[str] = None, compression: int = DEFAULT_COMPRESSION) -> pd.DataFrame:
+    """
+    Per-symbol count, mean, median, std, min, max, skew, kurtosis, q1, q3 and
+    missing rows over every partition whose period start lies in [start, end].
+    """
+    m = merge_moments(_select(moments, start, end, symbols))
+    stats = pd.concat([m, _moment_stats(m)], axis=1)
+    merged = merge_digests(_select(digests, start, end, symbols), compression=compression)
+    q = digest_quantiles(merged, [0.25, 0.5, 0.75], stats[["symbol", "min", "max"]])
+    q.columns = ["symbol", "q1", "median", "q3"]
+    out = stats.merge(q, on="symbol", how="left")
+    return out[["symbol", "n", "mean", "median", "std", "min", "max", "skew", "kurtosis",
+                "q1", "q3", "missing"]].rename(columns={"n": "count", "missing": "missing_count"})
+
+
+def iqr_bounds(summary: pd.DataFrame, k: float = 1.5) -> pd.DataFrame:
+    """Tukey fences from a range_summary frame: symbol, lower_bound, upper_bound."""
+    iqr = summary["q3"] - summary["q1"]
+    return pd.DataFrame({
+        "symbol": summary["symbol"],
+        "lower_bound": summary["q1"] - k * iqr,
+        "upper_bound": summary["q3"] + k * iqr,
+    })
+
+
+def save_sketches(moments: pd.DataFrame, digests: pd.DataFrame, out_dir: str = None) -> Path:
+    out_dir = Path(out_dir) if out_dir else SKETCH_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    moments.to_parquet(out_dir / "moments.parquet", index=False)
+    digests.to_parquet(out_dir / "tdigest.parquet", index=False)
+    return out_dir
+
+
+def load_sketches(out_dir: str = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    out_dir = Path(out_dir) if out_dir else SKETCH_DIR
+    paths = [out_dir / "moments.parquet", out_dir / "tdigest.parquet"]
+    for p in paths:
+        if not p.exists():
+            raise FileNotFoundError(f"Sketch file not found: {p}")
+    return pd.read_parquet(paths[0]), pd.read_parquet(paths[1])
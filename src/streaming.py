@@ -0,0 +1,213 @@
+# src/streaming.py
+"""
+Incremental per-symbol state for live bar feeds (the Dashboard's live mode).
+
+A feed is any iterable of Bar (e.g. src.replay.ReplayEngine). LiveBook consumes it on a background thread
+and updates each symbol's state in O(1) per bar: SMAs and the rolling
+volatility are ring buffers with running sums, the drawdown keeps the
+running peak, and the KPIs keep only the last two bars. Chart points are
+kept per symbol in a list (the oldest are dropped in batches once it holds
+2 * MAX_POINTS, so appends stay amortised O(1)) and read with a cursor:
+points(symbol, since) returns only the bars after `since`, so the page
+appends new points to its chart instead of reloading the dataset or
+rebuilding figures, and a rerun can rebuild its chart from the history once.
+The UI polls at its own refresh rate (see Throttle), independent of the feed rate.
+
+Indicators match the batch chart builders in src.charts: SMAs with
+min_periods=1, rolling sample std of pct_change (first return 0), and
+drawdown from the running maximum.
+
+Functions
+---------
+- RollingWindow(size)
+- SymbolState(symbol, sma_windows=SMA_WINDOWS, vol_window=VOL_WINDOW)
+- LiveBook(feed, ...).start() / stop() / points(symbol, since) / kpis(symbol) / snapshot(symbol)
+- Throttle(hz).ready() -> bool / .wait()
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Iterable, NamedTuple, Optional, Sequence, Tuple
+import pandas as pd
+
+SMA_WINDOWS = (20, 50)
+VOL_WINDOW = 30
+MAX_POINTS = 100_000
+DEFAULT_REFRESH_HZ = 4.0
+
+
+class Bar(NamedTuple):
+    symbol: str
+    date: pd.Timestamp
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class RollingWindow:
+    """Last `size` values with running sum and sum of squares (O(1) push)."""
+
+    def __init__(self, size: int):
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, x: float) -> None:
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+
+    def mean(self) -> float:
+        return self.total / len(self.values) if self.values else math.nan
+
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1), NaN with fewer than two values."""
+        n = len(self.values)
+        if n < 2:
+            return math.nan
+        var = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+class SymbolState:
+    """Indicators and chart points of one symbol, updated bar by bar."""
+
+    def __init__(self, symbol: str, sma_windows: Sequence[int] = SMA_WINDOWS, vol_window: int = VOL_WINDOW):
+        self.symbol = symbol
+        self.smas = {w: RollingWindow(w) for w in sma_windows}
+        self.returns = RollingWindow(vol_window)
+        self.last_bars = deque(maxlen=2)
+        self.peak = -math.inf
+        self.bars = 0
+        self.history = []
+
+    def on_bar(self, bar: Bar) -> None:
+        prev = self.last_bars[-1].close if self.last_bars else None
+        self.last_bars.append(bar)
+        self.bars += 1
+        for window in self.smas.values():
+            window.push(bar.close)
+        self.returns.push(bar.close / prev - 1 if prev else 0.0)
+        self.peak = max(self.peak, bar.close)
+        self.history.append(self.point())
+        if len(self.history) >= 2 * MAX_POINTS:
+            del self.history[:-MAX_POINTS]
+
+    def point(self) -> dict:
+        """Chart row for the latest bar: date, close and the SMAs."""
+        bar = self.last_bars[-1]
+        row = {"date": bar.date, "close": bar.close}
+        row.update({f"sma_{w}": window.mean() for w, window in self.smas.items()})
+        return row
+
+    def snapshot(self) -> dict:
+        """Latest indicator values (volatility = rolling std of returns, drawdown <= 0)."""
+        bar = self.last_bars[-1]
+        return {**self.point(), "volatility": self.returns.std(),
+                "drawdown": (bar.close - self.peak) / self.peak if self.peak > 0 else 0.0, "bars": self.bars}
+
+    def kpis(self) -> dict:
+        """src.ui.calc_kpis on the last two bars (same dict as the batch Dashboard)."""
+        from src.ui import calc_kpis
+
+        return calc_kpis(pd.DataFrame([b._asdict() for b in self.last_bars]))
+
+
+class LiveBook:
+    """
+    Consume a feed on a daemon thread and keep a SymbolState per symbol.
+    points / kpis / snapshot are safe to call from the UI thread while it runs.
+    """
+
+    def __init__(self, feed: Iterable[Bar], sma_windows: Sequence[int] = SMA_WINDOWS, vol_window: int = VOL_WINDOW):
+        self.feed = feed
+        self.sma_windows = tuple(sma_windows)
+        self.vol_window = vol_window
+        self.states = {}
+        self.error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "LiveBook":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        try:
+            for bar in self.feed:
+                if self._stop.is_set():
+                    break
+                with self._lock:
+                    state = self.states.get(bar.symbol)
+                    if state is None:
+                        state = self.states[bar.symbol] = SymbolState(bar.symbol, self.sma_windows, self.vol_window)
+                    state.on_bar(bar)
+        except Exception as e:
+            # surfaced to the UI through .error instead of dying silently in the thread
+            self.error = e
+
+    def points(self, symbol: str, since: int = 0) -> Tuple[pd.DataFrame, int]:
+        """
+        Chart points (indexed by date) for the bars of `symbol` after bar
+        number `since`, and the cursor to pass next time. O(new points).
+        """
+        with self._lock:
+            state = self.states.get(symbol)
+            if state is None:
+                return pd.DataFrame(), since
+            first = state.bars - len(state.history)
+            rows = state.history[max(since - first, 0):]
+            cursor = state.bars
+        return (pd.DataFrame(rows).set_index("date") if rows else pd.DataFrame()), cursor
+
+    def kpis(self, symbol: str) -> Optional[dict]:
+        with self._lock:
+            state = self.states.get(symbol)
+            return state.kpis() if state else None
+
+    def snapshot(self, symbol: str) -> Optional[dict]:
+        with self._lock:
+            state = self.states.get(symbol)
+            return state.snapshot() if state else None
+
+
+class Throttle:
+    """ready() is True at most `hz` times per second."""
+
+    def __init__(self, hz: float = DEFAULT_REFRESH_HZ):
+        if hz <= 0:
+            raise ValueError("Refresh rate must be positive")
+        self.interval = 1.0 / hz
+        self._last = -math.inf
+
+    def ready(self) -> bool:
+        now = time.monotonic()
+        if now - self._last >= self.interval:
+            self._last = now
+            return True
+        return False
+
+    def wait(self) -> None:
+        """Sleep until the next refresh slot and take it."""
+        pause = self._last + self.interval - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+        self._last = time.monotonic()
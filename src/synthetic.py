@@ -0,0 +1,257 @@
+# src/synthetic.py
+"""
+Synthetic multi-asset OHLCV in the final_df schema, for load and scale testing.
+
+Prices follow a factor-model GBM: every bar's log return is
+
+    r[i, t] = drift[i] + beta[i] . f[t] + e[i, t]
+
+where the common factors f (factor 0 is the market) and every symbol's
+idiosyncratic term e have GARCH(1, 1) variance with Student-t shocks, so
+volatility clusters and tails are fat. Symbols can list after the start
+date (no rows before their listing) and have outages (contiguous missing
+bars). Any pandas frequency works ("D", "h", "15min", ...); crypto trades
+around the clock, so there is no session calendar.
+
+Output rows use the final_df columns (Date, Symbol, Open, High, Low, Close,
+Volume, Name) ordered by symbol then date, like data/processed/final_df.
+Symbols are generated in batches of about `chunk_rows` rows, so
+write_parquet streams arbitrarily large datasets with bounded memory. Each
+symbol has its own random stream, so the data do not depend on chunk_rows.
+
+Functions
+---------
+- make_universe(n_symbols, dates, n_factors=3, listing_share=0.2, seed=0) -> pd.DataFrame
+- factor_returns(n_periods, dt, n_factors=3, seed=0) -> np.ndarray
+- iter_chunks(n_symbols, start="2021-01-01", periods=None, end=None, freq="D", ...) -> Iterator[pd.DataFrame]
+- generate(n_symbols, ...) -> pd.DataFrame
+- write_parquet(path, n_symbols, ...) -> (Path, int)
+"""
+
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parents[1]
+SYNTHETIC_DIR = PROJECT_ROOT / "data" / "synthetic"
+COLUMNS = ["Date", "Symbol", "Open", "High", "Low", "Close", "Volume", "Name"]
+
+# annualised volatilities; crypto-like levels
+FACTOR_VOLS = [0.60, 0.30, 0.20]
+GARCH_ALPHA = 0.08
+GARCH_BETA = 0.90
+T_DOF = 5
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+def _year_fraction(freq: str) -> float:
+    """Length of one bar in years."""
+    step = pd.tseries.frequencies.to_offset(freq)
+    try:
+        return pd.Timedelta(step).total_seconds() / (365 * 86400)
+    except ValueError:
+        raise ValueError(f"Frequency must be a fixed duration (got {freq!r})") from None
+
+
+def _dates(start, periods: Optional[int], end, freq: str) -> pd.DatetimeIndex:
+    if (periods is None) == (end is None):
+        raise ValueError("Give exactly one of periods / end")
+    return pd.date_range(start=start, periods=periods, end=end, freq=freq)
+
+
+def _student_t(rng: np.random.Generator, size) -> np.ndarray:
+    """Unit-variance Student-t draws."""
+    return rng.standard_t(T_DOF, size) / np.sqrt(T_DOF / (T_DOF - 2))
+
+
+def _garch(shocks: np.ndarray, target_var: np.ndarray) -> np.ndarray:
+    """
+    GARCH(1, 1) returns for unit shocks of shape (n_periods, n_series),
+    started at the unconditional variance target_var (per series).
+    """
+    omega = target_var * (1 - GARCH_ALPHA - GARCH_BETA)
+    out = np.empty_like(shocks)
+    var = np.array(target_var, dtype=float)
+    for t in range(len(shocks)):
+        out[t] = np.sqrt(var) * shocks[t]
+        var = omega + GARCH_ALPHA * out[t] ** 2 + GARCH_BETA * var
+    return out
+
+
+def factor_returns(n_periods: int, dt: float, n_factors: int = 3, seed: int = 0) -> np.ndarray:
+    """(n_periods x n_factors) common factor returns; factor 0 is the market."""
+    if not 1 <= n_factors <= len(FACTOR_VOLS):
+        raise ValueError(f"n_factors must be between 1 and {len(FACTOR_VOLS)}")
+    rng = np.random.default_rng([seed, 1])
+    vols = np.array(FACTOR_VOLS[:n_factors])
+    return _garch(_student_t(rng, (n_periods, n_factors)), vols ** 2 * dt)
+
+
+def make_universe(n_symbols: int, dates: pd.DatetimeIndex, n_factors: int = 3, listing_share: float = 0.2,
+                  listings: Optional[dict] = None, seed: int = 0) -> pd.DataFrame:
+    """
+    Per-symbol parameters: symbol, name, listing date, factor loadings
+    (beta_0..), idiosyncratic and drift (annualised), start price, volume level.
+    `listing_share` of the symbols list at a random date in the first 80% of
+    the range (the rest trade from the start); `listings` {symbol: date} overrides.
+    """
+    rng = np.random.default_rng([seed, 0])
+    width = len(str(n_symbols - 1))
+    symbols = [f"SYN{i:0{width}d}-USD" for i in range(n_symbols)]
+    late = rng.random(n_symbols) < listing_share
+    offsets = np.where(late, rng.integers(0, max(1, int(len(dates) * 0.8)), n_symbols), 0)
+    listed = dates[offsets]
+    if listings:
+        listed = pd.DatetimeIndex([pd.Timestamp(listings.get(s, d)) for s, d in zip(symbols, listed)])
+
+    universe = pd.DataFrame({
+        "symbol": symbols,
+        "name": [f"Synthetic {i:0{width}d}" for i in range(n_symbols)],
+        "listed": listed,
+        "idio_vol": rng.uniform(0.3, 0.9, n_symbols),
+        "drift": rng.normal(0.05, 0.3, n_symbols),
+        "start_price": np.exp(rng.normal(1.0, 2.5, n_symbols)),
+        "volume_level": np.exp(rng.normal(17.0, 1.5, n_symbols)),
+    })
+    loadings = np.column_stack([rng.uniform(0.6, 1.4, n_symbols)]
+                               + [rng.normal(0.0, 0.5, n_symbols) for _ in range(n_factors - 1)])
+    for k in range(n_factors):
+        universe[f"beta_{k}"] = loadings[:, k]
+    return universe
+
+
+def _outage_mask(rng: np.random.Generator, n_periods: int, gap_rate: float, gap_length: float) -> np.ndarray:
+    """True where a bar is present; outages cover about gap_rate of the bars."""
+    present = np.ones(n_periods, dtype=bool)
+    if gap_rate <= 0:
+        return present
+    n_gaps = rng.poisson(gap_rate * n_periods / gap_length)
+    starts = rng.integers(0, n_periods, n_gaps)
+    lengths = rng.geometric(1 / gap_length, n_gaps)
+    for s, n in zip(starts, lengths):
+        present[s:s + n] = False
+    return present
+
+
+def _symbol_batch(universe: pd.DataFrame, dates: pd.DatetimeIndex, factors: np.ndarray, dt: float,
+                  gap_rate: float, gap_length: float, seed: int) -> pd.DataFrame:
+    n_periods = len(dates)
+    rngs = [np.random.default_rng([seed, 2, int(i)]) for i in universe.index]
+    idio_var = universe["idio_vol"].to_numpy() ** 2 * dt
+    idio = _garch(np.column_stack([_student_t(r, n_periods) for r in rngs]), idio_var)
+
+    betas = universe[[c for c in universe.columns if c.startswith("beta_")]].to_numpy()
+    market = factors @ betas.T
+    total_var = idio_var + (betas ** 2 * np.array(FACTOR_VOLS[:betas.shape[1]]) ** 2 * dt).sum(axis=1)
+    log_ret = market + idio + (universe["drift"].to_numpy() * dt - 0.5 * total_var)
+
+    # prices start at the listing bar
+    first = dates.searchsorted(universe["listed"].to_numpy())
+    live = np.arange(n_periods)[:, None] >= first[None, :]
+    log_ret = np.where(live, log_ret, 0.0)
+    log_ret[first.clip(max=n_periods - 1), np.arange(len(first))] = 0.0
+    close = universe["start_price"].to_numpy() * np.exp(np.cumsum(log_ret, axis=0))
+
+    # open = previous close with a small gap; high / low span the bar's range
+    bar_vol = np.sqrt(total_var)
+    u = np.column_stack([r.random((n_periods, 3)) for r in rngs]).reshape(n_periods, len(rngs), 3)
+    open_ = np.vstack([close[:1], close[:-1]]) * np.exp(0.1 * bar_vol * (u[..., 0] - 0.5))
+    high = np.maximum(open_, close) * np.exp(0.5 * bar_vol * u[..., 1])
+    low = np.minimum(open_, close) * np.exp(-0.5 * bar_vol * u[..., 2])
+    # volume scales with bar length and spikes with the size of the move
+    volume = (universe["volume_level"].to_numpy() * dt * 365
+              * (1 + 2 * np.abs(log_ret) / bar_vol) * np.exp(0.3 * (u[..., 0] - 0.5)))
+
+    present = live & np.column_stack([_outage_mask(r, n_periods, gap_rate, gap_length) for r in rngs])
+    t_idx, s_idx = np.nonzero(present.T)[::-1]
+    return pd.DataFrame({
+        "Date": dates.values[t_idx],
+        "Symbol": universe["symbol"].to_numpy()[s_idx],
+        "Open": open_[t_idx, s_idx],
+        "High": high[t_idx, s_idx],
+        "Low": low[t_idx, s_idx],
+        "Close": close[t_idx, s_idx],
+        "Volume": np.round(volume[t_idx, s_idx]),
+        "Name": universe["name"].to_numpy()[s_idx],
+    }, columns=COLUMNS)
+
+
+def iter_chunks(n_symbols: int, start="2021-01-01", periods: Optional[int] = None, end=None, freq: str = "D",
+                n_factors: int = 3, listing_share: float = 0.2, listings: Optional[dict] = None,
+                gap_rate: float = 0.0, gap_length: float = 3.0, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                seed: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Yield final_df-schema frames, one batch of whole symbols at a time (about
+    chunk_rows rows each, at least one symbol). gap_rate is the expected share
+    of bars lost to outages, gap_length their mean length in bars.
+    """
+    if n_symbols < 1:
+        raise ValueError("n_symbols must be positive")
+    dates = _dates(start, periods, end, freq)
+    dt = _year_fraction(freq)
+    universe = make_universe(n_symbols, dates, n_factors, listing_share, listings, seed)
+    factors = factor_returns(len(dates), dt, n_factors, seed)
+    batch = max(1, chunk_rows // max(1, len(dates)))
+    for lo in range(0, n_symbols, batch):
+        yield _symbol_batch(universe.iloc[lo:lo + batch], dates, factors, dt, gap_rate, gap_length, seed)
+
+
+def generate(n_symbols: int, **kwargs) -> pd.DataFrame:
+    """The whole dataset in memory (see iter_chunks for the arguments)."""
+    return pd.concat(iter_chunks(n_symbols, **kwargs), ignore_index=True)
+
+
+def write_parquet(path, n_symbols: int, **kwargs) -> Tuple[Path, int]:
+    """Stream the dataset to one Parquet file chunk by chunk; returns (path, rows written)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows, writer = 0, None
+    try:
+        for chunk in iter_chunks(n_symbols, **kwargs):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path, rows
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Write a synthetic multi-asset OHLCV dataset (final_df schema).")
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--start", default="2021-01-01")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--periods", type=int, default=None, help="Bars per symbol")
+    group.add_argument("--end", default=None)
+    parser.add_argument("--freq", default="D", help='Bar frequency, e.g. "D", "h", "15min"')
+    parser.add_argument("--factors", type=int, default=3)
+    parser.add_argument("--listing-share", type=float, default=0.2, help="Share of symbols listing after start")
+    parser.add_argument("--gap-rate", type=float, default=0.0, help="Expected share of bars lost to outages")
+    parser.add_argument("--gap-length", type=float, default=3.0, help="Mean outage length in bars")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Parquet path (default: data/synthetic/<size>.parquet)")
+    args = parser.parse_args()
+
+    periods = args.periods if args.periods or args.end else 1096
+    out = args.out or SYNTHETIC_DIR / f"synthetic_{args.symbols}x{periods or args.end}_{args.freq}.parquet"
+    t0 = time.perf_counter()
+    path, rows = write_parquet(out, args.symbols, start=args.start, periods=periods, end=args.end,
+                               freq=args.freq, n_factors=args.factors, listing_share=args.listing_share,
+                               gap_rate=args.gap_rate, gap_length=args.gap_length,
+                               chunk_rows=args.chunk_rows, seed=args.seed)
+    print(f"Wrote {rows:,} rows to {path} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,13 @@ Functions
 - calc_kpis(df_symbol) -> dict
 """
 
-import streamlit as st
 import pandas as pd
 
+from src.lazy import lazy_import
+
+# only sidebar_controls needs streamlit; the helpers are also served by src.api
+st = lazy_import("streamlit")
+
 def sidebar_controls(df: pd.DataFrame) -> dict:
     """
     Render sidebar controls and return a dictionary with:
@@ -0,0 +1,180 @@
+# src/validation.py
+"""
+Ingest validation: every data-quality check in one vectorised pass over the
+(symbol, date) sorted frame, a compact per-symbol report, and quarantine of
+bad rows so downstream stages (features, models, pages) never re-check.
+
+load_dataset() runs validate() by default and returns only the clean rows.
+
+Row checks (bit flags, several can fail at once):
+ - missing_value        a required column is null / unparseable
+ - duplicate            repeated (symbol, date); the first row is kept
+ - high_below_low       high < low
+ - open_outside_range   open outside [low, high]
+ - close_outside_range  close outside [low, high]
+ - nonpositive_price    open, high, low or close <= 0
+ - nonpositive_volume   volume <= 0
+ - jump                 |log return| vs the previous clean bar above JUMP_Z robust sigmas of the symbol
+ - gap_before           calendar bars missing before this row (per-symbol frequency `freq`)
+
+Rows failing a QUARANTINE check are moved to the quarantine frame; jump and
+gap_before are reported but kept (crypto does move 50% in a day, and
+dropping a row would only widen the gap).
+
+Functions
+---------
+- validate(df, freq="D", jump_z=JUMP_Z, quarantine=QUARANTINE) -> ValidationResult(clean, quarantine, report)
+- summarize(report) -> dict
+"""
+
+from pathlib import Path
+from typing import Iterable, NamedTuple
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parents[1]
+DEFAULT_OUT_DIR = PROJECT_ROOT / "data" / "EDA" / "validation"
+
+CHECKS = ("missing_value", "duplicate", "high_below_low", "open_outside_range", "close_outside_range",
+          "nonpositive_price", "nonpositive_volume", "jump", "gap_before")
+QUARANTINE = frozenset(CHECKS[:7])
+REQUIRED = ["date", "symbol", "open", "high", "low", "close", "volume"]
+JUMP_Z = 12.0
+# normal-consistent scale of the median absolute deviation
+MAD_SCALE = 1.4826
+
+
+class ValidationResult(NamedTuple):
+    clean: pd.DataFrame        # rows passing every quarantine check, sorted by (symbol, date)
+    quarantine: pd.DataFrame   # rejected rows plus an `issues` column ("duplicate,high_below_low")
+    report: pd.DataFrame       # one row per symbol: rows, dates, missing_bars, per-check counts
+
+
+def _issue_labels(flags: np.ndarray) -> np.ndarray:
+    """Bit masks -> comma-separated check names (decoded once per distinct mask)."""
+    masks, inverse = np.unique(flags, return_inverse=True)
+    labels = np.array([",".join(c for i, c in enumerate(CHECKS) if m >> i & 1) for m in masks], dtype=object)
+    return labels[inverse]
+
+
+def validate(df: pd.DataFrame, freq: str = "D", jump_z: float = JUMP_Z,
+             quarantine: Iterable[str] = QUARANTINE) -> ValidationResult:
+    """
+    Run every check on a long OHLCV frame (lowercase columns). Raises
+    ValueError if required columns are missing or `quarantine` names an
+    unknown check.
+    """
+    missing = set(REQUIRED) - set(df.columns)
+    if missing:
+        raise ValueError(f"Dataset missing required columns: {missing}")
+    quarantine = frozenset(quarantine)
+    unknown = quarantine - set(CHECKS)
+    if unknown:
+        raise ValueError(f"Unknown checks: {sorted(unknown)}")
+
+    df = df.sort_values(["symbol", "date"], kind="stable", na_position="last").reset_index(drop=True)
+    n = len(df)
+    codes, _ = pd.factorize(df["symbol"])
+    dates = df["date"].to_numpy("datetime64[ns]")
+    o, h, l, c, v = (df[col].to_numpy(float) for col in ("open", "high", "low", "close", "volume"))
+
+    bits = {name: 1 << i for i, name in enumerate(CHECKS)}
+    flags = np.zeros(n, dtype=np.int64)
+
+    def mark(name, mask):
+        flags[mask] |= bits[name]
+
+    # NaN compares False, so a missing value only fails missing_value
+    null = df[REQUIRED].isna().any(axis=1).to_numpy() | (codes < 0)
+    mark("missing_value", null)
+    same_symbol = np.r_[False, codes[1:] == codes[:-1]] & (codes >= 0)
+    mark("duplicate", same_symbol & np.r_[False, dates[1:] == dates[:-1]] & ~np.isnat(dates))
+    mark("high_below_low", h < l)
+    mark("open_outside_range", (o < l) | (o > h))
+    mark("close_outside_range", (c < l) | (c > h))
+    mark("nonpositive_price", (np.column_stack([o, h, l, c]) <= 0).any(axis=1))
+    mark("nonpositive_volume", v <= 0)
+
+    # jumps and gaps are measured against the previous row that will be kept
+    kept = (flags & sum(bits[q] for q in quarantine)) == 0
+    last_kept = np.maximum.accumulate(np.where(kept, np.arange(n), -1))
+    prev = np.r_[-1, last_kept[:-1]]
+    has_prev = kept & (prev >= 0)
+    has_prev[has_prev] = codes[prev[has_prev]] == codes[has_prev]
+    idx = np.flatnonzero(has_prev)
+
+    log_ret = np.log(c[idx] / c[prev[idx]])
+    ret = pd.Series(log_ret)
+    grouped = ret.groupby(codes[idx])
+    centre = grouped.transform("median").to_numpy()
+    spread = (ret - centre).abs().groupby(codes[idx]).transform("median").to_numpy() * MAD_SCALE
+    with np.errstate(divide="ignore", invalid="ignore"):
+        jumps = np.abs(log_ret - centre) > jump_z * spread
+    mark("jump", idx[jumps & (spread > 0)])
+
+    step = pd.Timedelta(pd.tseries.frequencies.to_offset(freq)).value
+    missed = np.zeros(n, dtype=np.int64)
+    missed[idx] = np.maximum((dates[idx] - dates[prev[idx]]).view("int64") // step - 1, 0)
+    mark("gap_before", missed > 0)
+
+    # per-symbol report: one groupby over small integer columns
+    counts = pd.DataFrame({name: (flags & bit) != 0 for name, bit in bits.items()})
+    counts["quarantined"] = ~kept
+    counts["rows"] = 1
+    counts["missing_bars"] = missed
+    counts["max_gap"] = missed
+    counts["first_date"] = dates
+    counts["last_date"] = dates
+    counts["symbol"] = df["symbol"].fillna("<missing>").to_numpy()
+    agg = {col: "sum" for col in CHECKS + ("quarantined", "rows", "missing_bars")}
+    agg.update(max_gap="max", first_date="min", last_date="max")
+    report = counts.groupby("symbol", sort=True).agg(agg).reset_index()
+    report = report[["symbol", "rows", "first_date", "last_date", "missing_bars", "max_gap", "quarantined",
+                     *CHECKS]]
+
+    rejected = df[~kept].copy()
+    rejected["issues"] = _issue_labels(flags[~kept])
+    clean = df[kept].reset_index(drop=True)
+    return ValidationResult(clean, rejected.reset_index(drop=True), report)
+
+
+def summarize(report: pd.DataFrame) -> dict:
+    """Totals over the per-symbol report (rows, quarantined, missing_bars and each check)."""
+    totals = report[["rows", "quarantined", "missing_bars", *CHECKS]].sum()
+    return {k: int(v) for k, v in totals.items()}
+
+
+def main():
+    import argparse
+    import sys
+
+    from src.io import load_dataset
+
+    parser = argparse.ArgumentParser(description="Validate the processed dataset and write the report and quarantine.")
+    parser.add_argument("--path", default=None, help="Dataset file (default: the processed final_df)")
+    parser.add_argument("--freq", default="D", help="Expected bar frequency for gap detection")
+    parser.add_argument("--jump-z", type=float, default=JUMP_Z)
+    parser.add_argument("--out-dir", default=str(DEFAULT_OUT_DIR))
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 if any row is quarantined")
+    args = parser.parse_args()
+
+    df = load_dataset([args.path] if args.path else None, validate=False)
+    result = validate(df, freq=args.freq, jump_z=args.jump_z)
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    result.report.to_csv(out_dir / "validation_report.csv", index=False)
+    result.quarantine.to_csv(out_dir / "quarantine.csv", index=False)
+
+    totals = summarize(result.report)
+    print(f"{totals['rows']:,} rows, {len(result.report)} symbols: {totals['quarantined']:,} quarantined, "
+          f"{totals['missing_bars']:,} missing bars")
+    for name in CHECKS:
+        if totals[name]:
+            print(f"  {name:<20} {totals[name]:,}")
+    print("Report and quarantine saved to:", out_dir)
+    if args.strict and totals["quarantined"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
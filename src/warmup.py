@@ -0,0 +1,153 @@
+# src/warmup.py
+"""
+Boot-time warmup and the process-wide data caches shared by all sessions.
+
+The first visitor after a deploy should not wait on cold imports (plotly,
+the src modules behind the pages) or on Parquet parsing. warmup() imports
+the heavy modules and fills the caches:
+
+ - dataset()        the processed dataset (load_dataset), reloaded when the file changes
+ - symbol_index()   per-symbol first / last date and row count
+ - latest run       forecast_store.preload_run(), so page reads of it skip Parquet
+
+Frames returned by dataset() and symbol_index() are shared between
+sessions; treat them as read-only.
+
+To warm up before the server accepts connections, start the app through
+the launcher, which warms this process and then runs Streamlit in it:
+
+    python -m src.warmup [streamlit options]     # instead of `streamlit run app.py`
+    python -m src.warmup --check                 # warm up, print timings, exit
+
+app.py also calls start_background_warmup(), so a plain `streamlit run`
+warms up in a background thread when the first session starts.
+
+Functions
+---------
+- dataset(paths=None) -> pd.DataFrame
+- symbol_index(paths=None) -> pd.DataFrame
+- warmup(modules=HEAVY_MODULES, data=True) -> dict
+- start_background_warmup() -> threading.Thread
+"""
+
+import threading
+import time
+from pathlib import Path
+import pandas as pd
+
+from src.io import dataset_path, load_dataset
+from src.lazy import preload
+
+PROJECT_ROOT = Path(__file__).parents[1]
+APP_PATH = PROJECT_ROOT / "app.py"
+
+# imported by the pages on first use
+HEAVY_MODULES = [
+    "plotly.graph_objects",
+    "plotly.express",
+    "src.charts",
+    "src.ui",
+    "src.simulation",
+    "src.forecast_store",
+    "src.evaluation",
+    "src.neighbors",
+]
+
+# path -> {"mtime": float, "frame": DataFrame, "index": DataFrame or None}
+_datasets = {}
+_lock = threading.RLock()
+_thread = None
+
+
+def _entry(paths: list = None) -> dict:
+    path = dataset_path(paths)
+    mtime = path.stat().st_mtime
+    # held while loading, so a page arriving mid-warmup waits instead of parsing twice
+    with _lock:
+        entry = _datasets.get(path)
+        if entry is None or entry["mtime"] != mtime:
+            entry = {"mtime": mtime, "frame": load_dataset([path]), "index": None}
+            _datasets[path] = entry
+        return entry
+
+
+def dataset(paths: list = None) -> pd.DataFrame:
+    """The processed dataset (lowercase columns), cached per file until it changes on disk."""
+    return _entry(paths)["frame"]
+
+
+def symbol_index(paths: list = None) -> pd.DataFrame:
+    """symbol, first_date, last_date, rows for every symbol in the dataset (sorted by symbol)."""
+    entry = _entry(paths)
+    with _lock:
+        if entry["index"] is None:
+            entry["index"] = (entry["frame"].groupby("symbol")["date"]
+                              .agg(first_date="min", last_date="max", rows="size")
+                              .reset_index())
+        return entry["index"]
+
+
+def warmup(modules: list = HEAVY_MODULES, data: bool = True) -> dict:
+    """
+    Import `modules` and fill the data caches. Failures are recorded in the
+    returned timings instead of raised: warmup must never stop the app booting.
+    """
+    report = {"modules": preload(modules)}
+    if not data:
+        return report
+
+    steps = [("dataset", dataset), ("symbol_index", symbol_index), ("latest_run", _preload_latest_run)]
+    for name, step in steps:
+        t0 = time.perf_counter()
+        try:
+            step()
+            report[name] = round(time.perf_counter() - t0, 4)
+        except Exception as e:
+            report[name] = f"error: {e}"
+    return report
+
+
+def _preload_latest_run() -> str:
+    from src.forecast_store import preload_run
+
+    return preload_run()
+
+
+def start_background_warmup() -> threading.Thread:
+    """Run warmup() once per process in a daemon thread (later calls return the same thread)."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=warmup, name="warmup", daemon=True)
+            _thread.start()
+        return _thread
+
+
+def main():
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Warm up imports and data caches, then run the Streamlit app in this process.")
+    parser.add_argument("--check", action="store_true", help="Warm up and print timings without starting the app")
+    parser.add_argument("--app", default=str(APP_PATH), help="Streamlit entry script")
+    args, streamlit_args = parser.parse_known_args()
+
+    t0 = time.perf_counter()
+    report = warmup()
+    for name, took in report.pop("modules").items():
+        print(f"import {name:<28} {took}")
+    for name, took in report.items():
+        print(f"load   {name:<28} {took}")
+    print(f"Warmup finished in {time.perf_counter() - t0:.2f}s")
+    if args.check:
+        return
+
+    from streamlit.web import cli as stcli
+
+    sys.argv = ["streamlit", "run", args.app, *streamlit_args]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# tests/test_alignment.py
+"""lagged / calendar_returns: lags and returns read off the masked calendar."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.alignment import calendar_returns, lagged
+
+
+def _frame(drop=()):
+    """Two coins of daily closes 1..10 (shuffled rows); `drop` removes AAA-USD bars by position."""
+    dates = pd.date_range("2024-01-01", periods=10, freq="D")
+    df = pd.DataFrame({
+        "date": np.tile(dates, 2),
+        "symbol": np.repeat(["AAA-USD", "BBB-USD"], 10),
+        "close": np.tile(np.arange(1.0, 11.0), 2),
+    })
+    df = df.drop(index=list(drop))
+    return df.sample(frac=1, random_state=0)
+
+
+def test_matches_grouped_pct_change_without_gaps():
+    df = _frame()
+    expected = df.sort_values(["symbol", "date"]).groupby("symbol")["close"].pct_change()
+    pd.testing.assert_series_equal(calendar_returns(df), expected.reindex(df.index), check_names=False)
+
+
+def test_returns_and_lags_never_span_a_gap():
+    df = _frame(drop=[4, 5])  # AAA-USD has no bar on Jan 5 and 6
+    rows = df.assign(returns=calendar_returns(df), lag_2=lagged(df, 2), lag_3=lagged(df, 3))
+    aaa = rows[rows["symbol"] == "AAA-USD"].set_index("date").sort_index()
+
+    # a per-symbol shift would pair Jan 7 with Jan 4 as if it were the previous bar
+    assert np.isnan(aaa.loc["2024-01-07", "returns"])
+    assert np.isnan(aaa.loc["2024-01-07", "lag_2"])
+    assert aaa.loc["2024-01-07", "lag_3"] == 4.0
+    assert aaa.loc["2024-01-08", "returns"] == pytest.approx(8 / 7 - 1)
+    # the other coin is untouched
+    assert rows.loc[rows["symbol"] == "BBB-USD", "returns"].isna().sum() == 1
@@ -0,0 +1,44 @@
+# tests/test_portfolio.py
+"""walk_forward_weights: windows, history requirements and late listings."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.portfolio import walk_forward_weights
+from src.simulation import rebalance_dates
+
+
+def _prices(n_days=200, late=None, seed=0):
+    """Three coins of daily closes; with `late`, LATE-USD has no price before that day."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2023-01-01", periods=n_days, freq="D")
+    paths = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, size=(n_days, 3)), axis=0))
+    prices = pd.DataFrame(paths, index=index, columns=["AAA-USD", "BBB-USD", "LATE-USD"])
+    if late:
+        prices.iloc[:late, 2] = np.nan
+    return prices
+
+
+@pytest.mark.parametrize("lookback", [90, 365, 1095])
+def test_first_weights_once_min_history_is_reached(lookback):
+    prices = _prices()
+    weights = walk_forward_weights(prices, "min_variance", lookback=lookback, rebalance="M", min_history=60)
+
+    # every month start with 60 returns (61 prices) before it gets weights, even when lookback exceeds history
+    expected = [d for d in rebalance_dates(prices.index[1:], "M") if prices.index.get_loc(d) >= 60]
+    assert list(weights.index) == expected
+    np.testing.assert_allclose(weights.sum(axis=1), 1.0)
+
+
+def test_late_listing_joins_once_its_window_is_complete():
+    prices = _prices(late=40)
+    weights = walk_forward_weights(prices, "equal_weight", lookback=60, rebalance=30, min_history=30)
+
+    listed = prices.index[40]
+    for date, row in weights.iterrows():
+        # the window of 60 returns before `date` must not reach back to the listing day's missing return
+        complete = prices.index.get_loc(date) - 60 >= prices.index.get_loc(listed)
+        assert (row["LATE-USD"] > 0) == complete
+        assert row.sum() == pytest.approx(1.0)
+    assert weights["LATE-USD"].iloc[-1] == pytest.approx(1 / 3)
@@ -0,0 +1,120 @@
+# tests/test_simulation.py
+"""portfolio_backtest against a naive day-by-day reference implementation."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.simulation import portfolio_backtest, rebalance_dates
+
+
+def _prices(n_days=200, late=60, seed=0):
+    """Three coins of daily closes; LATE-USD has no price before day `late`."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2023-01-01", periods=n_days, freq="D")
+    paths = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, size=(n_days, 3)), axis=0))
+    prices = pd.DataFrame(paths, index=index, columns=["AAA-USD", "BBB-USD", "LATE-USD"])
+    prices.iloc[:late, 2] = np.nan
+    return prices
+
+
+def _target_at(weights, date, columns):
+    if isinstance(weights, pd.Series):
+        return weights.reindex(columns).fillna(0.0)
+    known = weights.sort_index().loc[:date]
+    if known.empty:
+        return pd.Series(0.0, index=columns)
+    return known.iloc[-1].reindex(columns).fillna(0.0)
+
+
+def naive_backtest(prices, weights, rebalance, cost_bps, initial_capital=1.0):
+    """One day at a time, one coin at a time, with plain floats."""
+    rate = cost_bps / 10_000
+    on = set(rebalance_dates(prices.index, rebalance))
+    last, units, cash = {}, {s: 0.0 for s in prices.columns}, initial_capital
+    nav, turnover, costs = [], [], []
+
+    def value():
+        return cash + sum(units[s] * last.get(s, 0.0) for s in prices.columns)
+
+    for date, row in prices.iterrows():
+        for symbol, price in row.items():
+            if not np.isnan(price):
+                last[symbol] = price
+        if date in on:
+            target = _target_at(weights, date, prices.columns)
+            intended = target.sum()
+            held = sum(target[s] for s in prices.columns if s in last)
+            scale = intended / held if held != 0 else 0.0
+            w = {s: target[s] * scale if s in last else 0.0 for s in prices.columns}
+            before = value()
+            traded = sum(abs(w[s] * before - units[s] * last.get(s, 0.0)) for s in prices.columns)
+            cost = rate * traded
+            after = before - cost
+            units = {s: w[s] * after / last[s] if s in last else 0.0 for s in prices.columns}
+            cash = after - sum(w[s] * after for s in prices.columns)
+            turnover.append(traded / before)
+            costs.append(cost)
+        nav.append(value())
+    return np.array(nav), np.array(turnover), np.array(costs)
+
+
+@pytest.mark.parametrize("rebalance", ["M", "W", 10, None])
+def test_static_weights_match_naive_loop(rebalance):
+    prices = _prices()
+    weights = pd.Series({"AAA-USD": 0.5, "BBB-USD": 0.2, "LATE-USD": 0.3})
+    result = portfolio_backtest(prices, weights, rebalance=rebalance, cost_bps=25.0)
+    nav, turnover, costs = naive_backtest(prices, weights, rebalance, 25.0)
+
+    np.testing.assert_allclose(result["nav"]["portfolio"].to_numpy(), nav, rtol=1e-12)
+    np.testing.assert_allclose(result["turnover"]["portfolio"].to_numpy(), turnover, rtol=1e-12)
+    np.testing.assert_allclose(result["costs"]["portfolio"].to_numpy(), costs, rtol=1e-12, atol=1e-15)
+
+
+def test_late_listing_is_held_only_once_priced():
+    prices = _prices(late=60)
+    weights = pd.Series({"AAA-USD": 0.5, "BBB-USD": 0.2, "LATE-USD": 0.3})
+    holdings = portfolio_backtest(prices, weights, rebalance="M")["holdings"]["portfolio"]
+
+    assert (holdings["LATE-USD"].iloc[:60] == 0).all()
+    assert holdings["LATE-USD"].iloc[-1] > 0
+    # before the listing its 30% is spread pro rata over the other two coins
+    first = holdings.iloc[0] * prices.iloc[0].fillna(0.0)
+    assert first["AAA-USD"] / first["BBB-USD"] == pytest.approx(0.5 / 0.2)
+    assert first.sum() == pytest.approx(1.0 - 10 / 10_000)  # the 10 bps default cost on the initial buy
+
+
+def test_dated_targets_and_partial_exposure_match_naive_loop():
+    prices = _prices()
+    targets = pd.DataFrame(
+        {"AAA-USD": [0.6, 0.1, 0.3], "BBB-USD": [0.2, 0.4, 0.3], "LATE-USD": [0.0, 0.4, 0.2]},
+        index=pd.to_datetime(["2023-01-20", "2023-03-15", "2023-05-02"]),
+    )
+    static = pd.Series({"AAA-USD": 0.4, "BBB-USD": 0.3})  # 30% cash
+    result = portfolio_backtest(prices, {"dated": targets, "static": static}, rebalance="W", cost_bps=10.0)
+
+    for name, weights in {"dated": targets, "static": static}.items():
+        nav, turnover, costs = naive_backtest(prices, weights, "W", 10.0)
+        np.testing.assert_allclose(result["nav"][name].to_numpy(), nav, rtol=1e-12)
+        np.testing.assert_allclose(result["turnover"][name].to_numpy(), turnover, rtol=1e-12)
+        np.testing.assert_allclose(result["costs"][name].to_numpy(), costs, rtol=1e-12, atol=1e-15)
+    # no target before 2023-01-20: the dated scheme stays in cash
+    assert (result["nav"]["dated"].loc[:"2023-01-19"] == 1.0).all()
+
+
+def test_zero_cost_buy_and_hold_is_the_price_ratio():
+    prices = _prices(late=0)
+    weights = pd.Series({"AAA-USD": 1.0})
+    nav = portfolio_backtest(prices, weights, rebalance=None, cost_bps=0.0)["nav"]["portfolio"]
+    expected = prices["AAA-USD"] / prices["AAA-USD"].iloc[0]
+    np.testing.assert_allclose(nav.to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+
+def test_rebalance_dates():
+    index = pd.date_range("2023-01-30", periods=10, freq="D")
+    assert list(rebalance_dates(index, "M")) == [pd.Timestamp("2023-01-30"), pd.Timestamp("2023-02-01")]
+    assert list(rebalance_dates(index, 4)) == list(index[::4])
+    assert list(rebalance_dates(index, None)) == [index[0]]
+    assert list(rebalance_dates(index, ["2023-01-01", "2023-02-03", "2024-01-01"])) == [index[0], index[4]]
+    with pytest.raises(ValueError):
+        rebalance_dates(index, 0)
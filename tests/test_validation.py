@@ -0,0 +1,133 @@
+# tests/test_validation.py
+"""validate() on a clean frame and on frames with injected defects."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.validation import CHECKS, QUARANTINE, summarize, validate
+
+
+def _frame(n_days=120, seed=0):
+    """Two coins of consistent daily OHLCV bars with small, noisy moves."""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for symbol in ["AAA-USD", "BBB-USD"]:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+        open_ = close * np.exp(rng.normal(0, 0.005, n_days))
+        parts.append(pd.DataFrame({
+            "date": pd.date_range("2023-01-01", periods=n_days, freq="D"),
+            "symbol": symbol,
+            "open": open_,
+            "high": np.maximum(open_, close) * 1.01,
+            "low": np.minimum(open_, close) * 0.99,
+            "close": close,
+            "volume": rng.uniform(1e6, 2e6, n_days),
+        }))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _row(df, symbol, day):
+    return df.index[(df["symbol"] == symbol) & (df["date"] == pd.Timestamp("2023-01-01") + pd.Timedelta(days=day))][0]
+
+
+def _report(result, symbol):
+    return result.report.set_index("symbol").loc[symbol]
+
+
+def test_clean_frame_passes_every_check():
+    df = _frame()
+    result = validate(df.sample(frac=1, random_state=0))  # order does not matter
+
+    assert result.quarantine.empty
+    assert len(result.clean) == len(df)
+    assert result.clean[["symbol", "date"]].equals(df.sort_values(["symbol", "date"])[["symbol", "date"]]
+                                                   .reset_index(drop=True))
+    assert all(v == 0 for k, v in summarize(result.report).items() if k not in ("rows",))
+
+
+def test_duplicate_keeps_the_first_row():
+    df = _frame()
+    dup = df.loc[[_row(df, "AAA-USD", 10)]].assign(close=lambda d: d["close"] * 1.001)
+    result = validate(pd.concat([df, dup], ignore_index=True))
+
+    assert len(result.quarantine) == 1
+    assert result.quarantine["issues"].iloc[0] == "duplicate"
+    assert result.quarantine["close"].iloc[0] == dup["close"].iloc[0]
+    assert len(result.clean) == len(df)
+    assert _report(result, "AAA-USD")["duplicate"] == 1
+
+
+@pytest.mark.parametrize("column, value, check", [
+    ("low", 1e9, "high_below_low"),
+    ("volume", 0.0, "nonpositive_volume"),
+    ("open", -1.0, "nonpositive_price"),
+    ("close", np.nan, "missing_value"),
+])
+def test_bad_row_is_quarantined(column, value, check):
+    df = _frame()
+    i = _row(df, "BBB-USD", 30)
+    df.loc[i, column] = value
+    result = validate(df)
+
+    assert check in QUARANTINE
+    assert len(result.clean) == len(df) - 1
+    assert check in result.quarantine["issues"].iloc[0].split(",")
+    assert result.quarantine["date"].iloc[0] == df.loc[i, "date"]
+    assert _report(result, "BBB-USD")[check] == 1
+    assert _report(result, "AAA-USD")["quarantined"] == 0
+
+
+def test_high_below_low_also_flags_open_and_close_outside_range():
+    df = _frame()
+    i = _row(df, "AAA-USD", 5)
+    df.loc[i, ["high", "low"]] = df.loc[i, ["low", "high"]].to_numpy()
+    issues = validate(df).quarantine["issues"].iloc[0].split(",")
+    assert {"high_below_low", "open_outside_range", "close_outside_range"} <= set(issues)
+
+
+def test_gap_is_reported_and_kept():
+    df = _frame()
+    gap = [_row(df, "AAA-USD", day) for day in (50, 51, 52)]
+    result = validate(df.drop(index=gap))
+
+    assert result.quarantine.empty
+    report = _report(result, "AAA-USD")
+    assert report["gap_before"] == 1
+    assert report["missing_bars"] == 3
+    assert report["max_gap"] == 3
+    assert _report(result, "BBB-USD")["missing_bars"] == 0
+
+
+def test_jump_is_reported_and_kept():
+    df = _frame()
+    rows = (df["symbol"] == "BBB-USD") & (df["date"] >= pd.Timestamp("2023-03-01"))
+    df.loc[rows, ["open", "high", "low", "close"]] *= 3.0  # one permanent +110% log move
+    result = validate(df)
+
+    assert result.quarantine.empty
+    assert _report(result, "BBB-USD")["jump"] == 1
+    assert _report(result, "AAA-USD")["jump"] == 0
+
+
+def test_jump_is_measured_against_the_previous_kept_row():
+    df = _frame()
+    df.loc[_row(df, "AAA-USD", 40), "close"] = 1e-9  # quarantined (close below low)
+    result = validate(df)
+
+    assert len(result.quarantine) == 1
+    assert _report(result, "AAA-USD")["jump"] == 0
+
+
+def test_quarantine_selection_and_errors():
+    df = _frame()
+    df.loc[_row(df, "AAA-USD", 20), "volume"] = 0.0
+    kept = validate(df, quarantine=QUARANTINE - {"nonpositive_volume"})
+    assert kept.quarantine.empty
+    assert _report(kept, "AAA-USD")["nonpositive_volume"] == 1
+
+    with pytest.raises(ValueError):
+        validate(df, quarantine={"no_such_check"})
+    with pytest.raises(ValueError):
+        validate(df.drop(columns="volume"))
+    assert set(CHECKS) <= set(kept.report.columns)